@@ -0,0 +1,50 @@
+# bench_attribution.py — cost of mapping match offsets to segments
+# Builds transcripts of uneven turn lengths and times the offset table +
+# bisect lookup for every detected event. Per-event cost should stay flat as
+# the transcript grows; `ratio_misattributed` counts the events the old
+# pos/len*n estimate would have put in the wrong segment.
+#
+#   python benchmarks/bench_attribution.py [--turns 200 2000] [--repeat 10]
+
+import argparse, json, os, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from bench_catalog import LINES, _summary  # noqa: E402
+
+def uneven_dialog(turns: int) -> str:
+    # turn i repeats its line 1..5 times, so turn lengths vary by 5x
+    return "\n".join(f"{'AB'[i % 2]}: " + " ".join([LINES[i % len(LINES)]] * (1 + i * 7 % 5))
+                     for i in range(turns))
+
+def bench(turns: int, repeat: int, catalog) -> dict:
+    text = uneven_dialog(turns)
+    segments = engine_py.segment_dialog(text)
+    spans = [s for per in catalog.scanner.matches(text) for s in per]
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        starts = engine_py._segment_offsets(text, segments)
+        owners = [engine_py._span_to_segment(a, starts) for a, _ in spans]
+        samples.append((time.perf_counter() - t0) * 1000)
+    n = len(segments)
+    ratio = [min(n - 1, int(a / len(text) * n)) for a, _ in spans]
+    report = {"turns": turns, "chars": len(text), "events": len(spans), **_summary(samples)}
+    report["us_per_event"] = round(report["p50_ms"] * 1000 / max(1, len(spans)), 3)
+    report["ratio_misattributed"] = sum(a != b for a, b in zip(owners, ratio))
+    return report
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, nargs="+", default=[200, 2000])
+    ap.add_argument("--repeat", type=int, default=10)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    catalog = engine_py.get_catalog()
+    print(json.dumps([bench(t, a.repeat, catalog) for t in a.turns], indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# bench_batch.py — throughput of engine_py.run_batch() by worker count
+# Every run analyses the same set of dialogs; scaling should stay close to
+# linear up to the number of physical cores.
+#
+#   python benchmarks/bench_batch.py [--items 400] [--turns 20] [--workers 1 2 4]
+
+import argparse, json, os, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from bench_catalog import dialog  # noqa: E402
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=400)
+    ap.add_argument("--turns", type=int, default=20)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--chunksize", type=int, default=16)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    items = [dialog(a.turns + i % 7) for i in range(a.items)]
+    engine_py.get_catalog()  # compile outside the timed region
+    report = {"items": a.items, "turns": a.turns, "cpus": os.cpu_count(), "runs": []}
+    base = None
+    for w in a.workers:
+        t0 = time.perf_counter()
+        failed = sum(isinstance(r, engine_py.BatchItemError)
+                     for r in engine_py.run_batch(items, workers=w, chunksize=a.chunksize))
+        secs = time.perf_counter() - t0
+        rate = a.items / secs
+        base = base or rate
+        report["runs"].append({"workers": w, "seconds": round(secs, 3), "items_per_s": round(rate, 1),
+                               "speedup": round(rate / base, 2), "failed": failed})
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# bench_catalog.py — per-call latency of engine_py.run() with a cold vs. warm catalog
+# Cold = catalog cache cleared before every call (the pre-CompiledCatalog cost:
+# read + parse three JSON files, compile every regex, hash the canon).
+# Warm = one Engine reused across calls.
+#
+#   python benchmarks/bench_catalog.py [--turns 20] [--repeat 30]
+
+import argparse, json, os, statistics, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+
+LINES = [
+    "Danke, dass du dir Zeit nimmst.",
+    "Ich hatte leider keine Zeit, mich früher zu melden.",
+    "Ja genau, das stimmt so.",
+    "Es tut mir leid, das war nicht fair von mir.",
+    "Nein, auf keinen Fall mache ich das.",
+    "Ich verstehe dich, das muss schwer sein.",
+    "Vielleicht können wir morgen nochmal reden?",
+    "Wegen dir ist das alles passiert.",
+]
+
+def dialog(turns: int) -> str:
+    return "\n".join(f"{'AB'[i % 2]}: {LINES[i % len(LINES)]}" for i in range(turns))
+
+def _time(fn, repeat: int):
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+def _summary(samples):
+    s = sorted(samples)
+    return {"p50_ms": round(statistics.median(s), 3),
+            "p95_ms": round(s[min(len(s) - 1, int(len(s) * 0.95))], 3),
+            "mean_ms": round(statistics.fmean(s), 3)}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=30)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    text = dialog(a.turns)
+
+    def cold():
+        engine_py.clear_catalog_cache()
+        engine_py.run(text=text)
+
+    eng = engine_py.Engine()
+    eng.run(text=text)  # warm-up: load + compile once
+    cold_ms = _time(cold, a.repeat)
+    warm_ms = _time(lambda: eng.run(text=text), a.repeat)
+    report = {
+        "turns": a.turns,
+        "chars": len(text),
+        "markers": len(eng.catalog.markers),
+        "cold": _summary(cold_ms),
+        "warm": _summary(warm_ms),
+    }
+    report["speedup_p50"] = round(report["cold"]["p50_ms"] / max(1e-9, report["warm"]["p50_ms"]), 2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
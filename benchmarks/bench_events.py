@@ -0,0 +1,85 @@
+# bench_events.py — event pipeline with per-hit dicts vs. the columnar EventTable
+# "dicts" replays the pre-EventTable path: one dict per hit → promote_sem →
+# apply_activations → _build_counts (twice, as _package_output recounted).
+# "table" is what _run_catalog does now. Both start from the same scanner
+# matches (scanning is identical) and end with the same marker list.
+# detect_held_kb is what the detection stage keeps alive until packaging;
+# peak_kb includes the packaged marker dicts, which both paths build.
+#
+#   python benchmarks/bench_events.py [--turns 2000] [--repeat 5]
+
+import argparse, gc, json, os, sys, time, tracemalloc
+from itertools import chain
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from bench_catalog import _summary, dialog  # noqa: E402
+
+def dict_path(catalog, text, segments, matches):
+    events = engine_py._events_from_matches(text, segments, catalog.scanner.slots, matches)
+    events, _ = catalog.promotion.apply(events)
+    events = engine_py.apply_activations(events, segments, catalog.rules)
+    counts = engine_py._build_counts(events)
+    engine_py._build_counts(events)
+    return events, counts
+
+def table_path(catalog, text, segments, matches):
+    sc = catalog.scanner
+    table = engine_py.EventTable.from_matches(text, segments, sc.ids, sc.slot_marker, sc.slot_type, matches)
+    promoted = catalog.promotion.promoted(table.atos_by_segment())
+    extra = promoted + catalog.rules.fire_rows(chain(table.rows(), engine_py._event_rows(promoted)), segments)
+    extra.sort(key=lambda e: e["span"]["start"])
+    counts = table.counts(extra)
+    return table.merged(extra), counts
+
+def _held_kb(fn) -> float:
+    # memory still referenced by fn's result, i.e. what the detection stage
+    # keeps alive until packaging
+    gc.collect()
+    tracemalloc.start()
+    kept = fn()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return round(held / 1024, 1)
+
+def _peak_kb(fn) -> float:
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=15)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    catalog = engine_py.get_catalog()
+    text = dialog(a.turns)
+    segments = engine_py.segment_dialog(text)
+    matches = catalog.scanner.matches(text)
+    assert dict_path(catalog, text, segments, matches) == table_path(catalog, text, segments, matches)
+    report = {"turns": a.turns, "events": sum(map(len, matches))}
+    for name, fn in (("dicts", dict_path), ("table", table_path)):
+        samples = []
+        for _ in range(a.repeat):
+            gc.collect()
+            t0 = time.perf_counter()
+            fn(catalog, text, segments, matches)
+            samples.append((time.perf_counter() - t0) * 1000)
+        report[name] = dict(_summary(samples), peak_kb=_peak_kb(lambda: fn(catalog, text, segments, matches)))
+    sc = catalog.scanner
+    report["dicts"]["detect_held_kb"] = _held_kb(
+        lambda: engine_py._events_from_matches(text, segments, sc.slots, matches))
+    report["table"]["detect_held_kb"] = _held_kb(
+        lambda: engine_py.EventTable.from_matches(text, segments, sc.ids, sc.slot_marker, sc.slot_type, matches))
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# bench_indices.py — index scoring for many feature vectors
+# scalar = _compute_indices per feature dict; fallback = IndexModel without
+# NumPy; numpy = IndexModel matmul + vectorized erf (skipped when absent).
+#
+#   python benchmarks/bench_indices.py [--rows 100000] [--repeat 3]
+
+import argparse, json, os, random, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from bench_catalog import _summary  # noqa: E402
+
+def weights(seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    return {"indices": {k: {"w": {t: rng.uniform(-2, 2) for t in engine_py.FEATURE_KEYS},
+                            "bias": rng.uniform(-0.5, 0.5)} for k in engine_py.INDEX_KEYS},
+            "calib": {"mu": {k: rng.uniform(-0.5, 0.5) for k in engine_py.INDEX_KEYS},
+                      "sigma": {k: rng.uniform(0.2, 1.5) for k in engine_py.INDEX_KEYS}}}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--repeat", type=int, default=3)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    w = weights()
+    rng = random.Random(2)
+    feats = [{t: rng.random() for t in engine_py.FEATURE_KEYS} for _ in range(a.rows)]
+    rows = engine_py.feature_rows(feats)
+    model = engine_py.IndexModel(w)
+    runs = [("scalar", lambda: [engine_py._compute_indices(f, w) for f in feats]),
+            ("fallback", lambda: model.score(rows, use_numpy=False))]
+    if engine_py._np is not None:
+        x = engine_py._np.asarray(rows)
+        runs.append(("numpy", lambda: model.score(x, use_numpy=True)))
+    report = {"rows": a.rows, "numpy_available": engine_py._np is not None}
+    for name, fn in runs:
+        samples = []
+        for _ in range(a.repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        report[name] = dict(_summary(samples), rows_per_s=round(a.rows / (min(samples) / 1000)))
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# bench_promotion.py — promote_sem() with a large generated promotion map
+# Compares the compiled ATO id -> rules index against the original
+# rule x segment scan on the same events.
+#
+#   python benchmarks/bench_promotion.py [--rules 1000] [--turns 500] [--repeat 10]
+
+import argparse, json, os, random, sys, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from bench_catalog import _summary, dialog  # noqa: E402
+
+def scan_promote(events, promo_map):
+    # pre-index implementation, kept for comparison
+    out = list(events)
+    by_seg = {}
+    for ev in events:
+        if ev["type"] == "ATO":
+            by_seg.setdefault(ev["segment_idx"], []).append(ev)
+    for rule in promo_map.get("map") or []:
+        min_ato = ((rule.get("when", {}).get("segment_co_occurs") or {}).get("min_ATO")) or 2
+        allowed = set(rule.get("from_ATO_ids") or [])
+        for seg_idx, atos in by_seg.items():
+            hits = [a for a in atos if not allowed or a["id"] in allowed]
+            if len(hits) >= min_ato:
+                out.append({"id": rule.get("promote"), "type": "SEM",
+                            "span": {"start": hits[0]["span"]["start"], "end": hits[-1]["span"]["end"]},
+                            "segment_idx": seg_idx, "who": hits[-1]["who"],
+                            "promotion_of": [h["id"] for h in hits]})
+    out.sort(key=lambda e: e["span"]["start"])
+    return out, []
+
+def promo_map(n_rules: int, ato_ids, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    return {"map": [{"promote": f"SEM_GEN_{k}",
+                     "from_ATO_ids": rng.sample(ato_ids, min(len(ato_ids), rng.randint(2, 5))),
+                     "when": {"segment_co_occurs": {"min_ATO": rng.randint(1, 3)}}}
+                    for k in range(n_rules)]}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rules", type=int, default=1000)
+    ap.add_argument("--turns", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=10)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    catalog = engine_py.get_catalog()
+    text = dialog(a.turns)
+    events = catalog.detect(text, engine_py.segment_dialog(text))
+    ato_ids = sorted({m["id"] for m in catalog.markers if engine_py._marker_type(m) == "ATO"})
+    pmap = promo_map(a.rules, ato_ids)
+    index = engine_py._PromotionIndex(pmap)
+    assert index.apply(events) == scan_promote(events, pmap)
+    report = {"rules": a.rules, "turns": a.turns, "events": len(events)}
+    for name, fn in (("scan", lambda: scan_promote(events, pmap)),
+                     ("index", lambda: index.apply(events)),
+                     ("index_with_compile", lambda: engine_py.promote_sem(events, pmap))):
+        samples = []
+        for _ in range(a.repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        report[name] = _summary(samples)
+    report["speedup_p50"] = round(report["scan"]["p50_ms"] / max(1e-9, report["index"]["p50_ms"]), 2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
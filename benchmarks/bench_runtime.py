@@ -0,0 +1,46 @@
+# bench_runtime.py — a throwaway EngineRuntime root for the analyse benchmarks
+# Shared by bench_suite.py and regression.py; importing it has no side effects.
+
+import os, sys
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from enginelib.runtime import EngineRuntime  # noqa: E402
+
+PLUGIN = '''\
+# generated by benchmarks/bench_runtime.py
+import engine_py
+from enginelib.runtime import MarkerHit
+
+def detect(seg):
+    catalog = engine_py.get_catalog()
+    return [MarkerHit(e["id"], (e["id"].split("_") + ["MISC"])[1], (e["span"]["start"], e["span"]["end"]), 0.8)
+            for e in catalog.detect(seg, engine_py.segment_dialog(seg))]
+'''
+
+def _runtime_root(tmp: Path) -> Path:
+    # the repo root has no plugins/ and keeps the canon outside resources/,
+    # so analyse() would stop at selftest: mirror resources/ via symlinks,
+    # add the canon and one catalog-backed plugin
+    res = tmp / "resources"
+    res.mkdir()
+    for p in Path(ROOT, "resources").iterdir():
+        (res / p.name).symlink_to(p)
+    if not (res / "markers_canonical.json").exists():
+        (res / "markers_canonical.json").symlink_to(Path(ROOT, engine_py.CANON_DEFAULT))
+    (tmp / "enginelib").symlink_to(Path(ROOT, "enginelib"))
+    (tmp / "plugins").mkdir()
+    (tmp / "plugins" / "detect_catalog.py").write_text(PLUGIN, encoding="utf-8")
+    return tmp
+
+def _analyse(eng: EngineRuntime, text: str) -> int:
+    try:
+        r = eng.analyse(text, {}, {}, [])
+    except RuntimeError as e:  # E_GATE_BLOCKED on short dialogs: the work is done anyway
+        if str(e) != "E_GATE_BLOCKED":
+            raise
+        return 0
+    return len(r.hits_ato) + len(r.hits_sem) + len(r.hits_clu) + len(r.hits_mema)
@@ -0,0 +1,81 @@
+# bench_suite.py — release-over-release numbers for the three public entry points
+# Seeded dialogs from dialog_gen (10 .. 10,000 turns) go through
+#   run          engine_py.Engine.run (warm catalog)
+#   analyse      enginelib EngineRuntime.analyse with a detect_ plugin backed by
+#                the engine_py catalog (temporary root, see bench_runtime)
+#   promote_sem  engine_py.promote_sem over the detected events + catalog map
+# Per size and target: p50/p95/mean latency, hits per second at p50 and the
+# tracemalloc peak of one extra call (timed runs stay untraced).
+#
+#   python benchmarks/bench_suite.py [--turns 10,100,1000,10000] [--repeat 20]
+#                                    [--seed 7] [--out bench.json]
+
+import argparse, json, os, platform, sys, tempfile, time, tracemalloc
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+from bench_catalog import _summary  # noqa: E402
+from bench_runtime import _analyse, _runtime_root  # noqa: E402
+from dialog_gen import generate_dialog, positive_examples  # noqa: E402
+from enginelib.runtime import EngineRuntime  # noqa: E402
+
+def _measure(fn, repeat: int) -> dict:
+    hits, samples = 0, []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        hits = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    out = _summary(samples)
+    out.update({"repeat": repeat, "hits": hits,
+                "hits_per_s": round(hits / max(1e-9, out["p50_ms"] / 1000), 1),
+                "peak_mem_mb": round(peak / 2**20, 3)})
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", default="10,100,1000,10000")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--only", default="run,analyse,promote_sem")
+    ap.add_argument("--out")
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    only = set(a.only.split(","))
+    eng = engine_py.Engine()
+    catalog = eng.catalog
+    examples = positive_examples(catalog.markers)
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "engine_hash": catalog.engine_hash, "canon_hash": catalog.canon_hash,
+              "seed": a.seed, "examples": len(examples), "sizes": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        runtime = EngineRuntime(_runtime_root(Path(tmp)))
+        for turns in (int(t) for t in a.turns.split(",")):
+            text = generate_dialog(turns, a.seed, examples)
+            repeat = a.repeat if turns <= 1000 else min(a.repeat, 3)
+            events = catalog.detect(text, engine_py.segment_dialog(text))
+            row = {"turns": turns, "chars": len(text), "events": len(events)}
+            if "run" in only:
+                row["run"] = _measure(lambda: len(eng.run(text=text)["markers"]), repeat)
+            if "analyse" in only:
+                row["analyse"] = _measure(lambda: _analyse(runtime, text), repeat)
+            if "promote_sem" in only:
+                row["promote_sem"] = _measure(lambda: len(engine_py.promote_sem(events, catalog.promo)[0]), repeat)
+            report["sizes"].append(row)
+            print(f"{turns:>6} turns: " + "  ".join(f"{k} p50={row[k]['p50_ms']}ms"
+                                                   for k in ("run", "analyse", "promote_sem") if k in row),
+                  file=sys.stderr)
+    out = json.dumps(report, indent=2)
+    if a.out:
+        Path(a.out).write_text(out + "\n", encoding="utf-8")
+    print(out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# dialog_gen.py — seeded synthetic German A/B dialogs for the benchmark suite
+# Turns alternate A/B; each turn is either a positive catalog example (so
+# markers actually fire) or filler assembled from neutral phrase parts.
+# Same catalog + seed + turns -> byte-identical text.
+#
+#   python benchmarks/dialog_gen.py [--turns 100] [--seed 7]
+
+import argparse, os, random, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine_py  # noqa: E402
+
+OPENERS = ["Also", "Naja", "Hm", "Gut", "Übrigens", "Ehrlich gesagt", "Jedenfalls", "Tja"]
+SUBJECTS = ["ich", "wir", "meine Schwester", "der Nachbar", "das Team", "unsere Katze", "mein Chef", "die Kollegin"]
+VERBS = ["war heute", "bin gestern", "wollte eigentlich", "habe kurz", "muss morgen", "hat vorhin", "sind am Wochenende"]
+OBJECTS = ["im Supermarkt", "beim Arzt", "mit dem Rad unterwegs", "in der Küche", "am Bahnhof",
+           "wegen der Steuer dran", "im Garten", "bei der Probe", "mit den Unterlagen beschäftigt"]
+TAILS = [".", ", glaube ich.", ", mal sehen.", " und dann nach Hause.", ", das war's eigentlich.", "."]
+
+def positive_examples(markers) -> list:
+    """Positive example strings in catalog order (list-form `examples` count as positive)."""
+    out = []
+    for m in markers:
+        ex = m.get("examples")
+        if isinstance(ex, dict):
+            ex = ex.get("positive")
+        for e in ex or []:
+            if isinstance(e, str) and e.strip() and len(e) <= 240:
+                out.append(" ".join(e.split()))
+    return out
+
+def filler(rng: random.Random) -> str:
+    return (f"{rng.choice(OPENERS)}, {rng.choice(SUBJECTS)} {rng.choice(VERBS)} "
+            f"{rng.choice(OBJECTS)}{rng.choice(TAILS)}")
+
+def generate_dialog(turns: int, seed: int = 0, examples=None, marker_ratio: float = 0.5) -> str:
+    """`turns` lines "A: ..." / "B: ..."; about `marker_ratio` of them are catalog examples."""
+    if examples is None:
+        examples = positive_examples(engine_py.get_catalog().markers)
+    rng = random.Random(seed)
+    lines = []
+    for i in range(turns):
+        said = rng.choice(examples) if examples and rng.random() < marker_ratio else filler(rng)
+        lines.append(f"{'AB'[i % 2]}: {said}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=7)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    print(generate_dialog(a.turns, a.seed))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# regression.py — performance regression gate against tests/goldens
+# Re-runs fixed, seeded scenarios (dialog_gen, seed 7) per pipeline stage and
+# compares them with tests/goldens/perf_baseline.json. Timings are divided by
+# a calibration loop sampled throughout the same process, so a slower or
+# faster machine shifts both sides alike; a stage fails when its normalised
+# best-of-N time exceeds the baseline by more than the tolerance
+# (PERF_TOLERANCE). p50 and turns/s are recorded alongside for trend
+# reading. Engine outputs for GOLDEN_TURNS must stay byte-identical to
+# tests/goldens/bench_<turns>.output.json (meta.elapsed_ms zeroed).
+#
+# The default tolerance of 100% catches gross regressions (> 2x) only. It is
+# set by measured noise: three back-to-back measure() runs on a shared
+# container gave normalised best-of-9 times differing by up to 1.77x per
+# scenario (median 1.55x; 1.04-1.58x at 500 turns), so a 25-30% gate
+# failed on noise alone. On a dedicated runner, pass PERF_TOLERANCE=0.3.
+#
+#   python benchmarks/regression.py            # check, exit 1 on regression
+#   python benchmarks/regression.py --update   # rewrite baseline + goldens
+#   PERF_GATE=1 pytest tests/test_perf_regression.py
+
+import argparse, gc, json, os, re, sys, tempfile, time
+from itertools import chain
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import engine_py  # noqa: E402
+from bench_runtime import _analyse, _runtime_root  # noqa: E402
+from dialog_gen import generate_dialog, positive_examples  # noqa: E402
+from enginelib.runtime import EngineRuntime  # noqa: E402
+
+GOLDENS = Path(ROOT, "tests", "goldens")
+BASELINE = GOLDENS / "perf_baseline.json"
+SEED = 7
+SCENARIO_TURNS = (10, 100, 500)
+GOLDEN_TURNS = (10, 30)
+STAGES = ("run", "detect", "promotion", "activation", "promote_sem", "analyse")
+TOLERANCE = 1.0
+REPEAT = 9
+
+def golden_path(turns: int) -> Path:
+    return GOLDENS / f"bench_{turns}.output.json"
+
+def render(out: dict) -> str:
+    """Byte form of an engine result for golden comparison (elapsed_ms zeroed)."""
+    out = dict(out, meta=dict(out["meta"], elapsed_ms=0))
+    return json.dumps(out, ensure_ascii=False, indent=2) + "\n"
+
+def _dialogs(turns_list):
+    examples = positive_examples(engine_py.get_catalog().markers)
+    return {n: generate_dialog(n, SEED, examples) for n in turns_list}
+
+def calibrate(rounds: int = 5) -> float:
+    """Best-of-`rounds` ms for a fixed regex + dict + json workload (machine speed)."""
+    text = generate_dialog(200, 0, examples=[])
+    word = re.compile(r"\b(\w+)\s+(\w+)\b")
+
+    def work():
+        counts = {}
+        for m in word.finditer(text):
+            counts[m.group(1)] = counts.get(m.group(1), 0) + 1
+        json.dumps(sorted(counts.items()))
+
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(20):
+            work()
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+def _time(fn, repeat: int, min_sample_ms: float = 5.0):
+    # (best, p50) ms per call; sub-millisecond stages are looped until one sample
+    # lasts min_sample_ms. The best is what the gate compares, the least noisy
+    # estimate of the work itself. GC is off while timing, as in timeit: collection
+    # pauses depend on whatever else the process has allocated.
+    t0 = time.perf_counter()
+    fn()
+    first = (time.perf_counter() - t0) * 1000
+    loops = max(1, int(min_sample_ms / max(first, 1e-3)))
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - t0) * 1000 / loops)
+    finally:
+        gc.enable()
+    samples.sort()
+    return samples[0], samples[len(samples) // 2]
+
+def _stages(eng: engine_py.Engine, runtime: EngineRuntime, text: str) -> dict:
+    catalog = eng.catalog
+    segments = engine_py.segment_dialog(text)
+    table = catalog.table(text, segments)
+    promoted = catalog.promotion.promoted(table.atos_by_segment())
+    events = table.to_dicts()
+    return {
+        "run": lambda: eng.run(text=text),
+        "detect": lambda: catalog.table(text, segments),
+        "promotion": lambda: catalog.promotion.promoted(table.atos_by_segment()),
+        "activation": lambda: catalog.rules.fire_rows(
+            chain(table.rows(), engine_py._event_rows(promoted)), segments),
+        "promote_sem": lambda: engine_py.promote_sem(events, catalog.promo),
+        "analyse": lambda: _analyse(runtime, text),
+    }
+
+def measure(repeat: int = REPEAT, turns_list=SCENARIO_TURNS) -> dict:
+    """Current timings: {"calibration_ms", "scenarios": {"<stage>/<turns>": {...}}}."""
+    eng = engine_py.Engine()
+    calib = calibrate()
+    scenarios = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        runtime = EngineRuntime(_runtime_root(Path(tmp)))
+        for turns, text in _dialogs(turns_list).items():
+            for stage, fn in _stages(eng, runtime, text).items():
+                best, p50 = _time(fn, repeat)
+                scenarios[f"{stage}/{turns}"] = {"best_ms": round(best, 3), "p50_ms": round(p50, 3),
+                                                 "turns_per_s": round(turns / max(1e-9, p50 / 1000), 1)}
+                calib = min(calib, calibrate(1))  # interleaved: catch the quiet moments
+    for row in scenarios.values():
+        row["norm"] = round(row["best_ms"] / calib, 4)
+    return {"calibration_ms": round(calib, 4), "seed": SEED, "scenarios": scenarios,
+            "engine_hash": eng.catalog.engine_hash, "canon_hash": eng.catalog.canon_hash}
+
+def compare(baseline: dict, current: dict, tolerance: float = TOLERANCE) -> list:
+    """Scenarios whose normalised best time grew beyond `tolerance`, as messages."""
+    failures = []
+    for key, base in sorted(baseline.get("scenarios", {}).items()):
+        now = current["scenarios"].get(key)
+        if now is None:
+            continue
+        ratio = now["norm"] / max(1e-9, base["norm"])
+        if ratio > 1 + tolerance:
+            failures.append(f"{key}: {ratio:.2f}x baseline (best {now['best_ms']}ms vs {base['best_ms']}ms, "
+                            f"calibration {current['calibration_ms']}ms vs {baseline['calibration_ms']}ms)")
+    return failures
+
+def golden_mismatches(turns_list=GOLDEN_TURNS) -> list:
+    """Golden files whose bytes differ from the current engine output."""
+    eng = engine_py.Engine()
+    bad = []
+    for turns, text in _dialogs(turns_list).items():
+        path = golden_path(turns)
+        if not path.exists() or path.read_bytes() != render(eng.run(text=text)).encode("utf-8"):
+            bad.append(path.name)
+    return bad
+
+def update(repeat: int = REPEAT) -> dict:
+    eng = engine_py.Engine()
+    for turns, text in _dialogs(GOLDEN_TURNS).items():
+        golden_path(turns).write_text(render(eng.run(text=text)), encoding="utf-8")
+    current = measure(repeat)
+    baseline = dict(current, tolerance=TOLERANCE)
+    BASELINE.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+    return baseline
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--update", action="store_true")
+    ap.add_argument("--repeat", type=int, default=REPEAT)
+    ap.add_argument("--tolerance", type=float)
+    a = ap.parse_args(argv)
+    os.chdir(ROOT)
+    if a.update:
+        print(json.dumps(update(a.repeat), indent=2))
+        return 0
+    baseline = json.loads(BASELINE.read_text(encoding="utf-8"))
+    tolerance = a.tolerance if a.tolerance is not None else float(
+        os.environ.get("PERF_TOLERANCE", baseline.get("tolerance", TOLERANCE)))
+    current = measure(a.repeat)
+    failures = golden_mismatches() + compare(baseline, current, tolerance)
+    print(json.dumps({"tolerance": tolerance, "current": current, "failures": failures}, indent=2))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -167,11 +167,27 @@ function applyPromotion(segments, detected, canon, promoMap) {
     }
   }
 
+  // Inverted index: ATO id -> rules referencing it, so each hit only touches its rules
+  const byAto = new Map();
+  rules.forEach((rule, k) => {
+    for (const id of new Set(rule.when?.segment_co_occurs?.ids || [])) {
+      if (!byAto.has(id)) byAto.set(id, []);
+      byAto.get(id).push(k);
+    }
+  });
+
   for (const [segIdx, events] of bySeg.entries()) {
-    for (const rule of rules) {
-      const ids = rule.when?.segment_co_occurs?.ids || [];
+    const haveByRule = new Map();
+    for (const e of events) {
+      for (const k of byAto.get(e.id) || []) {
+        if (!haveByRule.has(k)) haveByRule.set(k, []);
+        haveByRule.get(k).push(e);
+      }
+    }
+    for (const k of [...haveByRule.keys()].sort((a, b) => a - b)) {
+      const rule = rules[k];
       const min = rule.when?.segment_co_occurs?.min || 2;
-      const have = events.filter((e) => ids.includes(e.id));
+      const have = haveByRule.get(k);
       if (have.length >= min) {
         const baseEv = have[0];
         promotions.push({
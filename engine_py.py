@@ -1,9 +1,44 @@
 # engine_py.py  — CARL marker engine (Python) for ADA runtime
 # Deterministic: patterns from carl/markers_canonical.json → events → features → indices → output
-# No external deps (stdlib only). Compatible with JSON schemas you provided.
+# No external deps (stdlib only; optional NumPy). The literal prefilter, the grouped
+# screening scan and the regex profiler read CPython's private sre internals; without
+# them every pattern is scanned on its own. Compatible with JSON schemas you provided.
 
-import json, re, hashlib, time, math, os
-from typing import List, Dict, Any, Optional, cast
+import json, re, hashlib, time, math, os, threading, gc, heapq, multiprocessing
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from itertools import chain, compress
+from typing import List, Dict, Any, Iterable, Iterator, Optional, cast
+
+# Private CPython internals (parser, opcodes, case-fold tables): not a stable API, so
+# any import or shape mismatch switches the scanner to the plain per-pattern path
+try:
+    import _sre
+    try:
+        from re import _parser as _sre_parse, _constants as _sre_c  # Python >= 3.11
+        from re._casefix import _EXTRA_CASES as _SRE_EXTRA_CASES
+    except ImportError:  # pragma: no cover - older interpreters
+        import sre_parse as _sre_parse, sre_constants as _sre_c  # type: ignore
+        import sre_compile
+        _SRE_EXTRA_CASES = sre_compile._ignorecase_fixes  # type: ignore[attr-defined]
+    for _name in ("LITERAL", "NOT_LITERAL", "IN", "NEGATE", "RANGE", "CATEGORY", "ANY", "AT",
+                  "AT_BOUNDARY", "ASSERT", "ASSERT_NOT", "SUBPATTERN", "BRANCH", "MAX_REPEAT",
+                  "MIN_REPEAT", "MAXREPEAT", "CATEGORY_DIGIT", "CATEGORY_NOT_DIGIT", "CATEGORY_WORD",
+                  "CATEGORY_NOT_WORD", "CATEGORY_SPACE", "CATEGORY_NOT_SPACE"):
+        getattr(_sre_c, _name)
+    _sre.unicode_tolower, _sre_parse.parse  # noqa: B018
+    _SRE_OK = list(_sre_parse.parse("ab", 0).data) == [(_sre_c.LITERAL, 97), (_sre_c.LITERAL, 98)]
+except Exception:  # pragma: no cover - depends on the interpreter
+    _SRE_OK = False
+if not _SRE_OK:  # pragma: no cover
+    _sre = _sre_parse = _sre_c = None  # type: ignore[assignment]
+    _SRE_EXTRA_CASES = {}
+
+try:
+    import numpy as _np  # optional: vectorized batch indices
+except ImportError:  # pragma: no cover - NumPy is optional
+    _np = None
 
 ENGINE_VERSION = "CARL-PY-0.9"
 
@@ -45,86 +80,1211 @@ def segment_dialog(text: str) -> List[Dict[str, str]]:
     return segs
 
 # ---------- Detection ----------
-def _compile_patterns(markers: List[dict]):
-    compiled = []
+MARKER_TYPES = ("ATO", "SEM", "CLU", "MEMA", "DETECT")
+
+def _canon_markers(canon: Any) -> List[dict]:
+    # Accept {"markers": [...]}, a bare marker list and id-keyed registries
+    if isinstance(canon, list):
+        return [m for m in canon if isinstance(m, dict)]
+    if not isinstance(canon, dict):
+        return []
+    if "markers" in canon:
+        return [m for m in (canon.get("markers") or []) if isinstance(m, dict)]
+    return [dict(m, id=m.get("id") or k) for k, m in canon.items() if isinstance(m, dict)]
+
+def _marker_type(m: dict) -> Optional[str]:
+    mtype = m.get("type")
+    if mtype:
+        return mtype
+    # LeanDeep sources often omit `type`; the id prefix carries it (cf. build_markers_canonical.py)
+    head = str(m.get("id") or "").split("_", 1)[0].upper()
+    return head if head in MARKER_TYPES else None
+
+def _marker_patterns(m: dict) -> List[str]:
+    # Backward compatibility: support both `pattern` and `regex`
+    raw = m.get("pattern")
+    if raw is None:
+        raw = m.get("regex")
+    if isinstance(raw, dict):
+        raw = raw.get("regex")
+    if isinstance(raw, str):
+        raw = [raw]
+    return [p for p in (raw or []) if isinstance(p, str)]
+
+def _compile_marker(m: dict, errors: Optional[List[dict]] = None) -> list:
+    # patterns that fail to compile are skipped; `errors` collects them when given
     flags = re.I | re.M | re.U
+    # allow marker-specific flags (e.g. "g", "i"): ignore "g", map "i" to re.I
+    if isinstance(m.get("flags"), str):
+        fl = m["flags"].lower()
+        if "i" in fl:
+            flags |= re.I
+    regs = []
+    for p in _marker_patterns(m):
+        try:
+            regs.append(re.compile(p, flags))
+        except Exception as exc:
+            if errors is not None:
+                errors.append({"id": m.get("id"), "pattern": p, "error": str(exc)})
+    return regs
+
+def _compile_patterns(markers: List[dict], errors: Optional[List[dict]] = None):
+    compiled = []
     for m in markers:
-        pats = m.get("pattern") or []
-        regs = [re.compile(p, flags) for p in pats]
-        compiled.append((m, regs))
+        mtype = _marker_type(m)
+        if mtype not in MARKER_TYPES:
+            continue
+        compiled.append((m, mtype, _compile_marker(m, errors)))
     return compiled
 
-def _span_to_segment(pos: int, text_len: int, segments: List[dict]) -> int:
-    if not segments or text_len <= 0:
-        return 0
-    ratio = pos / max(1, text_len)
-    return min(len(segments) - 1, int(ratio * len(segments)))
+def _locate_segments(text: str, segments: List[dict], starts: List[int], cursor: int = 0) -> int:
+    # Append the start offset of every segment in `text` (cf. buildGlobalText in
+    # engine.js) and return the cursor after the last one. Segments are located
+    # in order; a segment owns its whole line, so speaker labels in raw
+    # "A: ..." input belong to their own turn.
+    for s in segments:
+        seg_text = s.get("text") or ""
+        pos = text.find(seg_text, cursor) if seg_text else -1
+        if pos < 0:
+            starts.append(cursor)
+            continue
+        starts.append(max(cursor, text.rfind("\n", cursor, pos) + 1))
+        cursor = pos + len(seg_text)
+    return cursor
+
+def _segment_offsets(text: str, segments: List[dict]) -> List[int]:
+    starts: List[int] = []
+    _locate_segments(text, segments, starts)
+    return starts
+
+def _span_to_segment(pos: int, starts: List[int]) -> int:
+    return max(0, bisect_right(starts, pos) - 1)
+
+def _event(text: str, segments: List[dict], starts: List[int], m: dict, mtype: str,
+           start: int, end: int) -> dict:
+    seg_idx = _span_to_segment(start, starts)
+    return {
+        "id": m["id"],
+        "type": mtype,
+        "span": {"start": start, "end": end},
+        "segment_idx": seg_idx,
+        "who": segments[seg_idx]["who"] if segments else "other",
+        "evidence": (text[start:end])[:120]
+    }
+
+def _events_from_matches(text: str, segments: List[dict], slots, matches) -> List[dict]:
+    # slots[i] = (marker, mtype, regex); matches[i] = [(start, end), ...] in finditer order
+    starts = _segment_offsets(text or "", segments)
+    events = [_event(text, segments, starts, m, mtype, start, end)
+              for (m, mtype, _), spans in zip(slots, matches) for start, end in spans]
+    events.sort(key=lambda e: e["span"]["start"])
+    return events
+
+def _pattern_slots(compiled):
+    return [(m, mtype, r) for m, mtype, regs in compiled for r in regs]
+
+def _scan(text: str, segments: List[dict], compiled) -> List[dict]:
+    # Reference path: one finditer pass per pattern
+    slots = _pattern_slots(compiled)
+    matches = [[match.span() for match in r.finditer(text)] for _, _, r in slots]
+    return _events_from_matches(text, segments, slots, matches)
+
+# ---------- Event table ----------
+# Detected hits live in parallel int columns instead of one dict (plus span
+# dict and evidence string) per hit. Marker ids and speakers are interned;
+# output dicts are built once, when the final marker list is packaged.
+_TYPE_INDEX = {t: k for k, t in enumerate(MARKER_TYPES)}
+
+class EventTable:
+    """Detected events sorted by start offset, ties in pattern slot order.
+
+    `marker`, `type`, `start`, `end`, `segment` and `who` are `array('i')`
+    columns; `marker` and `who` index into `ids` and `whos`, `type` into
+    MARKER_TYPES. Evidence is sliced from `text` on demand.
+    """
+    __slots__ = ("text", "ids", "whos", "marker", "type", "start", "end", "segment", "who")
+
+    def __init__(self, text: str, ids: List[str], whos: List[str]):
+        self.text = text
+        self.ids = ids
+        self.whos = whos
+        self.marker = array("i")
+        self.type = array("i")
+        self.start = array("i")
+        self.end = array("i")
+        self.segment = array("i")
+        self.who = array("i")
+
+    @classmethod
+    def from_matches(cls, text: str, segments: List[dict], ids: List[str],
+                     slot_marker, slot_type, matches) -> "EventTable":
+        # slot_marker/slot_type[i] = interned id/type of pattern slot i;
+        # matches[i] = [(start, end), ...] in finditer order
+        whos: List[str] = []
+        who_index: Dict[str, int] = {}
+        seg_who = array("i")
+        for s in segments:
+            k = who_index.get(s["who"])
+            if k is None:
+                k = who_index[s["who"]] = len(whos)
+                whos.append(s["who"])
+            seg_who.append(k)
+        if not segments:
+            whos.append("other")
+            seg_who.append(0)
+        table = cls(text, ids, whos)
+        slot, start, end = array("i"), array("i"), array("i")
+        for idx, spans in enumerate(matches):
+            if spans:
+                slot.extend([idx] * len(spans))
+                start.extend([a for a, _ in spans])
+                end.extend([b for _, b in spans])
+        order = sorted(range(len(start)), key=start.__getitem__)
+        slots = [slot[k] for k in order]
+        table.marker = array("i", [slot_marker[i] for i in slots])
+        table.type = array("i", [slot_type[i] for i in slots])
+        table.start = array("i", [start[k] for k in order])
+        table.end = array("i", [end[k] for k in order])
+        # rows are sorted, so each segment owns one run of them (cf. _span_to_segment)
+        offsets = _segment_offsets(text or "", segments) or [0]
+        lo = 0
+        for g in range(len(offsets)):
+            hi = bisect_left(table.start, offsets[g + 1]) if g + 1 < len(offsets) else len(table.start)
+            if hi > lo:
+                table.segment.extend(array("i", [g]) * (hi - lo))
+                table.who.extend(array("i", [seg_who[g]]) * (hi - lo))
+                lo = hi
+        return table
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def evidence(self, k: int) -> str:
+        start = self.start[k]
+        return self.text[start:min(self.end[k], start + 120)]
+
+    def event(self, k: int) -> dict:
+        """Output dict of row `k` (same shape as `_event`)."""
+        start = self.start[k]
+        return {
+            "id": self.ids[self.marker[k]],
+            "type": MARKER_TYPES[self.type[k]],
+            "span": {"start": start, "end": self.end[k]},
+            "segment_idx": self.segment[k],
+            "who": self.whos[self.who[k]],
+            "evidence": self.evidence(k)
+        }
+
+    def to_dicts(self) -> List[dict]:
+        ids, types, whos, text = self.ids, MARKER_TYPES, self.whos, self.text
+        return [{"id": ids[m], "type": types[t], "span": {"start": a, "end": b},
+                 "segment_idx": g, "who": whos[w], "evidence": text[a:b][:120]}
+                for m, t, a, b, g, w in zip(self.marker, self.type, self.start, self.end,
+                                            self.segment, self.who)]
+
+    def rows(self) -> Iterator[tuple]:
+        """(segment_idx, id, start, end) per row, as read by `_RuleSet.fire_rows`."""
+        return zip(self.segment, map(self.ids.__getitem__, self.marker), self.start, self.end)
+
+    def atos_by_segment(self) -> Dict[int, List[tuple]]:
+        """{segment: [(id, start, end, who), ...]} of the ATO rows, as `_atos_by_segment`."""
+        ids, whos = self.ids, self.whos
+        by_seg: Dict[int, List[tuple]] = {}
+        for k in compress(range(len(self)), map(_TYPE_INDEX["ATO"].__eq__, self.type)):
+            by_seg.setdefault(self.segment[k], []).append(
+                (ids[self.marker[k]], self.start[k], self.end[k], whos[self.who[k]]))
+        return by_seg
+
+    def merged(self, extra: List[dict]) -> List[dict]:
+        """Output dicts of all rows merged with `extra` (sorted by start); rows win ties.
+
+        Equals the stable sort by start of `self.to_dicts() + extra`.
+        """
+        rows = self.to_dicts()
+        if not extra:
+            return rows
+        out: List[dict] = []
+        k = 0
+        for ev in extra:
+            pos = bisect_right(self.start, ev["span"]["start"])
+            out.extend(rows[k:pos])
+            out.append(ev)
+            k = pos
+        out.extend(rows[k:])
+        return out
+
+    def counts(self, extra: List[dict]) -> dict:
+        """`_build_counts(self.merged(extra))` without building the row dicts."""
+        # (who, type) totals come from the columns; the key order of the result
+        # follows the first occurrence of each pair in the merged list
+        n_rows = Counter(zip(self.who, self.type))
+        first: Dict[tuple, int] = {}
+        if n_rows:
+            for k, pair in enumerate(zip(self.who, self.type)):
+                if pair not in first:
+                    first[pair] = k
+                    if len(first) == len(n_rows):
+                        break
+        extra_starts = [e["span"]["start"] for e in extra]
+        seen: Dict[tuple, list] = {}  # (who, type) -> [position in merged list, count]
+        for (w, t), k in first.items():
+            seen[(self.whos[w], MARKER_TYPES[t])] = [k + bisect_left(extra_starts, self.start[k]),
+                                                     n_rows[(w, t)]]
+        for j, e in enumerate(extra):
+            pos = j + bisect_right(self.start, extra_starts[j])
+            slot = seen.get((e["who"], e["type"]))
+            if slot is None:
+                seen[(e["who"], e["type"])] = [pos, 1]
+            else:
+                slot[0] = min(slot[0], pos)
+                slot[1] += 1
+        total = {"ATO": 0, "SEM": 0, "CLU": 0, "MEMA": 0}
+        by_speaker: Dict[str, Dict[str, int]] = {"A": {}, "B": {}}
+        for (who, t), (_, n) in sorted(seen.items(), key=lambda kv: kv[1][0]):
+            if t in total:
+                total[t] += n
+            by_speaker.setdefault(who, {})[t] = n
+        return {"total": total, "by_speaker": by_speaker}
+
+# ---------- Literal prefilter ----------
+# Every pattern gets a set of folded literals, one of which occurs in any text
+# it can match. One Aho-Corasick pass over the folded text tells which patterns
+# can fire at all; the rest are never executed.
+_LITERAL_ALTS_MAX = 64
+_FOLD_TABLE: Optional[Dict[int, int]] = None
+
+def _build_fold_table() -> Dict[int, int]:
+    # Map every BMP code point to one representative of its re.IGNORECASE class
+    extra = _SRE_EXTRA_CASES
+    table = {}
+    for c in range(0x10000):
+        lc = _sre.unicode_tolower(c)
+        rep = min((lc,) + tuple(extra.get(lc, ())))
+        if rep != c:
+            table[c] = rep
+    return table
+
+def _fold(s: str) -> str:
+    global _FOLD_TABLE
+    if _FOLD_TABLE is None:
+        _FOLD_TABLE = _build_fold_table()
+    return s.translate(_FOLD_TABLE)
+
+def _best_literals(cands) -> Optional[frozenset]:
+    usable = [c for c in cands if c and "" not in c]
+    if not usable:
+        return None
+    return frozenset(max(usable, key=lambda c: (min(len(s) for s in c), -len(c))))
+
+def _seq_literals(data):
+    # (exact, required): every string the sequence can match (small sets only),
+    # and a set of strings one of which occurs in every match
+    cands = []
+    run = {""}
+    exact = True
+    for op, av in data:
+        ex, req = _node_literals(op, av)
+        if ex is not None and len(run) * len(ex) <= _LITERAL_ALTS_MAX:
+            run = {a + b for a in run for b in ex}
+            continue
+        exact = False
+        if run != {""}:
+            cands.append(run)
+        if ex is not None:
+            run = set(ex)
+        else:
+            run = {""}
+            if req is not None:
+                cands.append(req)
+    cands.append(run)
+    return (frozenset(run) if exact else None), _best_literals(cands)
+
+def _node_literals(op, av):
+    if op is _sre_c.LITERAL:
+        return {chr(av)}, None
+    if op in (_sre_c.AT, _sre_c.ASSERT, _sre_c.ASSERT_NOT):
+        return {""}, None  # zero-width
+    if op is _sre_c.IN:
+        if len(av) <= _LITERAL_ALTS_MAX and all(o is _sre_c.LITERAL for o, _ in av):
+            return {chr(a) for _, a in av}, None
+        return None, None
+    if op is _sre_c.SUBPATTERN:
+        return _seq_literals(av[3].data)
+    if op is _sre_c.BRANCH:
+        exacts, reqs = set(), set()
+        exact_ok, req_ok = True, True
+        for alt in av[1]:
+            ex, req = _seq_literals(alt.data)
+            if ex is None:
+                exact_ok = False
+            else:
+                exacts |= ex
+            if req is None:
+                req_ok = False
+            else:
+                reqs |= req
+        exact = exacts if exact_ok and len(exacts) <= _LITERAL_ALTS_MAX else None
+        return exact, (frozenset(reqs) if req_ok else None)
+    if op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT):
+        lo, hi, item = av
+        ex, req = _seq_literals(item.data)
+        if ex is not None and lo == hi and len(ex) ** lo <= _LITERAL_ALTS_MAX:
+            out = {""}
+            for _ in range(lo):
+                out = {a + b for a in out for b in ex}
+            return out, None
+        if lo >= 1:
+            return None, (frozenset(ex) if ex is not None and "" not in ex else req)
+        return None, None
+    return None, None
+
+def _required_literals(r) -> Optional[frozenset]:
+    """Folded literals one of which every match of `r` contains, or None."""
+    if not _SRE_OK:
+        return None
+    try:
+        data = _sre_parse.parse(r.pattern, r.flags).data
+    except Exception:
+        return None
+    _, req = _seq_literals(data)
+    if req is None:
+        return None
+    folded = frozenset(_fold(s) for s in req)
+    return None if "" in folded else folded
+
+class _AhoCorasick:
+    """Aho-Corasick automaton; `find` returns the ids of all keys occurring in a text."""
+
+    __slots__ = ("goto", "fail", "out")
+
+    def __init__(self, keys: List[str]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[tuple] = [()]
+        for kid, key in enumerate(keys):
+            s = 0
+            for ch in key:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                s = nxt
+            out[s] += (kid,)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in goto[s].items():
+                queue.append(t)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[t] = goto[f].get(ch, 0)
+                out[t] += out[fail[t]]
+        self.goto, self.fail, self.out = goto, fail, out
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self.goto, self.fail, self.out
+        found: set = set()
+        s = 0
+        for ch in text:
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if out[s]:
+                found.update(out[s])
+        return found
+
+# ---------- Multi-pattern scanning ----------
+# Patterns sharing a flag set and marker type are OR-ed into one screening regex
+# `anchor(?=(?=c)(?:A|B)|(?=d)(?:C)|...)`, bucketed by possible first character.
+# The screen reports every position where at least one member can match; only
+# the members whose first character fits are then re-matched there, and each
+# pattern's finditer sequence is replayed from those anchored matches.
+SCAN_GROUP_SIZE = 64
+SCREEN_MIN_ACTIVE = 16  # fewer live members than this: plain finditer beats a screen pass
+_GLOBAL_FLAGS = re.compile(r"^(?:\(\?[aiLmsux]+\))+")
+_NOT_GROUPABLE = re.compile(r"\(\?P|\\[1-9]|\(\?\(")  # named groups, backrefs, conditionals
+
+def _first_chars(data) -> Optional[frozenset]:
+    # Literal code points a match must start with, or None when unknown
+    for op, av in data:
+        if op in (_sre_c.AT, _sre_c.ASSERT, _sre_c.ASSERT_NOT):
+            continue  # zero-width: the next item decides
+        if op is _sre_c.LITERAL:
+            return frozenset((av,))
+        if op is _sre_c.IN:
+            if all(o is _sre_c.LITERAL for o, _ in av):
+                return frozenset(a for _, a in av)
+            return None
+        if op is _sre_c.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            return None if (add_flags or del_flags) else _first_chars(sub.data)
+        if op is _sre_c.BRANCH:
+            out: set = set()
+            for alt in av[1]:
+                f = _first_chars(alt.data)
+                if f is None:
+                    return None
+                out |= f
+            return frozenset(out)
+        if op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT):
+            lo, _, item = av
+            return _first_chars(item.data) if lo >= 1 else None
+        return None
+    return None
+
+def _class_chars(op, av):
+    # (has "\n", whitespace only) for a class or single-char node; None when unknown
+    items = av if op is _sre_c.IN else [(op, av)]
+    negate = bool(items) and items[0][0] is _sre_c.NEGATE
+    nl, ws = False, not negate
+    for o, a in items[1:] if negate else items:
+        if o is _sre_c.LITERAL:
+            nl, ws = nl or a == 10, ws and chr(a).isspace()
+        elif o is _sre_c.RANGE:
+            nl, ws = nl or a[0] <= 10 <= a[1], False
+        elif o is _sre_c.CATEGORY:
+            name = str(a).upper()
+            space = "SPACE" in name and "NOT_SPACE" not in name
+            nl = nl or space or "NOT_DIGIT" in name or "NOT_WORD" in name or (
+                "LINEBREAK" in name and "NOT_LINEBREAK" not in name)
+            ws = ws and space
+        else:
+            return None
+    return (nl != negate), ws
+
+def _line_budget(data, flags: int) -> Optional[int]:
+    """How many line breaks a match can cross, None when unbounded.
+
+    A repeated whitespace-only class counts once: it passes several line
+    breaks only over blank lines. Lookaheads count like matched text,
+    lookbehinds never read forward; unknown nodes are unbounded.
+    """
+    total = 0
+    for op, av in data:
+        if op is _sre_c.AT:
+            continue
+        if op is _sre_c.LITERAL:
+            total += av == 10
+        elif op is _sre_c.NOT_LITERAL:
+            total += av != 10
+        elif op is _sre_c.ANY:
+            total += bool(flags & re.S)
+        elif op in (_sre_c.IN, _sre_c.CATEGORY):
+            cc = _class_chars(op, av)
+            if cc is None:
+                return None
+            total += cc[0]
+        elif op is _sre_c.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            b = _line_budget(sub.data, (flags | add_flags) & ~del_flags)
+            if b is None:
+                return None
+            total += b
+        elif op is _sre_c.BRANCH:
+            bs = [_line_budget(alt.data, flags) for alt in av[1]]
+            if None in bs:
+                return None
+            total += max(bs, default=0)
+        elif op in _REPEAT_OPS:
+            lo, hi, body = av
+            b = _line_budget(body.data, flags)
+            if b is None:
+                return None
+            if b:
+                single = body.data[0] if len(body.data) == 1 else None
+                cc = _class_chars(*single) if single and single[0] in (_sre_c.IN, _sre_c.CATEGORY, _sre_c.LITERAL) else None
+                if cc is not None and cc[1]:
+                    total += 1  # whitespace run
+                elif hi == _sre_c.MAXREPEAT:
+                    return None
+                else:
+                    total += b * hi
+        elif op in (_sre_c.ASSERT, _sre_c.ASSERT_NOT):
+            if av[0] >= 0:
+                b = _line_budget(av[1].data, flags)
+                if b is None:
+                    return None
+                total += b
+        elif op is getattr(_sre_c, "ATOMIC_GROUP", None):
+            b = _line_budget(av.data, flags)
+            if b is None:
+                return None
+            total += b
+        else:
+            return None
+    return total
+
+def _slot_line_budget(r) -> Optional[int]:
+    if not _SRE_OK or not isinstance(r.pattern, str):
+        return None
+    try:
+        return _line_budget(_sre_parse.parse(r.pattern, r.flags).data, r.flags)
+    except Exception:
+        return None
+
+def _scan_unit(r):
+    # (anchor, body, first chars) for a groupable pattern, else None
+    p = r.pattern
+    if not _SRE_OK or not isinstance(p, str) or r.flags & re.X or _NOT_GROUPABLE.search(p):
+        return None
+    g = _GLOBAL_FLAGS.match(p)
+    if g:
+        p = p[g.end():]
+    try:
+        data = _sre_parse.parse(p, r.flags).data
+    except Exception:
+        return None
+    if data and data[0] == (_sre_c.AT, _sre_c.AT_BOUNDARY) and p.startswith("\\b"):
+        return ("\\b", p[2:], _first_chars(data[1:]))
+    return ("", p, _first_chars(data))
+
+class _ScanGroup:
+    __slots__ = ("regex", "by_char", "always", "every", "fold")
+
+    def __init__(self, flags: int, anchor: str, members):
+        # members: [(slot_idx, regex, body, first_chars)]
+        buckets: Dict[str, List[str]] = {}
+        self.fold = bool(flags & re.I)
+        self.by_char: Dict[str, List[tuple]] = {}
+        self.always: List[tuple] = []
+        misc = []
+        for idx, r, body, first in members:
+            chars = None if first is None else [chr(c) for c in first]
+            if chars is None or (self.fold and not all(c.isascii() for c in chars)):
+                # unknown start, or non-ASCII case folding: always re-check
+                self.always.append((idx, r))
+            else:
+                for c in {c.lower() if self.fold else c for c in chars}:
+                    self.by_char.setdefault(c, []).append((idx, r))
+            if first is None:
+                misc.append(f"(?:{body})")
+            else:
+                for c in {chr(c).lower() if self.fold else chr(c) for c in first}:
+                    buckets.setdefault(c, []).append(f"(?:{body})")
+        seen = {idx for idx, _ in self.always}
+        self.every = list(self.always)
+        for cs in self.by_char.values():
+            for c in cs:
+                if c[0] not in seen:
+                    seen.add(c[0])
+                    self.every.append(c)
+        alts = [f"(?={re.escape(c)})(?:{'|'.join(bodies)})" for c, bodies in sorted(buckets.items())]
+        alts += misc
+        self.regex = re.compile(f"{anchor}(?={'|'.join(alts)})", flags)
+
+    def collect(self, text: str, matches: List[List[tuple]], active=None, pos: int = 0) -> None:
+        by_char, always, every, fold = self.by_char, self.always, self.every, self.fold
+        for hit in self.regex.finditer(text, pos):
+            pos = hit.start()
+            ch = text[pos] if pos < len(text) else ""
+            if ch and not ch.isascii():
+                cands = every
+            else:
+                cands = always + by_char.get(ch.lower() if fold else ch, [])
+            for idx, r in cands:
+                if active is not None and idx not in active:
+                    continue
+                mm = r.match(text, pos)
+                if mm is not None:
+                    matches[idx].append((pos, mm.end()))
+
+    def collect_profiled(self, text: str, matches: List[List[tuple]], active, prof: "_RunProfile") -> float:
+        """`collect` counting candidates per slot; returns the seconds spent in r.match."""
+        by_char, always, every, fold = self.by_char, self.always, self.every, self.fold
+        clock, ms, counted = time.perf_counter, prof.ms, prof.candidates
+        total = 0.0
+        for hit in self.regex.finditer(text):
+            pos = hit.start()
+            ch = text[pos] if pos < len(text) else ""
+            if ch and not ch.isascii():
+                cands = every
+            else:
+                cands = always + by_char.get(ch.lower() if fold else ch, [])
+            for idx, r in cands:
+                if idx not in active:
+                    continue
+                t0 = clock()
+                mm = r.match(text, pos)
+                dt = clock() - t0
+                ms[idx] += dt
+                total += dt
+                counted[idx] += 1
+                if mm is not None:
+                    matches[idx].append((pos, mm.end()))
+        return total
+
+class _MultiScanner:
+    """Few screening passes over the text instead of one finditer per pattern."""
+
+    def __init__(self, compiled, group_size: int = SCAN_GROUP_SIZE):
+        self.slots = _pattern_slots(compiled)
+        # interned marker ids / types per slot, for EventTable
+        self.ids: List[str] = []
+        index: Dict[str, int] = {}
+        self.slot_marker = array("i")
+        self.slot_type = array("i")
+        for m, mtype, _ in self.slots:
+            k = index.get(m.get("id"))
+            if k is None:
+                k = index[m.get("id")] = len(self.ids)
+                self.ids.append(m.get("id"))
+            self.slot_marker.append(k)
+            self.slot_type.append(_TYPE_INDEX[mtype])
+        # literal prefilter: slots without a required literal always run
+        self.unfiltered: set = set()
+        keys: Dict[str, List[int]] = {}
+        for idx, (_, _, r) in enumerate(self.slots):
+            lits = _required_literals(r)
+            if lits is None:
+                self.unfiltered.add(idx)
+            else:
+                for lit in lits:
+                    keys.setdefault(lit, []).append(idx)
+        self.literal_slots: List[List[int]] = list(keys.values())
+        self.literals = _AhoCorasick(list(keys))
+        self.standalone: List[int] = []
+        self.groups: List[_ScanGroup] = []
+        keyed: Dict[tuple, List[tuple]] = {}
+        for idx, (_, mtype, r) in enumerate(self.slots):
+            unit = _scan_unit(r)
+            if unit is None:
+                self.standalone.append(idx)
+                continue
+            anchor, body, first = unit
+            keyed.setdefault((r.flags, mtype, anchor), []).append((idx, r, body, first))
+        for (flags, _, anchor), members in keyed.items():
+            for k in range(0, len(members), group_size):
+                chunk = members[k:k + group_size]
+                try:
+                    self.groups.append(_ScanGroup(flags, anchor, chunk))
+                except Exception:
+                    self.standalone.extend(idx for idx, *_ in chunk)
+        self.standalone.sort()
+        # line breaks a slot's match can cross (None: unbounded, e.g. quotes via [^"]+);
+        # Session rescans each slot from the last point its matches cannot reach past
+        self.line_budget: List[Optional[int]] = [_slot_line_budget(r) for _, _, r in self.slots]
+
+    def active(self, text: str, pos: int = 0) -> set:
+        """Slots whose required literals occur in `text[pos:]` (plus the unfiltered ones)."""
+        out = set(self.unfiltered)
+        literal_slots = self.literal_slots
+        if not literal_slots:
+            return out
+        for k in self.literals.find(_fold(text[pos:] if pos else text)):
+            out.update(literal_slots[k])
+        return out
+
+    def matches(self, text: str, pos: int = 0) -> List[List[tuple]]:
+        # finditer(text, pos) for every slot
+        slots = self.slots
+        active = self.active(text, pos)
+        out: List[List[tuple]] = [[] for _ in slots]
+        candidates: List[List[tuple]] = [[] for _ in slots]
+        for group in self.groups:
+            live = [(idx, r) for idx, r in group.every if idx in active]
+            if len(live) >= SCREEN_MIN_ACTIVE:
+                group.collect(text, candidates, active, pos)
+            else:
+                for idx, r in live:
+                    out[idx] = [m.span() for m in r.finditer(text, pos)]
+        self._replay(text, candidates, out, pos)
+        for idx in self.standalone:
+            if idx in active:
+                out[idx] = [m.span() for m in slots[idx][2].finditer(text, pos)]
+        return out
+
+    def _replay(self, text: str, candidates: List[List[tuple]], out: List[List[tuple]], pos: int = 0) -> None:
+        # screened candidates -> finditer spans: next match is the first anchored
+        # match at/after the previous end
+        for idx, cands in enumerate(candidates):
+            if not cands:
+                continue
+            cands.sort()
+            spans = out[idx]
+            last_end = -1
+            for start, end in cands:
+                if start < last_end:
+                    continue
+                if start == end:
+                    # empty matches change finditer's resume rules: defer to the real thing
+                    spans[:] = [m.span() for m in self.slots[idx][2].finditer(text, pos)]
+                    break
+                spans.append((start, end))
+                last_end = end
+
+    def matches_profiled(self, text: str, prof: "_RunProfile") -> List[List[tuple]]:
+        """`matches(text)` that also fills `prof` with per-slot time and candidate counts."""
+        clock = time.perf_counter
+        slots = self.slots
+        t0 = clock()
+        active = self.active(text)
+        prof.stages["prefilter_ms"] += (clock() - t0) * 1000
+        for idx in range(len(slots)):
+            if idx not in active:
+                prof.skipped[idx] += 1
+        out: List[List[tuple]] = [[] for _ in slots]
+        candidates: List[List[tuple]] = [[] for _ in slots]
+        for group in self.groups:
+            live = [(idx, r) for idx, r in group.every if idx in active]
+            if len(live) >= SCREEN_MIN_ACTIVE:
+                t0 = clock()
+                matched = group.collect_profiled(text, candidates, active, prof)
+                prof.stages["screen_ms"] += (clock() - t0 - matched) * 1000
+            else:
+                for idx, r in live:
+                    t0 = clock()
+                    out[idx] = [m.span() for m in r.finditer(text)]
+                    prof.ms[idx] += clock() - t0
+        self._replay(text, candidates, out)
+        for idx in self.standalone:
+            if idx in active:
+                t0 = clock()
+                out[idx] = [m.span() for m in slots[idx][2].finditer(text)]
+                prof.ms[idx] += clock() - t0
+        for idx, spans in enumerate(out):
+            prof.matches[idx] += len(spans)
+        return out
+
+    def table(self, text: str, segments: List[dict]) -> EventTable:
+        return EventTable.from_matches(text, segments, self.ids, self.slot_marker, self.slot_type,
+                                       self.matches(text))
+
+    def detect(self, text: str, segments: List[dict]) -> List[dict]:
+        return self.table(text, segments).to_dicts()
 
 def detect_events(text: str, segments: List[dict], canon: dict) -> List[dict]:
-    events = []
-    text_len = len(text or "")
-    markers = canon.get("markers", [])
-    # Backward compatibility: support both `pattern` and `regex`
-    patt = []
+    return _MultiScanner(_compile_patterns(_canon_markers(canon))).detect(text, segments)
+
+# ---------- Promotion (ATO → SEM etc.) ----------
+def _promotion_rules(promo_map: dict) -> List[tuple]:
+    # (promote_id, min_ATO, allowed ATO ids) per rule, in map order
+    rules = []
+    for rule in (promo_map.get("map") or []):
+        cond = rule.get("when", {})
+        min_ATO = ((cond.get("segment_co_occurs") or {}).get("min_ATO")) or 2
+        rules.append((rule.get("promote"), min_ATO, set(rule.get("from_ATO_ids") or [])))
+    return rules
+
+def _promoted_event(seg_idx: int, hits: List[tuple], promote_id: str) -> dict:
+    # hits: (id, start, end, who) per ATO
+    return {
+        "id": promote_id,
+        "type": "SEM",
+        "span": {"start": hits[0][1], "end": hits[-1][2]},
+        "segment_idx": seg_idx, "who": hits[-1][3],
+        "promotion_of": [h[0] for h in hits]
+    }
+
+def _atos_by_segment(events: List[dict]) -> Dict[int, List[tuple]]:
+    by_seg: Dict[int, List[tuple]] = {}
+    for ev in events:
+        if ev["type"] == "ATO":
+            by_seg.setdefault(ev["segment_idx"], []).append(
+                (ev["id"], ev["span"]["start"], ev["span"]["end"], ev["who"]))
+    return by_seg
+
+class _PromotionIndex:
+    """Promotion map compiled to an ATO id -> rules index.
+
+    Each ATO hit only touches the rules that list it; rules without
+    `from_ATO_ids` take every ATO of the segment.
+    """
+
+    def __init__(self, promo_map: dict):
+        self.rules = _promotion_rules(promo_map)
+        self.by_ato: Dict[str, List[int]] = {}
+        self.wildcard: List[int] = []
+        for k, (_, _, allowed) in enumerate(self.rules):
+            if not allowed:
+                self.wildcard.append(k)
+            for ato_id in allowed:
+                self.by_ato.setdefault(ato_id, []).append(k)
+
+    def promote_segment(self, seg_idx: int, atos: List[tuple]) -> List[tuple]:
+        """[(rule_idx, promoted event)] for one segment's (id, start, end, who) ATO hits."""
+        hits: Dict[int, List[tuple]] = {k: atos for k in self.wildcard}
+        by_ato = self.by_ato
+        for a in atos:
+            for k in by_ato.get(a[0], ()):
+                hits.setdefault(k, []).append(a)
+        out = []
+        for k in sorted(hits):
+            promote_id, min_ATO, _ = self.rules[k]
+            if len(hits[k]) >= min_ATO:
+                out.append((k, _promoted_event(seg_idx, hits[k], promote_id)))
+        return out
+
+    def promoted(self, by_seg: Dict[int, List[tuple]]) -> List[dict]:
+        """Promoted events for `_atos_by_segment` output, in promote_sem's pre-sort order."""
+        promoted = [p for seg_idx, atos in by_seg.items() for p in self.promote_segment(seg_idx, atos)]
+        promoted.sort(key=lambda p: p[0])  # rule-major, segments in order of appearance
+        return [ev for _, ev in promoted]
+
+    def apply(self, events: List[dict]):
+        out = list(events) + self.promoted(_atos_by_segment(events))
+        out.sort(key=lambda e: e["span"]["start"])
+        return out, []  # optional explicit promotion list
+
+def promote_sem(events: List[dict], promo_map: dict):
+    return _PromotionIndex(promo_map).apply(events)
+
+# ---------- Activation rules ----------
+# Catalog `activation.rule` strings ("ANY 2 IN 3 messages", "BOTH IN 1 message",
+# "AT_LEAST 2 DISTINCT SEMs IN 5 messages", WEIGHTED_AND, ...) compile into
+# condition trees over per-window hit counters. One pass over the messages keeps
+# a running counter per window size; only rules listening to an id that hit in
+# the current message are evaluated there.
+_OR_SPLIT = re.compile(r"\s+OR\s+")
+_AND_SPLIT = re.compile(r"\s+AND\s+")
+_RULE_WINDOW = re.compile(r"^(.*?)\s+(?:IN|WITHIN)\s+(?:last\s+)?(\d+)(?:\s+messages?)?$", re.I)
+_RULE_COUNT = re.compile(r"^(?:ANY|AT_LEAST)(?:\s+(\d+))?$", re.I)
+_RULE_DISTINCT = re.compile(r"^(?:ANY|AT_LEAST)\s+(\d+)\s+DISTINCT(?:\s+(ATO|SEM|CLU|MEMA)s?)?$", re.I)
+_RULE_ALL = re.compile(r"^(?:BOTH|ALL)(?:\s+\d+)?$", re.I)
+_RULE_SUM = re.compile(r"^(COUNT\([A-Z0-9_]+\)(?:\s*\+\s*COUNT\([A-Z0-9_]+\))*)\s*>=\s*(\d+)$")
+_RULE_TERM = re.compile(r"^(?:COUNT\(([A-Z0-9_]+)\)\s*>=\s*(\d+)|(?:AT_LEAST\s+)?(\d+)\s+([A-Z][A-Z0-9_]+)"
+                        r"|([A-Z][A-Z0-9_]+)\s*>=\s*(\d+)|([A-Z][A-Z0-9_]+))$")
+_COUNT_ID = re.compile(r"COUNT\(([A-Z0-9_]+)\)")
+
+class _Count:
+    """At least `n` hits of `ids` in the last `window` messages."""
+    __slots__ = ("ids", "n", "window")
+
+    def __init__(self, ids, n: int, window: int):
+        self.ids, self.n, self.window = tuple(ids), n, window
+
+    def holds(self, totals) -> bool:
+        t = totals[self.window]
+        return sum(t.get(i, 0) for i in self.ids) >= self.n
+
+class _Distinct(_Count):
+    """At least `n` different ids of `ids` seen in the window."""
+    __slots__ = ()
+
+    def holds(self, totals) -> bool:
+        t = totals[self.window]
+        return sum(1 for i in self.ids if t.get(i)) >= self.n
+
+class _Weighted:
+    """Weights of the ids seen in the window sum to at least `threshold`."""
+    __slots__ = ("weights", "threshold", "window", "ids")
+
+    def __init__(self, weights: Dict[str, float], threshold: float, window: int):
+        self.weights, self.threshold, self.window = weights, threshold, window
+        self.ids = tuple(weights)
+
+    def holds(self, totals) -> bool:
+        t = totals[self.window]
+        return sum(w for i, w in self.weights.items() if t.get(i)) >= self.threshold
+
+class _AllOf:
+    __slots__ = ("conds", "ids", "window")
+
+    def __init__(self, conds):
+        self.conds = conds
+        self.ids = tuple(dict.fromkeys(i for c in conds for i in c.ids))
+        self.window = max(c.window for c in conds)
+
+    def holds(self, totals) -> bool:
+        return all(c.holds(totals) for c in self.conds)
+
+class _AnyOf(_AllOf):
+    __slots__ = ()
+
+    def holds(self, totals) -> bool:
+        return any(c.holds(totals) for c in self.conds)
+
+def _component_ids(value) -> List[str]:
+    # composed_of as a list of ids, of {"marker_ids"/"marker_id"} entries, or a
+    # dict of id lists; optional/supportive entries are not core components
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        if "marker_ids" in value or "marker_id" in value or "id" in value:
+            return _component_ids(value.get("marker_ids") or value.get("marker_id") or value.get("id"))
+        return [i for k, v in value.items() if k not in ("optional", "supportive") for i in _component_ids(v)]
+    if isinstance(value, list):
+        return [i for v in value for i in _component_ids(v)]
+    return []
+
+def _marker_components(m: dict) -> List[str]:
+    ids = _component_ids(m.get("composed_of"))
+    comb = m.get("combination")
+    if isinstance(comb, dict):
+        ids += [c.get("marker_id") for c in comb.get("components") or [] if isinstance(c, dict)]
+    return [i for i in dict.fromkeys(ids) if isinstance(i, str) and i]
+
+def _window_messages(value) -> Optional[int]:
+    if isinstance(value, dict):
+        value = value.get("messages")
+    return int(value) if isinstance(value, (int, float)) and value >= 1 else None
+
+def _id_term(term: str, window: int, known, bare: bool) -> Optional[_Count]:
+    # "COUNT(X) >= n", "[AT_LEAST] n X", "X >= n" and, inside AND lists, a bare "X"
+    t = _RULE_TERM.match(term.strip())
+    if not t or (t.group(7) and not bare):
+        return None
+    ident = t.group(1) or t.group(4) or t.group(5) or t.group(7)
+    if ident not in known:
+        raise ValueError(f"unknown marker {ident!r}")
+    return _Count([ident], int(t.group(2) or t.group(3) or t.group(6) or 1), window)
+
+def _rule_term(term: str, comps: List[str], act: dict, m: dict, window: int, known):
+    body = term.strip()
+    g = _RULE_DISTINCT.match(body)
+    if g:
+        ids = [c for c in comps if not g.group(2) or c.upper().startswith(g.group(2).upper() + "_")]
+        return _Distinct(ids, int(g.group(1)), window)
+    g = _RULE_COUNT.match(body)
+    if g:
+        return _Count(comps, int(g.group(1) or 1), window)
+    if body.upper() == "ANY_OF":
+        return _Count(comps, int(act.get("threshold") or 1), window)
+    if _RULE_ALL.match(body):
+        return _Distinct(comps, len(comps), window)
+    if body.upper() == "WEIGHTED_AND":
+        comb = m.get("combination") or {}
+        weights = {c["marker_id"]: float(c.get("weight", 1.0)) for c in comb.get("components") or []
+                   if isinstance(c, dict) and c.get("marker_id")}
+        if not weights or comb.get("threshold") is None:
+            raise ValueError("WEIGHTED_AND needs combination.components and combination.threshold")
+        return _Weighted(weights, float(comb["threshold"]), window)
+    g = _RULE_SUM.match(body)
+    if g:
+        ids = _COUNT_ID.findall(g.group(1))
+        for ident in ids:
+            if ident not in known:
+                raise ValueError(f"unknown marker {ident!r}")
+        return _Count(ids, int(g.group(2)), window)
+    parts = _AND_SPLIT.split(body)
+    if len(parts) > 1:
+        conds = []
+        for part in parts:
+            cond = _id_term(part, window, known, bare=True)
+            if cond is None:
+                raise ValueError(f"unsupported term {part.strip()!r}")
+            conds.append(cond)
+        return _AllOf(conds)
+    cond = _id_term(body, window, known, bare=False)
+    if cond is None:
+        raise ValueError(f"unsupported rule {body!r}")
+    return cond
+
+def _activation(m: dict):
+    act = m.get("activation")
+    return m.get("activation_logic") if act is None else act
+
+def _compile_rule(m: dict, known=frozenset()):
+    """Condition tree for the marker's activation rule; None when it has nothing to compose."""
+    act = _activation(m)
+    if act is None:
+        return None
+    if not isinstance(act, dict):
+        act = {"rule": act}
+    rule = act.get("rule")
+    default_window = (_window_messages(act.get("window")) or _window_messages(act.get("window_size"))
+                      or _window_messages(m.get("window")) or 1)
+    comps = _marker_components(m)
+
+    def term(text: str, window: int):
+        w = _RULE_WINDOW.match(text)
+        if w:
+            text, window = w.group(1), int(w.group(2))
+        return _rule_term(text, comps, act, m, max(1, window), known)
+
+    if isinstance(rule, dict):
+        conds = [term(" ".join(str(t).split()), default_window) for t in rule.get("all_of") or []]
+        if rule.get("any_of"):
+            conds.append(_AnyOf([term(" ".join(str(t).split()), default_window) for t in rule["any_of"]]))
+        if not conds:
+            raise ValueError("rule dict needs all_of and/or any_of")
+        cond = conds[0] if len(conds) == 1 else _AllOf(conds)
+    elif isinstance(rule, str) and rule.strip():
+        alts = [term(alt, default_window) for alt in _OR_SPLIT.split(" ".join(rule.split()))]
+        cond = alts[0] if len(alts) == 1 else _AnyOf(alts)
+    else:
+        raise ValueError("missing rule")
+    return cond if cond.ids else None
+
+def composition_graph(markers: List[dict], rules) -> Dict[str, List[str]]:
+    """Marker id -> ids it is built from (composed_of, combination components, rule inputs)."""
+    graph: Dict[str, List[str]] = {}
+    for m in markers:
+        deps = _marker_components(m)
+        if deps and isinstance(m.get("id"), str):
+            graph.setdefault(m["id"], []).extend(deps)
+    for m, _, cond in rules:
+        graph.setdefault(m["id"], []).extend(cond.ids)
+    return {k: list(dict.fromkeys(v)) for k, v in graph.items()}
+
+def _toposort(graph: Dict[str, List[str]]):
+    # (order, cycles): Tarjan's SCCs come out inputs-first; multi-node or
+    # self-referencing components are cycles
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: set = set()
+    order: List[str] = []
+    cycles: List[List[str]] = []
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, deps = work[-1]
+            for d in deps:
+                if d not in index:
+                    index[d] = low[d] = len(index)
+                    stack.append(d)
+                    on_stack.add(d)
+                    work.append((d, iter(graph.get(d, ()))))
+                    break
+                if d in on_stack:
+                    low[node] = min(low[node], index[d])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    comp = []
+                    while True:
+                        x = stack.pop()
+                        on_stack.discard(x)
+                        comp.append(x)
+                        if x == node:
+                            break
+                    comp.reverse()
+                    if len(comp) > 1 or node in graph.get(node, ()):
+                        cycles.append(comp)
+                    order.extend(comp)
+    return order, cycles
+
+def compile_activation_rules(markers: List[dict]):
+    """(rules, errors): compiled (marker, type, condition) triples, inputs before the
+    markers composed from them, plus every rule that did not parse or sits on a cycle."""
+    rules, errors = [], []
+    known = {m.get("id") for m in markers}
     for m in markers:
-        pats = list(m.get("pattern") or ([] if m.get("regex") is None else [m.get("regex")]))
-        patt.append((m, pats))
-    flags_default = re.I | re.M | re.U
-    for m, patterns in patt:
-        mtype = m.get("type")
-        if mtype not in ("ATO", "SEM", "CLU", "MEMA", "DETECT"):
+        try:
+            cond = _compile_rule(m, known)
+        except (ValueError, TypeError) as e:
+            act = _activation(m)
+            errors.append({"id": m.get("id"), "rule": act.get("rule") if isinstance(act, dict) else act,
+                           "error": str(e)})
             continue
-        flags = flags_default
-        # allow marker-specific flags (e.g. "g", "i"): ignore "g", map "i" to re.I
-        if isinstance(m.get("flags"), str):
-            fl = m["flags"].lower()
-            if "i" in fl:
-                flags |= re.I
-        for p in patterns:
-            try:
-                r = re.compile(p, flags)
-            except Exception:
+        if cond is not None:
+            rules.append((m, _marker_type(m) or "SEM", cond))
+    order, cycles = _toposort(composition_graph(markers, rules))
+    cyclic = set()
+    for comp in cycles:
+        cyclic.update(comp)
+        errors.append({"id": comp[0], "rule": None, "error": "composition cycle: " + " -> ".join(comp + comp[:1])})
+    rank = {ident: k for k, ident in enumerate(order)}
+    rules = sorted((r for r in rules if r[0]["id"] not in cyclic), key=lambda r: rank[r[0]["id"]])
+    return rules, errors
+
+def _leaves(cond):
+    if isinstance(cond, _AllOf):
+        return [leaf for c in cond.conds for leaf in _leaves(c)]
+    return [cond]
+
+class _RuleSet:
+    """Compiled activation rules, evaluated level by level in one pass over the messages.
+
+    Rules are ordered inputs-first. Within a message only rules listening to an
+    id that hit there are evaluated; a firing feeds its own id to the rules
+    composed from it, so deep composition costs per hit, not per catalog entry.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.listeners: Dict[str, List[int]] = {}
+        for k, (_, _, cond) in enumerate(rules):
+            for i in cond.ids:
+                self.listeners.setdefault(i, []).append(k)
+        self.windows = sorted({c.window for _, _, cond in rules for c in _leaves(cond)})
+        self.max_window = self.windows[-1] if self.windows else 1
+
+    def fire(self, events: List[dict], segments: List[dict], first: int = 0) -> List[dict]:
+        """Activation events for messages >= `first`.
+
+        `events` are the detected/promoted events of the messages from
+        `first - max_window + 1` on, plus the activations already fired in the
+        messages before `first`.
+        """
+        return self.fire_rows(_event_rows(events), segments, first)
+
+    def fire_rows(self, rows: Iterable[tuple], segments: List[dict], first: int = 0) -> List[dict]:
+        """`fire` over (segment_idx, id, start, end) rows instead of event dicts."""
+        if not self.rules or not segments:
+            return []
+        rules, listeners = self.rules, self.listeners
+        lo = max(0, first - self.max_window + 1)
+        per_msg: List[Dict[str, list]] = [{} for _ in range(lo, len(segments))]
+        for seg, i, start, end in rows:
+            if seg < lo or i not in listeners:
+                continue
+            _add_hit(per_msg[seg - lo], i, start, end)
+        totals: Dict[int, Dict[str, int]] = {w: {} for w in self.windows}
+        out = []
+        for k, hits in enumerate(per_msg):
+            for w, t in totals.items():
+                for i, (n, _, _) in hits.items():
+                    t[i] = t.get(i, 0) + n
+                if k >= w:
+                    for i, (n, _, _) in per_msg[k - w].items():
+                        t[i] -= n
+            msg = lo + k
+            if msg < first or not hits:
                 continue
-            for match in r.finditer(text):
-                start, end = match.start(), match.end()
-                seg_idx = _span_to_segment(start, text_len, segments)
-                who = segments[seg_idx]["who"] if seg_idx is not None else "other"
-                events.append({
+            queue = sorted({r for i in hits for r in listeners[i]})
+            queued = set(queue)
+            while queue:
+                m, mtype, cond = rules[heapq.heappop(queue)]
+                if not cond.holds(totals):
+                    continue
+                own = [hits[i] for i in cond.ids if i in hits]
+                ev = {
                     "id": m["id"],
                     "type": mtype,
-                    "span": {"start": start, "end": end},
-                    "segment_idx": seg_idx or 0,
-                    "who": who,
-                    "evidence": (text[start:end])[:120]
-                })
-    events.sort(key=lambda e: e["span"]["start"])
-    return events
+                    "span": {"start": min(h[1] for h in own), "end": max(h[2] for h in own)},
+                    "segment_idx": msg, "who": segments[msg]["who"],
+                    "activation_of": [i for i in cond.ids if totals[cond.window].get(i)]
+                }
+                out.append(ev)
+                fid = m["id"]
+                if fid in listeners:
+                    _add_hit(hits, fid, ev["span"]["start"], ev["span"]["end"])
+                    for t in totals.values():
+                        t[fid] = t.get(fid, 0) + 1
+                    for r in listeners[fid]:
+                        if r not in queued:
+                            queued.add(r)
+                            heapq.heappush(queue, r)
+        return out
 
-# ---------- Promotion (ATO → SEM etc.) ----------
-def promote_sem(events: List[dict], promo_map: dict):
-    out = list(events)
-    by_seg: Dict[int, List[dict]] = {}
-    for ev in events:
-        if ev["type"] == "ATO":
-            by_seg.setdefault(ev["segment_idx"], []).append(ev)
+def _event_rows(events: Iterable[dict]) -> Iterator[tuple]:
+    return ((ev["segment_idx"], ev["id"], ev["span"]["start"], ev["span"]["end"]) for ev in events)
 
-    for rule in (promo_map.get("map") or []):
-        promote_id = rule.get("promote")
-        cond = rule.get("when", {})
-        min_ATO = ((cond.get("segment_co_occurs") or {}).get("min_ATO")) or 2
-        allowed = set(rule.get("from_ATO_ids") or [])
-        for seg_idx, atos in by_seg.items():
-            hits = [a for a in atos if (not allowed or a["id"] in allowed)]
-            if len(hits) >= min_ATO:
-                out.append({
-                    "id": promote_id,
-                    "type": "SEM",
-                    "span": {"start": hits[0]["span"]["start"], "end": hits[-1]["span"]["end"]},
-                    "segment_idx": seg_idx, "who": hits[-1]["who"],
-                    "promotion_of": [h["id"] for h in hits]
-                })
+def _add_hit(hits: Dict[str, list], ident: str, start: int, end: int) -> None:
+    slot = hits.get(ident)
+    if slot is None:
+        hits[ident] = [1, start, end]
+    else:
+        slot[0] += 1
+        slot[1] = min(slot[1], start)
+        slot[2] = max(slot[2], end)
+
+def apply_activations(events: List[dict], segments: List[dict], rules: "_RuleSet") -> List[dict]:
+    out = events + rules.fire(events, segments)
     out.sort(key=lambda e: e["span"]["start"])
-    return out, []  # optional explicit promotion list
+    return out
 
 # ---------- Counts / Features ----------
 def _build_counts(events: List[dict]) -> dict:
@@ -160,22 +1320,140 @@ def _compute_indices(features: dict, weights: dict) -> dict:
         idx[key] = {"raw": raw, "z": z, "p": p}
     return idx
 
+# ---------- Vectorized indices ----------
+# Batch scoring / recalibration: weights.json compiled once into a features x
+# indices weight matrix plus bias, mu and sigma vectors. With NumPy an N x 4
+# feature array goes through one matmul and a vectorized normal CDF; without
+# it the same model runs row by row on math.erf.
+INDEX_KEYS = ("trust", "deesc", "conflict", "sync")
+FEATURE_KEYS = ("ATO", "SEM", "CLU", "MEMA")
+
+# erf as in CPython's former pure-Python fallback (Mathematics/mathmodule.c
+# before libm erf): power series below 1.5, continued fraction for erfc above.
+# Only arithmetic and `exp`, so the same code runs on floats and arrays.
+_ERF_SERIES_CUTOFF = 1.5
+_ERF_SERIES_TERMS = 25
+_ERFC_CONTFRAC_CUTOFF = 30.0
+_ERFC_CONTFRAC_TERMS = 50
+_SQRTPI = math.sqrt(math.pi)
+
+def _erf_series(x, exp):
+    x2 = x * x
+    acc = 0.0
+    fk = _ERF_SERIES_TERMS + 0.5
+    for _ in range(_ERF_SERIES_TERMS):
+        acc = 2.0 + x2 * acc / fk
+        fk -= 1.0
+    return acc * x * exp(-x2) / _SQRTPI
+
+def _erfc_contfrac(x, exp):
+    x2 = x * x
+    a, da = 0.0, 0.5
+    p, p_last = 1.0, 0.0
+    q, q_last = da + x2, 1.0
+    for _ in range(_ERFC_CONTFRAC_TERMS):
+        a += da
+        da += 2.0
+        b = da + x2
+        p, p_last = b * p - a * p_last, p
+        q, q_last = b * q - a * q_last, q
+    return p / q * x * exp(-x2) / _SQRTPI
+
+def _erf_array(x):
+    ax = _np.minimum(_np.abs(x), _ERFC_CONTFRAC_CUTOFF)
+    small = ax < _ERF_SERIES_CUTOFF
+    out = _np.empty_like(ax)
+    out[small] = _erf_series(ax[small], _np.exp)
+    out[~small] = 1.0 - _erfc_contfrac(ax[~small], _np.exp)
+    return _np.copysign(out, x)
+
+class IndexModel:
+    """weights.json indices and calibration as vectors, for scoring many feature rows.
+
+    `w[f][i]` is the weight of feature FEATURE_KEYS[f] in index INDEX_KEYS[i];
+    `bias`, `mu` and `sigma` are per index. Results match `_compute_indices`
+    to 1e-12.
+    """
+
+    def __init__(self, weights: dict):
+        calib = weights.get("calib", {"mu": {}, "sigma": {}})
+        confs = [(weights.get("indices") or {}).get(key) or {"w": {}, "bias": 0.0} for key in INDEX_KEYS]
+        self.w = [[float(conf["w"].get(t, 0.0)) for conf in confs] for t in FEATURE_KEYS]
+        self.bias = [float(conf.get("bias", 0.0)) for conf in confs]
+        self.mu = [float(calib.get("mu", {}).get(key, 0.0)) for key in INDEX_KEYS]
+        self.sigma = [float(max(1e-9, calib.get("sigma", {}).get(key, 1.0))) for key in INDEX_KEYS]
+        if _np is not None:
+            self._w = _np.array(self.w, dtype=float)
+            self._bias = _np.array(self.bias, dtype=float)
+            self._mu = _np.array(self.mu, dtype=float)
+            self._sigma = _np.array(self.sigma, dtype=float)
+
+    def score(self, features, use_numpy: Optional[bool] = None):
+        """(raw, z, p) for N feature rows, each N x 4 in INDEX_KEYS order.
+
+        `features` is an N x 4 array/sequence in FEATURE_KEYS order or a list
+        of feature dicts. NumPy arrays come back when NumPy is used, lists of
+        lists otherwise.
+        """
+        if use_numpy is None:
+            use_numpy = _np is not None
+        if use_numpy and _np is None:
+            raise RuntimeError("E_NUMPY_MISSING: install numpy or pass use_numpy=False")
+        rows = feature_rows(features) if _is_dict_rows(features) else features
+        if use_numpy:
+            x = _np.asarray(rows, dtype=float).reshape(-1, len(FEATURE_KEYS))
+            raw = x @ self._w + self._bias
+            z = (raw - self._mu) / self._sigma
+            return raw, z, 0.5 * (1.0 + _erf_array(z / math.sqrt(2)))
+        cols = list(zip(*self.w))  # weights per index
+        raws, zs, ps = [], [], []
+        for row in rows:
+            raw = [sum(wt * f for wt, f in zip(col, row)) + b for col, b in zip(cols, self.bias)]
+            z = [(r - mu) / sigma for r, mu, sigma in zip(raw, self.mu, self.sigma)]
+            raws.append(raw)
+            zs.append(z)
+            ps.append([_normal_cdf(v) for v in z])
+        return raws, zs, ps
+
+    def indices(self, features, use_numpy: Optional[bool] = None) -> List[dict]:
+        """`_compute_indices` output for every feature row."""
+        raw, z, p = self.score(features, use_numpy)
+        if _np is not None and isinstance(raw, _np.ndarray):
+            raw, z, p = raw.tolist(), z.tolist(), p.tolist()
+        return [{key: {"raw": r[i], "z": zz[i], "p": pp[i]} for i, key in enumerate(INDEX_KEYS)}
+                for r, zz, pp in zip(raw, z, p)]
+
+def _is_dict_rows(features) -> bool:
+    return isinstance(features, list) and bool(features) and isinstance(features[0], dict)
+
+def feature_rows(features: Iterable[dict]) -> List[List[float]]:
+    """Feature dicts as N x 4 rows in FEATURE_KEYS order."""
+    return [[f.get(t, 0.0) for t in FEATURE_KEYS] for f in features]
+
+def compute_indices_batch(features, weights: dict, use_numpy: Optional[bool] = None) -> List[dict]:
+    return IndexModel(weights).indices(features, use_numpy)
+
 # ---------- Packaging ----------
-def _density(events: List[dict], text_len: int) -> dict:
+def _density(events: List[dict], text_len: int, totals: Optional[dict] = None) -> dict:
     per = {k: 0.0 for k in ("ATO", "SEM", "CLU", "MEMA")}
-    totals = _build_counts(events)["total"]
+    if totals is None:
+        totals = _build_counts(events)["total"]
     for k in per.keys():
         per[k] = totals.get(k, 0) / max(1, text_len / 1000.0)
     return {"text_len": text_len, "per_1k_chars": per}
 
 def _package_output(text: str, segments: List[dict], events: List[dict], indices: dict,
-                    canon_hash: str, engine_hash: str, elapsed_ms: float) -> dict:
+                    canon_hash: str, engine_hash: str, elapsed_ms: float,
+                    counts: Optional[dict] = None, input_hash: Optional[str] = None) -> dict:
     text_len = len(text or "")
-    counts = _build_counts(events)
+    if counts is None:
+        counts = _build_counts(events)
+    if input_hash is None:
+        input_hash = _sha256_str((text or "") + json.dumps(segments, ensure_ascii=False))
     feats = _features_from_counts(counts, text_len)
     out = {
         "meta": {
-            "input_hash": _sha256_str((text or "") + json.dumps(segments, ensure_ascii=False)),
+            "input_hash": input_hash,
             "canon_hash": canon_hash,
             "engine_hash": engine_hash,
             "elapsed_ms": int(elapsed_ms),
@@ -185,7 +1463,7 @@ def _package_output(text: str, segments: List[dict], events: List[dict], indices
         "markers": events,
         "promotion": [],
         "counts": counts,
-        "density": _density(events, text_len),
+        "density": _density(events, text_len, counts["total"]),
         "features": feats,
         "indices": indices,
         "top_contributors": {"A": [], "B": []}
@@ -197,61 +1475,793 @@ def _package_output(text: str, segments: List[dict], events: List[dict], indices
             v.pop("p", None)
     return out
 
-# ---------- Public API ----------
+# ---------- Regex cost profile ----------
+# Every pattern runs over a stress corpus: the catalog's own examples plus
+# adversarial inputs that pump each unbounded repeat (prefix + body * k + a
+# failing char). Input sizes double until a scan gets slow; the growth of the
+# scan time with size flags super-linear (backtracking) patterns, and the
+# time projected to REGEX_REFERENCE_SIZE chars is checked against a budget.
+REGEX_PROFILE_SIZES = (4, 8, 16, 32, 128, 512, 2048)  # small steps first: exponential blowup
+REGEX_REFERENCE_SIZE = 2048      # chars; roughly one long message
+REGEX_SUPERLINEAR_GROWTH = 1.5   # fitted exponent above which a pattern is flagged
+REGEX_NOISE_MS = 0.005           # scans faster than this are not used to fit growth
+REGEX_PROBE_MS = 50.0            # stop pumping once a scan (or its prediction) is slower
+REGEX_MAX_PUMPS = 6
+REGEX_CORPUS_CHARS = 32768
+_REGEX_PROJECTION_CAP_MS = 1e9
+_REPEAT_OPS = tuple(op for op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT,
+                                  getattr(_sre_c, "POSSESSIVE_REPEAT", None)) if op is not None) if _SRE_OK else ()
+_CATEGORY_SAMPLE = {
+    _sre_c.CATEGORY_DIGIT: "1", _sre_c.CATEGORY_NOT_DIGIT: "a",
+    _sre_c.CATEGORY_WORD: "a", _sre_c.CATEGORY_NOT_WORD: " ",
+    _sre_c.CATEGORY_SPACE: " ", _sre_c.CATEGORY_NOT_SPACE: "a",
+} if _SRE_OK else {}
+
+class RegexBudgetError(ValueError):
+    """A catalog pattern's projected scan time exceeds the configured budget."""
+
+    def __init__(self, report: dict):
+        self.report = report
+        over = ", ".join(f"{c['id']} ({c['cost_ms']} ms)" for c in report["over_budget"][:5])
+        super().__init__(f"E_REGEX_BUDGET: {len(report['over_budget'])} pattern(s) over "
+                         f"{report['budget_ms']} ms: {over}")
+
+def _regex_sample(data) -> str:
+    # a short string matching the parsed sequence (best effort; assertions are ignored)
+    out = []
+    for op, av in data:
+        if op is _sre_c.LITERAL:
+            out.append(chr(av))
+        elif op is _sre_c.NOT_LITERAL:
+            out.append("b" if chr(av) == "a" else "a")
+        elif op is _sre_c.ANY:
+            out.append("a")
+        elif op is _sre_c.CATEGORY:
+            out.append(_CATEGORY_SAMPLE.get(av, "a"))
+        elif op is _sre_c.IN:
+            out.append(_class_sample(av))
+        elif op is _sre_c.SUBPATTERN:
+            out.append(_regex_sample(av[-1].data))
+        elif op is _sre_c.BRANCH:
+            out.append(_regex_sample(av[1][0].data) if av[1] else "")
+        elif op in _REPEAT_OPS:
+            out.append(_regex_sample(av[2].data) * max(1, min(av[0], 8)))
+        elif op is getattr(_sre_c, "ATOMIC_GROUP", None):
+            out.append(_regex_sample(av.data))
+    return "".join(out)
+
+def _class_sample(items) -> str:
+    if items and items[0][0] is _sre_c.NEGATE:
+        banned = {chr(a) for o, a in items[1:] if o is _sre_c.LITERAL}
+        return next(c for c in "a !1x" if c not in banned)
+    for op, av in items:
+        if op is _sre_c.LITERAL:
+            return chr(av)
+        if op is _sre_c.RANGE:
+            return chr(av[0])
+        if op is _sre_c.CATEGORY:
+            return _CATEGORY_SAMPLE.get(av, "a")
+    return "a"
+
+def _pump_points(data, prefix: str, out: List[tuple]) -> None:
+    # (prefix, pump) per unbounded repeat: `prefix` reaches it, `pump` is one body iteration
+    for op, av in data:
+        if op in _REPEAT_OPS:
+            lo, hi, body = av
+            if hi == _sre_c.MAXREPEAT or hi > 16:
+                pump = _regex_sample(body.data)
+                if pump:
+                    out.append((prefix, pump))
+            _pump_points(body.data, prefix, out)
+        elif op is _sre_c.SUBPATTERN:
+            _pump_points(av[-1].data, prefix, out)
+        elif op is _sre_c.BRANCH:
+            for alt in av[1]:
+                _pump_points(alt.data, prefix, out)
+        prefix += _regex_sample([(op, av)])
+
+def _regex_pumps(r) -> List[tuple]:
+    points: List[tuple] = []
+    try:
+        if not _SRE_OK:
+            raise LookupError("sre internals unavailable")
+        _pump_points(_sre_parse.parse(r.pattern, r.flags).data, "", points)
+    except Exception:
+        pass
+    points = list(dict.fromkeys(points))[:REGEX_MAX_PUMPS]
+    for generic in (("", "a"), ("", "a ")):
+        if len(points) < 2 and generic not in points:
+            points.append(generic)
+    return points
+
+def _scan_ms(r, text: str) -> float:
+    # fast scans are looped past timer resolution; best of two
+    loops, dt = 1, 0.0
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            for _ in r.finditer(text):
+                pass
+        dt = time.perf_counter() - t0
+        if dt >= 0.0002 or loops >= 1000:
+            break
+        loops *= 10
+    if dt < REGEX_PROBE_MS / 1000:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            for _ in r.finditer(text):
+                pass
+        dt = min(dt, time.perf_counter() - t0)
+    return dt * 1000 / loops
+
+def _pump_cost(r, prefix: str, pump: str) -> dict:
+    """Scan times of prefix + pump * k + "\x00" for growing sizes, and the fitted growth."""
+    times: List[tuple] = []
+    for size in REGEX_PROFILE_SIZES:
+        if len(times) >= 2:
+            (n0, t0), (n1, t1) = times[-2], times[-1]
+            # time ratio per doubling, with one extra factor when it already looks
+            # super-polynomial (exponential blowup squares it every doubling)
+            g = (t1 / max(t0, REGEX_NOISE_MS / 10)) ** (1 / math.log2(n1 / n0))
+            predicted = t1 * g ** math.log2(size / n1) * (g if g > 4 else 1)
+            if t1 >= REGEX_PROBE_MS or predicted >= REGEX_PROBE_MS * 10:
+                break
+        k = max(1, -(-(size - len(prefix)) // len(pump)))
+        times.append((size, _scan_ms(r, prefix + pump * k + "\x00")))
+    # growth over the last two size steps above the noise floor; the smaller of
+    # the two exponents, so one timing spike cannot flag a pattern
+    fit = [(n, t) for n, t in times if t >= REGEX_NOISE_MS][-3:]
+    if len(fit) < 2:
+        fit = times[-2:]
+    steps = [math.log(t1 / t0) / math.log(n1 / n0) for (n0, t0), (n1, t1) in zip(fit, fit[1:])]
+    growth = min(steps) if steps else 1.0
+    size, last = times[-1]
+    projected = last * (REGEX_REFERENCE_SIZE / size) ** max(1.0, growth)
+    return {"prefix": prefix, "pump": pump, "size": size, "ms": round(last, 4),
+            "growth": round(growth, 2), "projected_ms": min(projected, _REGEX_PROJECTION_CAP_MS)}
+
+def _marker_examples(m: dict) -> List[str]:
+    ex = m.get("examples")
+    if ex is None and isinstance(m.get("extras"), dict):
+        ex = m["extras"].get("examples")  # marker_manager canonical items
+    if isinstance(ex, dict):
+        ex = (ex.get("positive") or []) + (ex.get("negative") or [])
+    return [e for e in (ex or []) if isinstance(e, str)]
+
+def profile_patterns(markers: List[dict], budget_ms: Optional[float] = None,
+                     corpus: Optional[str] = None) -> dict:
+    """Ranked regex cost report for the catalog's patterns.
+
+    `cost_ms` is the larger of the scan time over the examples corpus and the
+    worst pumped input projected to REGEX_REFERENCE_SIZE chars. Patterns
+    whose scan time grows faster than REGEX_SUPERLINEAR_GROWTH are flagged;
+    with `budget_ms`, patterns costing more are listed in `over_budget`.
+    """
+    t_start = time.perf_counter()
+    errors: List[dict] = []
+    compiled = [(m, r) for m in markers for r in _compile_marker(m, errors)]  # any type
+    if corpus is None:
+        corpus = "\n".join(e for m in markers for e in _marker_examples(m))[:REGEX_CORPUS_CHARS]
+    costs = []
+    for m, r in compiled:
+        pumps = sorted((_pump_cost(r, prefix, pump) for prefix, pump in _regex_pumps(r)),
+                       key=lambda c: (c["projected_ms"], c["growth"]), reverse=True)
+        worst = pumps[0]
+        corpus_ms = _scan_ms(r, corpus) if corpus else 0.0
+        costs.append({
+            "id": m.get("id"), "pattern": r.pattern,
+            "cost_ms": round(max(corpus_ms, worst["projected_ms"]), 4),
+            "corpus_ms": round(corpus_ms, 4),
+            "growth": worst["growth"],
+            "superlinear": worst["growth"] > REGEX_SUPERLINEAR_GROWTH,
+            "worst_input": worst,
+        })
+    costs.sort(key=lambda c: c["cost_ms"], reverse=True)
+    over = [c for c in costs if budget_ms is not None and c["cost_ms"] > budget_ms]
+    return {
+        "patterns": costs,
+        "flagged": [c["id"] for c in costs if c["superlinear"]],
+        "over_budget": over,
+        "budget_ms": budget_ms,
+        "compile_errors": errors,
+        "corpus_chars": len(corpus),
+        "elapsed_ms": round((time.perf_counter() - t_start) * 1000, 1),
+    }
+
+# ---------- Profiling ----------
+# Opt-in (run(..., profiling=True)): the scan switches to instrumented copies
+# of the hot loops, so the default path carries no timing code at all.
+class _RunProfile:
+    """Counters for one profiled run; the slot lists follow `_MultiScanner.slots`."""
+
+    def __init__(self, n_slots: int):
+        self.ms = [0.0] * n_slots        # seconds in finditer / r.match
+        self.matches = [0] * n_slots
+        self.candidates = [0] * n_slots  # screening positions handed to r.match
+        self.skipped = [0] * n_slots     # rejected by the literal prefilter
+        self.stages: Dict[str, float] = {"prefilter_ms": 0.0, "screen_ms": 0.0}
+        self._t = self._start = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._t) * 1000
+        self._t = now
+
+    def report(self, scanner: "_MultiScanner") -> dict:
+        """meta.profile: stage times plus marker and pattern rows, slowest first."""
+        patterns, markers = [], {}
+        nth: Dict[str, int] = {}
+        for idx, (m, _, r) in enumerate(scanner.slots):
+            mid = m.get("id")
+            k = nth[mid] = nth.get(mid, -1) + 1
+            ms = round(self.ms[idx] * 1000, 4)
+            rejected = max(0, self.candidates[idx] - self.matches[idx]) if self.candidates[idx] else 0
+            row = markers.setdefault(mid, {"key": mid, "ms": 0.0, "matches": 0, "candidates": 0,
+                                           "rejected": 0, "skipped": 0})
+            row["ms"] += ms
+            row["matches"] += self.matches[idx]
+            row["candidates"] += self.candidates[idx]
+            row["rejected"] += rejected
+            row["skipped"] += self.skipped[idx]
+            if not self.skipped[idx]:
+                patterns.append({"key": f"{mid}#{k}", "pattern": r.pattern, "ms": ms,
+                                 "matches": self.matches[idx], "candidates": self.candidates[idx],
+                                 "rejected": rejected})
+        for row in markers.values():
+            row["ms"] = round(row["ms"], 4)
+        return {
+            "elapsed_ms": round((self._t - self._start) * 1000, 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            "markers": sorted(markers.values(), key=lambda row: row["ms"], reverse=True),
+            "patterns": sorted(patterns, key=lambda row: row["ms"], reverse=True),
+        }
+
+class ProfileCollector:
+    """Thread-safe sum of profiles across calls.
+
+    `add` takes a meta.profile (or EngineRuntime telemetry["_profile"]); every
+    list of rows is merged by `key`, numeric fields summed. `table` renders one
+    kind ("markers", "patterns", "plugins", ...) as a sorted text table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.stages: Dict[str, float] = {}
+        self.kinds: Dict[str, Dict[str, dict]] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.stages = {}
+            self.kinds = {}
+
+    def add(self, profile: dict) -> None:
+        with self._lock:
+            self.calls += 1
+            for stage, ms in (profile.get("stages") or {}).items():
+                self.stages[stage] = self.stages.get(stage, 0.0) + ms
+            for kind, rows in profile.items():
+                if not isinstance(rows, list):
+                    continue
+                agg = self.kinds.setdefault(kind, {})
+                for row in rows:
+                    cur = agg.get(row["key"])
+                    if cur is None:
+                        agg[row["key"]] = dict(row, calls=1)
+                        continue
+                    cur["calls"] += 1
+                    for f, v in row.items():
+                        if f != "key" and isinstance(v, (int, float)) and not isinstance(v, bool):
+                            cur[f] = cur.get(f, 0) + v
+
+    def rows(self, kind: str = "markers", sort: str = "ms") -> List[dict]:
+        with self._lock:
+            rows = [dict(r) for r in self.kinds.get(kind, {}).values()]
+        rows.sort(key=lambda r: r.get(sort, 0), reverse=True)
+        return rows
+
+    def table(self, kind: str = "markers", sort: str = "ms", limit: Optional[int] = 20) -> str:
+        rows = self.rows(kind, sort)[:limit]
+        if not rows:
+            return ""
+        cols = [f for f, v in rows[0].items()
+                if f != "key" and isinstance(v, (int, float)) and not isinstance(v, bool)]
+        width = min(48, max(len("key"), *(len(str(r["key"])) for r in rows)))
+        fmt = lambda v: f"{v:.3f}" if isinstance(v, float) else str(v)  # noqa: E731
+        lines = ["key".ljust(width) + "".join(f"{c:>12}" for c in cols)]
+        for r in rows:
+            lines.append(str(r["key"])[:width].ljust(width) + "".join(f"{fmt(r.get(c, 0)):>12}" for c in cols))
+        return "\n".join(lines)
+
+PROFILE = ProfileCollector()
+
+# ---------- Compiled catalog ----------
 CANON_DEFAULT = "carl/markers_canonical.json"
 PROMOTION_DEFAULT = "carl/promotion_mapping.json"
 WEIGHTS_DEFAULT = "carl/weights.json"
 
+def _locate(path: str) -> Optional[str]:
+    for p in (path, f"./{path}", f"/mnt/data/{path}"):
+        if os.path.exists(p):
+            return p
+    return None
 
-def run(
-    text: Optional[str] = None,
-    segments: Optional[List[Dict[str, Any]]] = None,
-    canon_path: str = CANON_DEFAULT,
-    promotion_path: str = PROMOTION_DEFAULT,
-    weights_path: str = WEIGHTS_DEFAULT,
-) -> Dict[str, Any]:
-    t0 = time.time()
+def _stamp(path: str):
+    # (resolved path, mtime_ns, size) — cheap change detection without reading the file
+    p = _locate(path)
+    if p is None:
+        return None
+    st = os.stat(p)
+    return (p, st.st_mtime_ns, st.st_size)
+
+class CompiledCatalog:
+    """Canon, promotion map and weights, loaded and compiled once.
+
+    `key` is the SHA-256 over the three source files, so identical content
+    shares one compiled instance regardless of the path it was read from.
+    Patterns that fail to compile are listed in `pattern_errors`; with
+    REGEX_BUDGET_MS set, construction profiles every pattern and raises
+    RegexBudgetError when one costs more.
+    """
+
+    def __init__(self, canon: Any, promo: dict, weights: dict, key: str = ""):
+        self.canon = canon
+        self.promo = promo
+        self.weights = weights
+        self.markers = _canon_markers(canon)
+        self.pattern_errors: List[dict] = []
+        self.compiled = _compile_patterns(self.markers, self.pattern_errors)
+        self.scanner = _MultiScanner(self.compiled)
+        self.promotion = _PromotionIndex(promo)
+        self.index_model = IndexModel(weights)
+        rules, self.rule_errors = compile_activation_rules(self.markers)
+        self.rules = _RuleSet(rules)
+        self.canon_hash = _sha256_str(json.dumps(canon, ensure_ascii=False))
+        self.engine_hash = _sha256_str(ENGINE_VERSION)
+        self.key = key or _sha256_str(self.canon_hash + json.dumps([promo, weights], ensure_ascii=False))
+        self.regex_report: Optional[dict] = None
+        budget = os.getenv("REGEX_BUDGET_MS")
+        if budget:
+            self.profile(float(budget), raise_over_budget=True)
+
+    def profile(self, budget_ms: Optional[float] = None, raise_over_budget: bool = False) -> dict:
+        """Regex cost report for this catalog (see `profile_patterns`)."""
+        self.regex_report = profile_patterns(self.markers, budget_ms)
+        if raise_over_budget and self.regex_report["over_budget"]:
+            raise RegexBudgetError(self.regex_report)
+        return self.regex_report
+
+    @classmethod
+    def from_files(cls, canon_path: str, promotion_path: str, weights_path: str) -> "CompiledCatalog":
+        """Uncached load; use `get_catalog` to share a warm instance."""
+        raw_canon = _read(canon_path)
+        raw_promo = _read(promotion_path) if _exists(promotion_path) else None
+        raw_weights = _read(weights_path)
+        return cls._from_raw(_content_key(raw_canon, raw_promo, raw_weights), raw_canon, raw_promo, raw_weights)
+
+    @classmethod
+    def _from_raw(cls, key: str, raw_canon: str, raw_promo: Optional[str], raw_weights: str) -> "CompiledCatalog":
+        canon = json.loads(raw_canon)
+        promo = json.loads(raw_promo) if raw_promo is not None else {"map": []}
+        weights = json.loads(raw_weights)
+        return cls(canon, promo, weights, key=key)
+
+    def detect(self, text: str, segments: List[dict]) -> List[dict]:
+        return self.scanner.detect(text, segments)
+
+    def table(self, text: str, segments: List[dict]) -> EventTable:
+        return self.scanner.table(text, segments)
+
+def _content_key(raw_canon: str, raw_promo: Optional[str], raw_weights: str) -> str:
+    h = hashlib.sha256()
+    for part in (raw_canon, raw_promo, raw_weights):
+        h.update(b"\x00" if part is None else part.encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+class _CatalogEntry:
+    __slots__ = ("stamps", "catalog")
+
+    def __init__(self, stamps, catalog: CompiledCatalog):
+        self.stamps = stamps
+        self.catalog = catalog
+
+_CATALOG_LOCK = threading.Lock()
+_CATALOG_BY_PATHS: Dict[tuple, _CatalogEntry] = {}
+_CATALOG_BY_KEY: Dict[str, CompiledCatalog] = {}
+
+def get_catalog(canon_path: str = CANON_DEFAULT,
+                promotion_path: str = PROMOTION_DEFAULT,
+                weights_path: str = WEIGHTS_DEFAULT) -> CompiledCatalog:
+    """Return the warm catalog for these paths, reloading only when a file changed."""
+    paths = (canon_path, promotion_path, weights_path)
+    stamps = tuple(_stamp(p) for p in paths)
+    with _CATALOG_LOCK:
+        entry = _CATALOG_BY_PATHS.get(paths)
+        if entry is not None and entry.stamps == stamps:
+            return entry.catalog
+        raw_canon = _read(canon_path)
+        raw_promo = _read(promotion_path) if stamps[1] is not None else None
+        raw_weights = _read(weights_path)
+        key = _content_key(raw_canon, raw_promo, raw_weights)
+        catalog = _CATALOG_BY_KEY.get(key)
+        if catalog is None:
+            catalog = CompiledCatalog._from_raw(key, raw_canon, raw_promo, raw_weights)
+        _CATALOG_BY_PATHS[paths] = _CatalogEntry(stamps, catalog)
+        # keep only catalogs still referenced by some path triple
+        live = {e.catalog.key: e.catalog for e in _CATALOG_BY_PATHS.values()}
+        _CATALOG_BY_KEY.clear()
+        _CATALOG_BY_KEY.update(live)
+        return catalog
+
+def clear_catalog_cache() -> None:
+    with _CATALOG_LOCK:
+        _CATALOG_BY_PATHS.clear()
+        _CATALOG_BY_KEY.clear()
+
+def _env_paths(canon_path: str, promotion_path: str, weights_path: str):
+    return (
+        os.getenv("CANON_PATH", canon_path),
+        os.getenv("PROMOTION_PATH", promotion_path),
+        os.getenv("WEIGHTS_PATH", weights_path),
+    )
+
+def _prepare_input(text: Optional[str], segments: Optional[List[Dict[str, Any]]]):
     if segments is None:
         if text is None:
             raise ValueError("E_EMPTY_INPUT: provide text or segments")
         segments = segment_dialog(text)
     if text is None:
         text = "\n".join(s["text"] for s in segments)
+    return text, segments
 
-    canon_path = os.getenv("CANON_PATH", canon_path)
-    promotion_path = os.getenv("PROMOTION_PATH", promotion_path)
-    weights_path = os.getenv("WEIGHTS_PATH", weights_path)
-
-    canon = cast(Dict[str, Any], _load_json(canon_path))
-    if _exists(promotion_path):
-        promo = cast(Dict[str, Any], _load_json(promotion_path))
+def _run_catalog(catalog: CompiledCatalog,
+                 text: str,
+                 segments: List[Dict[str, Any]],
+                 t0: float,
+                 prof: Optional["_RunProfile"] = None) -> Dict[str, Any]:
+    # detected hits stay columnar; only promoted/activation events are dicts
+    # until the final marker list is packaged. `prof` (profiling mode only)
+    # swaps in the instrumented scan and times the stages.
+    if prof is None:
+        table = catalog.table(text, segments)
     else:
-        promo = cast(Dict[str, Any], {"map": []})
-    weights = cast(Dict[str, Any], _load_json(weights_path))
-
-    events = cast(List[Dict[str, Any]], detect_events(text, segments, canon))
-    events, promo_list = promote_sem(events, promo)
+        scanner = catalog.scanner
+        table = EventTable.from_matches(text, segments, scanner.ids, scanner.slot_marker,
+                                        scanner.slot_type, scanner.matches_profiled(text, prof))
+        prof.lap("detect_ms")
+    promoted = catalog.promotion.promoted(table.atos_by_segment())
+    if prof is not None:
+        prof.lap("promotion_ms")
+    extra = promoted + catalog.rules.fire_rows(chain(table.rows(), _event_rows(promoted)), segments)
+    extra.sort(key=lambda e: e["span"]["start"])
+    if prof is not None:
+        prof.lap("activation_ms")
 
-    canon_hash = _sha256_str(json.dumps(canon, ensure_ascii=False))
-    engine_hash = _sha256_str(ENGINE_VERSION)
-
-    counts = cast(Dict[str, Any], _build_counts(events))
+    counts = cast(Dict[str, Any], table.counts(extra))
     features = cast(Dict[str, Any], _features_from_counts(counts, len(text)))
-    indices = cast(Dict[str, Any], _compute_indices(features, weights))
+    indices = cast(Dict[str, Any], _compute_indices(features, catalog.weights))
     elapsed_ms = (time.time() - t0) * 1000
     out = cast(
         Dict[str, Any],
         _package_output(
             text,
             segments,
-            events,
+            table.merged(extra),
             indices,
-            canon_hash,
-            engine_hash,
+            catalog.canon_hash,
+            catalog.engine_hash,
             elapsed_ms=elapsed_ms,
+            counts=counts,
         ),
     )
-    out["promotion"] = promo_list
+    if prof is not None:
+        prof.lap("package_ms")
+        out["meta"]["profile"] = prof.report(catalog.scanner)
+        PROFILE.add(out["meta"]["profile"])
     return out
 
+# ---------- Public API ----------
+class Engine:
+    """Long-lived engine bound to one catalog; `run` skips all load/compile work."""
+
+    def __init__(self,
+                 canon_path: str = CANON_DEFAULT,
+                 promotion_path: str = PROMOTION_DEFAULT,
+                 weights_path: str = WEIGHTS_DEFAULT):
+        self.paths = _env_paths(canon_path, promotion_path, weights_path)
+
+    @property
+    def catalog(self) -> CompiledCatalog:
+        return get_catalog(*self.paths)
+
+    def run(self, text: Optional[str] = None,
+            segments: Optional[List[Dict[str, Any]]] = None,
+            profiling: bool = False) -> Dict[str, Any]:
+        t0 = time.time()
+        text, segments = _prepare_input(text, segments)
+        catalog = self.catalog
+        prof = _RunProfile(len(catalog.scanner.slots)) if profiling else None
+        return _run_catalog(catalog, text, segments, t0, prof)
+
+    def session(self) -> "Session":
+        return Session(catalog=self.catalog)
+
+    def run_batch(self, items: Iterable[Any], workers: Optional[int] = None,
+                  chunksize: int = 16) -> Iterator[Any]:
+        return _run_batch(self.paths, items, workers, chunksize)
+
+
+def run(
+    text: Optional[str] = None,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    canon_path: str = CANON_DEFAULT,
+    promotion_path: str = PROMOTION_DEFAULT,
+    weights_path: str = WEIGHTS_DEFAULT,
+    profiling: bool = False,
+) -> Dict[str, Any]:
+    """Analyse one dialog. With `profiling`, meta.profile gets per-stage,
+    per-marker and per-pattern timings, also aggregated into `PROFILE`."""
+    t0 = time.time()
+    text, segments = _prepare_input(text, segments)
+    catalog = get_catalog(*_env_paths(canon_path, promotion_path, weights_path))
+    prof = _RunProfile(len(catalog.scanner.slots)) if profiling else None
+    return _run_catalog(catalog, text, segments, t0, prof)
+
+
+# ---------- Incremental session ----------
+def _count_event(counts: dict, ev: dict, sign: int) -> None:
+    # _build_counts for one event; removal deletes emptied keys so the key order
+    # keeps matching a fresh count
+    t, who = ev["type"], ev["who"]
+    if t in counts["total"]:
+        counts["total"][t] += sign
+    by_speaker = counts["by_speaker"]
+    bs = by_speaker.setdefault(who, {})
+    n = bs.get(t, 0) + sign
+    if n:
+        bs[t] = n
+    else:
+        del bs[t]
+        if not bs and who not in ("A", "B"):
+            del by_speaker[who]
+
+def _lines_back(text: str, end: int, n: int) -> int:
+    # start of the n-th non-blank line counted back from the one ending at `end`; 0 if fewer
+    while True:
+        start = text.rfind("\n", 0, end) + 1
+        if text[start:end].strip():
+            n -= 1
+            if not n:
+                return start
+        if not start:
+            return 0
+        end = start - 1
+
+class Session:
+    """One growing transcript; `append` scans only the new turns.
+
+    After every append the output equals run(segments=<all turns so far>).
+    A slot restarts where a match attempt can no longer reach the old end of
+    the text: patterns confined to one line at the previous last turn, ones
+    crossing at most B line breaks (scanner.line_budget) B non-blank lines
+    further back. Unbounded slots, such as quotes matched through [^"]+,
+    are re-matched from the start; which quotes pair up can depend on the
+    whole history. Only events from the first changed match on are rebuilt.
+    """
+
+    def __init__(self,
+                 canon_path: str = CANON_DEFAULT,
+                 promotion_path: str = PROMOTION_DEFAULT,
+                 weights_path: str = WEIGHTS_DEFAULT,
+                 catalog: Optional[CompiledCatalog] = None):
+        self.catalog = catalog or get_catalog(*_env_paths(canon_path, promotion_path, weights_path))
+        self.segments: List[Dict[str, Any]] = []
+        self.text = ""
+        self._starts: List[int] = []
+        self._cursor = 0
+        self._spans: List[List[tuple]] = [[] for _ in self.catalog.scanner.slots]
+        self._raw: List[dict] = []                    # detected events, in run() order
+        self._raw_keys: List[tuple] = []              # (start, slot, seq) per raw event
+        self._promoted: Dict[int, List[tuple]] = {}   # segment -> [(rule_idx, event)]
+        self._pre: List[dict] = []                    # raw + promoted, before activation rules
+        self._pre_starts: List[int] = []
+        self._markers: List[dict] = []
+        self._marker_starts: List[int] = []
+        self._counts = _build_counts([])
+        self._text_hash = hashlib.sha256()
+        self._seg_json: List[str] = []
+
+    def append(self, segments: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        t0 = time.time()
+        segments = list(segments)
+        if segments:
+            self._extend(segments)
+        return self._output(t0)
+
+    def _extend(self, segments: List[Dict[str, Any]]) -> None:
+        cat = self.catalog
+        slots = cat.scanner.slots
+        rescan = self._starts[-1] if self._starts else 0
+        old_end = len(self.text)
+        chunk = "\n".join(s["text"] for s in segments)
+        if self.segments:
+            chunk = "\n" + chunk
+        self.text += chunk
+        self._text_hash.update(chunk.encode("utf-8"))
+        self._seg_json.extend(json.dumps(s, ensure_ascii=False) for s in segments)
+        self.segments.extend(segments)
+        text, starts = self.text, self._starts
+        self._cursor = _locate_segments(text, segments, starts, self._cursor)
+
+        # matches ending past a slot's restart point (or starting at/after it) may change
+        first_dropped = rescan
+        redo: Dict[int, tuple] = {}
+        safe: Dict[Optional[int], int] = {None: 0, 0: rescan}
+        for idx, spans in enumerate(self._spans):
+            budget = cat.scanner.line_budget[idx]
+            if budget not in safe:
+                safe[budget] = min(rescan, _lines_back(text, old_end, budget + 1))
+            pos = safe[budget]
+            k = len(spans)
+            while k and (spans[k - 1][0] >= pos or spans[k - 1][1] > pos):
+                k -= 1
+            if k < len(spans):
+                pos = min(pos, spans[k][0])
+            if pos < rescan:
+                redo[idx] = (k, pos)
+            else:
+                del spans[k:]
+        fresh = cat.scanner.matches(text, rescan)
+        for idx, (k, pos) in redo.items():
+            # re-match from the restart point; keep what is unchanged
+            spans = self._spans[idx]
+            new = [m.span() for m in slots[idx][2].finditer(text, pos)]
+            c, n = 0, min(len(spans) - k, len(new))
+            while c < n and spans[k + c] == new[c]:
+                c += 1
+            if k + c < len(spans):
+                first_dropped = min(first_dropped, spans[k + c][0])
+                del spans[k + c:]
+            if c < len(new):
+                first_dropped = min(first_dropped, new[c][0])
+            fresh[idx] = new[c:]
+
+        # raw events: keep the untouched prefix, rebuild the tail
+        p = bisect_left(self._raw_keys, (first_dropped,))
+        tail = [(key, ev) for key, ev in zip(self._raw_keys[p:], self._raw[p:])
+                if key[2] < len(self._spans[key[1]])]
+        for idx, spans in enumerate(fresh):
+            if not spans:
+                continue
+            m, mtype, _ = slots[idx]
+            own = self._spans[idx]
+            for start, end in spans:
+                tail.append(((start, idx, len(own)), _event(text, self.segments, starts, m, mtype, start, end)))
+                own.append((start, end))
+        tail.sort(key=lambda kv: kv[0])
+        del self._raw_keys[p:], self._raw[p:]
+        self._raw_keys.extend(k for k, _ in tail)
+        self._raw.extend(ev for _, ev in tail)
+
+        # promotion: only segments at or after the first changed event
+        seg0 = _span_to_segment(first_dropped, starts)
+        cut = starts[seg0]
+        for seg in [s for s in self._promoted if s >= seg0]:
+            del self._promoted[seg]
+        q = bisect_left(self._raw_keys, (cut,))
+        for seg, atos in _atos_by_segment(self._raw[q:]).items():
+            promoted = cat.promotion.promote_segment(seg, atos)
+            if promoted:
+                self._promoted[seg] = promoted
+        new_promoted = sorted((ri, seg, ev) for seg, lst in self._promoted.items() if seg >= seg0
+                              for ri, ev in lst)
+
+        # same stable order as promote_sem's final sort
+        pre = self._raw[q:] + [ev for _, _, ev in new_promoted]
+        pre.sort(key=lambda e: e["span"]["start"])
+        r = bisect_left(self._pre_starts, cut)
+        del self._pre[r:], self._pre_starts[r:]
+        self._pre.extend(pre)
+        self._pre_starts.extend(ev["span"]["start"] for ev in pre)
+
+        # activation rules fire from seg0 on; their windows reach max_window - 1 turns back
+        rules = cat.rules
+        lo = max(0, seg0 - rules.max_window + 1)
+        warm = self._markers[bisect_left(self._marker_starts, starts[lo]):bisect_left(self._marker_starts, cut)]
+        acts = rules.fire(warm + self._pre[bisect_left(self._pre_starts, cut):], self.segments, seg0)
+
+        # final marker list: same stable order as apply_activations
+        r = bisect_left(self._marker_starts, cut)
+        for ev in self._markers[r:]:
+            _count_event(self._counts, ev, -1)
+        merged = pre + acts
+        merged.sort(key=lambda e: e["span"]["start"])
+        for ev in merged:
+            _count_event(self._counts, ev, +1)
+        del self._markers[r:], self._marker_starts[r:]
+        self._markers.extend(merged)
+        self._marker_starts.extend(ev["span"]["start"] for ev in merged)
+
+    def _output(self, t0: float) -> Dict[str, Any]:
+        cat = self.catalog
+        counts = {"total": dict(self._counts["total"]),
+                  "by_speaker": {k: dict(v) for k, v in self._counts["by_speaker"].items()}}
+        features = _features_from_counts(counts, len(self.text))
+        indices = _compute_indices(features, cat.weights)
+        h = self._text_hash.copy()
+        h.update(("[" + ", ".join(self._seg_json) + "]").encode("utf-8"))
+        out = _package_output(self.text, list(self.segments), list(self._markers), indices,
+                              cat.canon_hash, cat.engine_hash, elapsed_ms=(time.time() - t0) * 1000,
+                              counts=counts, input_hash=h.hexdigest())
+        out["promotion"] = []
+        return out
+
+# ---------- Batch analysis ----------
+class BatchItemError(Exception):
+    """Stands in for the output of a batch item that failed; the batch goes on."""
+
+    def __init__(self, index: int, error: str, message: str):
+        super().__init__(f"item {index}: {error}: {message}")
+        self.index, self.error, self.message = index, error, message
+
+    def __reduce__(self):
+        return (BatchItemError, (self.index, self.error, self.message))
+
+# (paths, catalog) of the running batch; fork-started workers inherit it
+_BATCH_CATALOG: Optional[tuple] = None
+
+def _batch_init(paths: tuple) -> None:
+    global _BATCH_CATALOG
+    if _BATCH_CATALOG is None or _BATCH_CATALOG[0] != paths:  # spawn: load in the worker
+        _BATCH_CATALOG = (paths, get_catalog(*paths))
+
+def _batch_one(job: tuple) -> Any:
+    idx, item = job
+    try:
+        t0 = time.time()
+        if isinstance(item, dict):
+            text, segments = _prepare_input(item.get("text"), item.get("segments"))
+        else:
+            text, segments = _prepare_input(item, None)
+        return _run_catalog(_BATCH_CATALOG[1], text, segments, t0)
+    except Exception as e:
+        return BatchItemError(idx, type(e).__name__, str(e))
+
+def _run_batch(paths: tuple, items: Iterable[Any], workers: Optional[int],
+               chunksize: int) -> Iterator[Any]:
+    global _BATCH_CATALOG
+    catalog = get_catalog(*paths)  # compile once, before any worker exists
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for job in enumerate(items):
+            _BATCH_CATALOG = (paths, catalog)
+            yield _batch_one(job)
+        return
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+    _BATCH_CATALOG = (paths, catalog)
+    gc.freeze()  # keep the collector from dirtying shared catalog pages in the children
+    try:
+        pool = ctx.Pool(workers, initializer=_batch_init, initargs=(paths,))
+    finally:
+        gc.unfreeze()
+    with pool:
+        yield from pool.imap(_batch_one, enumerate(items), chunksize)
+
+def run_batch(
+    items: Iterable[Any],
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    canon_path: str = CANON_DEFAULT,
+    promotion_path: str = PROMOTION_DEFAULT,
+    weights_path: str = WEIGHTS_DEFAULT,
+) -> Iterator[Any]:
+    """Analyse many inputs on a process pool, yielding outputs in input order.
 
+    Items are raw texts or {"text", "segments"} dicts. The catalog is compiled
+    once in the parent and shared with forked workers copy-on-write. A failing
+    item yields a BatchItemError in its place. workers=1 runs in-process.
+    """
+    return _run_batch(_env_paths(canon_path, promotion_path, weights_path), items, workers, chunksize)
@@ -0,0 +1,193 @@
+"""Streaming change points over per-segment marker densities.
+
+Every (level, family, speaker) series counts its hits per segment and runs
+a two-sided CUSUM against the mean of its current regime, with a Poisson
+scale sqrt(mean) and each step clipped so one burst cannot raise an alarm
+alone. An alarm dates the change to where the CUSUM run began, names the
+markers that drove it and restarts the series on the new regime.
+
+A series that sits at zero with nothing pending is left alone until its
+next hit; the skipped empty segments are folded into its mean in one
+step. Work is therefore proportional to hits plus segments of pending
+runs, and memory to the number of series (capped) plus a bounded heap of
+detections. The state serialises to JSON, so a session resumes on a
+global segment clock.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq, math
+
+STATE_VERSION = 1
+
+_S_HI, _S_LO, _START_HI, _START_LO, _MEAN, _N, _SEEN, _SUM_HI, _SUM_LO = range(9)
+
+class ChangePointDetector:
+    """k/h: CUSUM slack and threshold in scale units; clip bounds one step;
+    min_segments: history a series needs before it can alarm; min_rate
+    floors the Poisson variance of sparse series."""
+
+    def __init__(self, k: float = 0.5, h: float = 5.0, clip: float = 3.0, min_segments: int = 3,
+                 min_rate: float = 0.25, max_series: int = 512, max_points: int = 10, max_markers: int = 5):
+        self.k, self.h, self.clip = k, h, clip
+        self.min_segments, self.min_rate = min_segments, min_rate
+        self.max_series, self.max_points, self.max_markers = max_series, max_points, max_markers
+        self.t = 0                                  # next global segment
+        self.series: Dict[Tuple[str, str, str], List[float]] = {}
+        self.runs: Dict[Tuple[str, str, str], Dict[str, int]] = {}      # markers since the hi run began
+        self.regime: Dict[Tuple[str, str, str], Dict[str, int]] = {}    # markers of the current regime
+        self.pending: set = set()                   # series whose CUSUM is not idle
+        self.dropped = 0
+        self._found: List[Tuple[float, int, Dict[str, Any]]] = []       # min-heap of detections
+        self._seq = 0
+
+    # --- Zustand ---
+    def _scale(self, mean: float) -> float:
+        return math.sqrt(max(mean, self.min_rate))
+
+    def _idle(self, st: List[float]) -> bool:
+        # with S at 0 and mean/scale <= k, empty segments change nothing but the mean
+        return st[_S_HI] == 0.0 and st[_S_LO] == 0.0 and st[_MEAN] / self._scale(st[_MEAN]) <= self.k
+
+    def _series(self, key: Tuple[str, str, str], seg: int) -> Optional[List[float]]:
+        st = self.series.get(key)
+        if st is None:
+            if len(self.series) >= self.max_series:
+                self.dropped += 1; return None
+            # the series was silent before its first hit: seg empty segments of history
+            st = self.series[key] = [0.0, 0.0, seg, seg, 0.0, seg, seg, 0.0, 0.0]
+            self.runs[key] = {}; self.regime[key] = {}
+        return st
+
+    def _catch_up(self, key: Tuple[str, str, str], st: List[float], seg: int) -> None:
+        gap = seg - int(st[_SEEN])
+        if gap > 0:
+            n = st[_N]
+            st[_MEAN] = st[_MEAN] * n / (n + gap) if n + gap else 0.0
+            st[_N] = n + gap; st[_START_HI] = st[_START_LO] = seg
+            st[_SUM_HI] = st[_SUM_LO] = 0.0
+            self.runs[key].clear()
+            st[_SEEN] = seg
+
+    def _step(self, key: Tuple[str, str, str], st: List[float], seg: int, x: float,
+              markers: Dict[str, int]) -> None:
+        mean, n = st[_MEAN], st[_N]
+        if n >= self.min_segments:
+            z = max(-self.clip, min(self.clip, (x - mean) / self._scale(mean)))
+            st[_S_HI] = max(0.0, st[_S_HI] + z - self.k)
+            st[_S_LO] = max(0.0, st[_S_LO] - z - self.k)
+        run = self.runs[key]
+        if st[_S_HI] == 0.0:
+            st[_START_HI] = seg + 1; st[_SUM_HI] = 0.0; run.clear()
+        else:
+            st[_SUM_HI] += x
+            for name, c in markers.items(): run[name] = run.get(name, 0) + c
+        if st[_S_LO] == 0.0:
+            st[_START_LO] = seg + 1; st[_SUM_LO] = 0.0
+        else:
+            st[_SUM_LO] += x
+        regime = self.regime[key]
+        for name, c in markers.items(): regime[name] = regime.get(name, 0) + c
+        st[_N] = n + 1; st[_MEAN] = mean + (x - mean) / (n + 1); st[_SEEN] = seg + 1
+        if st[_S_HI] > self.h:
+            self._alarm(key, st, seg, "steigt", int(st[_START_HI]), st[_SUM_HI], run)
+        elif st[_S_LO] > self.h:
+            self._alarm(key, st, seg, "fällt", int(st[_START_LO]), st[_SUM_LO], regime)
+
+    def _alarm(self, key: Tuple[str, str, str], st: List[float], seg: int, direction: str,
+               start: int, run_sum: float, drivers: Dict[str, int]) -> None:
+        run_len = seg - start + 1
+        after = run_sum / run_len
+        n_before = st[_N] - run_len
+        before = (st[_MEAN] * st[_N] - run_sum) / n_before if n_before > 0 else 0.0
+        score = abs(after - before) / self._scale(before) * math.sqrt(run_len)
+        level, family, speaker = key
+        top = sorted(drivers.items(), key=lambda kv: (-kv[1], kv[0]))[:self.max_markers]
+        det = {"segment": start, "detected_at": seg, "direction": direction, "level": level,
+               "family": family, "speaker": speaker, "before": round(before, 4), "after": round(after, 4),
+               "score": round(score, 4), "markers": [name for name, _ in top]}
+        self._seq += 1
+        item = (score, -self._seq, det)
+        if len(self._found) < self.max_points * 8: heapq.heappush(self._found, item)
+        else: heapq.heappushpop(self._found, item)
+        # neues Regime ab start
+        st[_S_HI] = st[_S_LO] = st[_SUM_HI] = st[_SUM_LO] = 0.0
+        st[_MEAN], st[_N] = max(after, 0.0), run_len
+        st[_START_HI] = st[_START_LO] = seg + 1
+        self.regime[key] = dict(self.runs[key]) if direction == "steigt" else {}
+        self.runs[key].clear()
+
+    # --- Eingabe ---
+    def push(self, counts: Dict[Tuple[str, str, str], Tuple[float, Dict[str, int]]]) -> None:
+        """One segment: series key -> (hit count, {marker name: count})."""
+        seg = self.t
+        keys = set(self.pending)
+        for key in counts:
+            if key not in keys and self._series(key, seg) is not None: keys.add(key)
+        for key in sorted(keys):
+            st = self.series[key]
+            self._catch_up(key, st, seg)
+            x, markers = counts.get(key, (0.0, {}))
+            self._step(key, st, seg, x, markers)
+            if self._idle(st): self.pending.discard(key)
+            else: self.pending.add(key)
+        self.t = seg + 1
+
+    def feed(self, by_segment: Iterable[Dict[Tuple[str, str, str], Tuple[float, Dict[str, int]]]]) -> None:
+        for counts in by_segment: self.push(counts)
+
+    # --- Ausgabe ---
+    def points(self, since: int = 0) -> List[Dict[str, Any]]:
+        """Detections raised at segment >= since, grouped by onset segment and ranked by score."""
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for _, _, det in self._found:
+            if det["detected_at"] >= since: groups.setdefault(det["segment"], []).append(det)
+        out = []
+        for seg, dets in groups.items():
+            dets.sort(key=lambda d: (-d["score"], d["family"], d["level"], d["speaker"]))
+            lead = dets[0]
+            names: List[str] = []
+            for d in dets:
+                names.extend(m for m in d["markers"] if m not in names)
+            moves: Dict[str, List[str]] = {}
+            for d in dets:
+                fams = moves.setdefault(d["direction"], [])
+                if d["family"] not in fams: fams.append(d["family"])
+            story = "; ".join(f"{'/'.join(f[:3])} {direction}" for direction, f in moves.items())
+            out.append({"timestamp_or_seq": seg, "involved_markers": names[:self.max_markers],
+                        "micro_narrative_1liner": f"ab Segment {seg}: {story}",
+                        "direction": lead["direction"], "score": round(sum(d["score"] for d in dets), 4),
+                        "detected_at": min(d["detected_at"] for d in dets), "drivers": dets})
+        out.sort(key=lambda p: (-p["score"], p["timestamp_or_seq"]))
+        return out[:self.max_points]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": STATE_VERSION, "t": self.t, "dropped": self.dropped, "seq": self._seq,
+                "series": [[list(k), st, self.runs[k], self.regime[k]] for k, st in self.series.items()],
+                "pending": [list(k) for k in sorted(self.pending)],
+                "found": [[s, q, d] for s, q, d in self._found]}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], **kw: Any) -> "ChangePointDetector":
+        cp = cls(**kw)
+        if not data or data.get("version") != STATE_VERSION: return cp
+        cp.t, cp.dropped, cp._seq = data["t"], data["dropped"], data["seq"]
+        for k, st, run, regime in data["series"]:
+            k = tuple(k); cp.series[k] = list(st); cp.runs[k] = dict(run); cp.regime[k] = dict(regime)
+        cp.pending = {tuple(k) for k in data["pending"]}
+        cp._found = [(s, q, d) for s, q, d in data["found"]]
+        heapq.heapify(cp._found)
+        return cp
+
+def segment_counts(hits: Iterable[Any], n_segments: int) -> List[Dict[Tuple[str, str, str], Tuple[float, Dict[str, int]]]]:
+    """Per-segment series counts from MarkerHits in one pass; CLU/MEMA count in every segment they span."""
+    out: List[Dict[Tuple[str, str, str], Tuple[float, Dict[str, int]]]] = [{} for _ in range(n_segments)]
+    for h in hits:
+        meta = h.meta
+        level = meta.get("level") or "ATO"
+        key = (level, h.family, meta.get("speaker") or "*")
+        for seg in meta.get("segments") or (meta.get("segment", 0),):
+            if not 0 <= seg < n_segments: continue
+            x, markers = out[seg].get(key, (0.0, None))
+            if markers is None: markers = {}
+            markers[h.name] = markers.get(h.name, 0) + 1
+            out[seg][key] = (x + 1, markers)
+    return out
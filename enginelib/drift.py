@@ -0,0 +1,156 @@
+"""Incremental drift: EWMA state per family and axis, kept per session.
+
+Each hit updates a fast and a slow EWMA of its family's score, and of every
+axis the family contributes to (axes_map: axis -> {family: weight}). Drift
+is fast - slow: positive while recent hits run above the longer-term
+level. Updates are O(1) per hit; a session's state serialises to JSON and
+resumes where it stopped, so long analyses never replay history.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import hashlib, json, os, re, threading, time
+
+FAST_ALPHA = 0.3
+SLOW_ALPHA = 0.05
+STABLE_BAND = 0.05  # |drift| below this reads as "stabil"
+STATE_VERSION = 1
+
+def _direction(d: float) -> str:
+    return "steigt" if d > STABLE_BAND else "fällt" if d < -STABLE_BAND else "stabil"
+
+class _Ewma:
+    __slots__ = ("fast", "slow", "n", "last")
+
+    def __init__(self, fast: float = 0.0, slow: float = 0.0, n: int = 0, last: float = 0.0):
+        self.fast, self.slow, self.n, self.last = fast, slow, n, last
+
+    def update(self, v: float, fa: float, sa: float) -> None:
+        if self.n == 0:
+            self.fast = self.slow = v
+        else:
+            self.fast += fa * (v - self.fast)
+            self.slow += sa * (v - self.slow)
+        self.n += 1; self.last = v
+
+    def row(self) -> Dict[str, Any]:
+        d = self.fast - self.slow
+        return {"ewma": round(self.fast, 6), "baseline": round(self.slow, 6), "drift": round(d, 6),
+                "direction": _direction(d), "n": self.n}
+
+class DriftState:
+    """EWMA state of one session (thread-safe)."""
+
+    def __init__(self, axes_map: Optional[Dict[str, Dict[str, float]]] = None,
+                 fast_alpha: float = FAST_ALPHA, slow_alpha: float = SLOW_ALPHA):
+        self.fast_alpha, self.slow_alpha = fast_alpha, slow_alpha
+        self._lock = threading.Lock()
+        self.families: Dict[str, _Ewma] = {}
+        self.axes: Dict[str, _Ewma] = {}
+        self.series: Dict[str, _Ewma] = {}   # free-form keys (ewma())
+        self.change_points: Dict[str, Any] = {}  # ChangePointDetector.to_dict() of the session
+        self.updated_at = 0.0
+        self.set_axes(axes_map or {})
+
+    def set_axes(self, axes_map: Dict[str, Dict[str, float]]) -> None:
+        # family -> [(axis, weight)] so an update touches only its own axes
+        self._by_family: Dict[str, List[Tuple[str, float]]] = {}
+        for axis, weights in (axes_map or {}).items():
+            for fam, w in (weights or {}).items():
+                self._by_family.setdefault(fam, []).append((axis, float(w)))
+
+    def update(self, family: str, score: float, ts: Optional[float] = None) -> None:
+        fa, sa = self.fast_alpha, self.slow_alpha
+        with self._lock:
+            e = self.families.get(family)
+            if e is None: e = self.families[family] = _Ewma()
+            e.update(score, fa, sa)
+            for axis, w in self._by_family.get(family, ()):
+                a = self.axes.get(axis)
+                if a is None: a = self.axes[axis] = _Ewma()
+                a.update(w * score, fa, sa)
+            self.updated_at = time.time() if ts is None else ts
+
+    def update_many(self, hits: Iterable[Tuple[str, float]], ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        for family, score in hits: self.update(family, score, ts)
+
+    def ewma(self, key: str, v: float) -> float:
+        """Fast EWMA of a free-form series (e.g. "<family>.ewma_precision") after adding v."""
+        with self._lock:
+            e = self.series.get(key)
+            if e is None: e = self.series[key] = _Ewma()
+            e.update(v, self.fast_alpha, self.slow_alpha)
+            return e.fast
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            fams = {k: e.row() for k, e in self.families.items()}
+            axes = {k: e.row() for k, e in self.axes.items()}
+        vec = [r["drift"] for r in axes.values()] or [r["drift"] for r in fams.values()]
+        mag = sum(d * d for d in vec) ** 0.5
+        lead = max(vec, key=abs) if vec else 0.0
+        return {"magnitude": round(mag, 6), "direction": _direction(lead), "families": fams, "axes": axes,
+                "events": sum(r["n"] for r in fams.values())}
+
+    def to_dict(self) -> Dict[str, Any]:
+        dump = lambda t: {k: [e.fast, e.slow, e.n, e.last] for k, e in t.items()}  # noqa: E731
+        with self._lock:
+            return {"version": STATE_VERSION, "fast_alpha": self.fast_alpha, "slow_alpha": self.slow_alpha,
+                    "updated_at": self.updated_at, "families": dump(self.families),
+                    "axes": dump(self.axes), "series": dump(self.series),
+                    "change_points": self.change_points}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], axes_map: Optional[Dict[str, Dict[str, float]]] = None) -> "DriftState":
+        st = cls(axes_map, data.get("fast_alpha", FAST_ALPHA), data.get("slow_alpha", SLOW_ALPHA))
+        load = lambda t: {k: _Ewma(*v) for k, v in (t or {}).items()}  # noqa: E731
+        st.families, st.axes, st.series = load(data.get("families")), load(data.get("axes")), load(data.get("series"))
+        st.updated_at = data.get("updated_at", 0.0)
+        st.change_points = data.get("change_points") or {}
+        return st
+
+class DriftStore:
+    """Session id -> DriftState; with `root`, states persist as <root>/<session>.drift.json.
+
+    At most `max_sessions` states stay in memory (least recently used go
+    first); with a root they are reloaded from disk on the next `get`.
+    """
+
+    def __init__(self, root: Optional[Path] = None, axes_map: Optional[Dict[str, Dict[str, float]]] = None,
+                 max_sessions: int = 1024):
+        self.root = Path(root) if root else None
+        self.axes_map = axes_map or {}
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._states: Dict[str, DriftState] = {}
+
+    def path(self, session: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", session)[:64]
+        return Path(self.root or ".") / f"{safe}-{hashlib.sha256(session.encode('utf-8')).hexdigest()[:12]}.drift.json"
+
+    def get(self, session: str) -> DriftState:
+        with self._lock:
+            st = self._states.pop(session, None)
+            if st is None:
+                p = self.path(session) if self.root else None
+                if p is not None and p.exists():
+                    st = DriftState.from_dict(json.loads(p.read_text(encoding="utf-8")), self.axes_map)
+                else:
+                    st = DriftState(self.axes_map)
+            self._states[session] = st  # re-insert: dict order is the LRU order
+            while len(self._states) > self.max_sessions:
+                del self._states[next(iter(self._states))]
+            return st
+
+    def save(self, session: str) -> Optional[Path]:
+        with self._lock:
+            if self.root is None or session not in self._states: return None
+            self.root.mkdir(parents=True, exist_ok=True)
+            p = self.path(session); tmp = p.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._states[session].to_dict()), encoding="utf-8")
+            os.replace(tmp, p)
+        return p
+
+    def drop(self, session: str) -> None:
+        with self._lock:
+            self._states.pop(session, None)
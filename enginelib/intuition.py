@@ -0,0 +1,104 @@
+"""Intuition-CLU state machine, ported from engine_intuition.js.
+
+provisional -> confirmed once a family's streak reaches confirm_window;
+a gap of more than decay_window segments decays it (a confirmed family
+counts as retracted) and the next hit starts a new streak. Family state
+lives in flat arrays indexed by interned family ids, and events are
+walked once in (segment_idx, span.start) order, so the cost is one loop
+iteration per event. process_intuition_clu returns the same events,
+states and telemetry as processIntuitionClu.
+"""
+from array import array
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PROVISIONAL, CONFIRMED, DECAYED = 0, 1, 2
+STATES = ("provisional", "confirmed", "decayed")
+
+def _opt(opts: Dict[str, Any], key: str, default: int) -> int:
+    v = opts.get(key)
+    return max(1, default if v is None else v)  # JS: Math.max(1, opts?.key ?? default)
+
+class FamilyStates:
+    """Per-family streak state; `feed` is one step of processIntuitionClu's loop."""
+
+    def __init__(self, confirm_window: int = 2, decay_window: int = 4):
+        self.confirm_window, self.decay_window = confirm_window, decay_window
+        self.ids: Dict[str, int] = {}
+        self.families: List[str] = []
+        self.last_seg = array("q")
+        self.streak = array("q")
+        self.state = array("b")
+        self.confirmed_n = array("q")  # confirmations per family
+        self.retracted_n = array("q")
+        self.confirmed = self.retracted = 0
+
+    def intern(self, family: str) -> int:
+        fid = self.ids.get(family)
+        if fid is None:
+            fid = self.ids[family] = len(self.families)
+            self.families.append(family)
+            for col in (self.last_seg, self.streak, self.state, self.confirmed_n, self.retracted_n):
+                col.append(0)
+        return fid
+
+    def feed(self, fid: int, seg: int) -> int:
+        last_seg, streak, state = self.last_seg, self.streak, self.state
+        if streak[fid] == 0:  # first hit of the family (streaks never drop below 1 afterwards)
+            last_seg[fid] = seg
+        st = state[fid]
+        if seg - last_seg[fid] > self.decay_window:
+            if st == CONFIRMED:
+                self.retracted += 1; self.retracted_n[fid] += 1
+            st = DECAYED; streak[fid] = 0
+        streak[fid] = 1 if st == DECAYED else streak[fid] + 1
+        last_seg[fid] = seg
+        if st != CONFIRMED and streak[fid] >= self.confirm_window:
+            st = CONFIRMED; self.confirmed += 1; self.confirmed_n[fid] += 1
+        elif st == DECAYED:
+            st = PROVISIONAL
+        state[fid] = st
+        return st
+
+    def telemetry(self) -> Dict[str, Any]:
+        c, r = self.confirmed, self.retracted
+        return {"confirmed": c, "retracted": r, "ewma_precision": c / (c + r + 1)}
+
+def run_states(items: Sequence[Tuple[int, int, str]], confirm_window: int = 2,
+               decay_window: int = 4) -> Tuple[List[int], "FamilyStates"]:
+    """items: (segment_idx, span start, family) per event -> (state per item, FamilyStates).
+
+    Items are visited in (segment_idx, start) order (stable, as Array.sort);
+    the returned states are in item order.
+    """
+    fs = FamilyStates(confirm_window, decay_window)
+    out = [PROVISIONAL] * len(items)
+    intern, feed = fs.intern, fs.feed
+    for k in sorted(range(len(items)), key=lambda k: (items[k][0], items[k][1])):
+        seg, _, fam = items[k]
+        out[k] = feed(intern(fam), seg)
+    return out, fs
+
+def process_intuition_clu(events: List[dict], opts: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """processIntuitionClu(events, opts): annotated events in traversal order plus telemetry."""
+    opts = opts or {}
+    fs = FamilyStates(_opt(opts, "confirm_window", 2), _opt(opts, "decay_window", 4))
+    family_map = opts.get("family_map") or {}
+    evs = sorted(events, key=lambda e: (e.get("segment_idx"), (e.get("span") or {}).get("start") or 0))
+    augmented = []
+    for ev in evs:
+        fam = family_map.get(ev.get("id"))
+        if not fam:
+            augmented.append(ev)
+            continue
+        st = fs.feed(fs.intern(fam), ev["segment_idx"])
+        augmented.append({**ev, "meta": {**(ev.get("meta") or {}), "intuition_state": STATES[st],
+                                         "intuition_family": fam}})
+    return {"events": augmented, "telemetry": fs.telemetry()}
+
+def apply_family_multiplier(indices: Dict[str, Dict[str, Any]], state: str, multiplier: Any) -> Dict[str, Any]:
+    """applyFamilyMultiplier: scale `raw` only while confirmed."""
+    if state != "confirmed":
+        return indices
+    m = multiplier if isinstance(multiplier, (int, float)) and math.isfinite(multiplier) else 1.0
+    return {k: {**v, "raw": v["raw"] * m} for k, v in indices.items()}
@@ -1,7 +1,16 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from pathlib import Path
-import importlib.util, yaml, time, json, hashlib
+import importlib.util, yaml, time, json, hashlib, threading, multiprocessing, os, queue, re, math, signal
+from collections import deque
+from .changepoints import ChangePointDetector, segment_counts
+from .drift import DriftState, DriftStore
+from .intuition import CONFIRMED, STATES, run_states
+try:
+    import numpy as _np  # optional: vectorized heatmap histograms
+except ImportError:  # pragma: no cover
+    _np = None
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 # --- Selftest und Gates ---
 REQUIRED = [
@@ -41,12 +50,366 @@ class AnalysisResult:
     drift: Dict[str, Any]
     telemetry: Dict[str, Any]
 
+# --- Telemetrie-Aggregation ---
+class TelemetryAggregator:
+    """Process-wide request statistics in constant memory.
+
+    `record` folds one finished analyse() into counters and fixed-size ring
+    buffers (the last `window` values per series, plus recent request
+    summaries) under a lock; keys beyond `max_keys` are counted as
+    "_other". `snapshot` copies the counters and summarises each series
+    (n, mean, p50, p95, last) without holding the lock while sorting.
+    """
+    def __init__(self, window: int = 256, max_keys: int = 512):
+        self.window = window; self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters: Dict[str, int] = {}
+            self.series: Dict[str, deque] = {}
+            self.recent: deque = deque(maxlen=self.window)
+
+    def _key(self, table: Dict[str, Any], key: str) -> str:
+        return key if key in table or len(table) < self.max_keys else "_other"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            key = self._key(self.counters, key)
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, key: str, value: float) -> None:
+        with self._lock:
+            self._observe(key, value)
+
+    def _observe(self, key: str, value: float) -> None:
+        key = self._key(self.series, key)
+        buf = self.series.get(key)
+        if buf is None: buf = self.series[key] = deque(maxlen=self.window)
+        buf.append(value)
+
+    def record(self, status: str, elapsed_ms: float, counts: Dict[str, int], telemetry: Dict[str, Any]) -> None:
+        stages = (telemetry.get("_profile") or {}).get("stages") or {}
+        families = [k[:-len(".counter_confirmed")] for k in telemetry if k.endswith(".counter_confirmed")]
+        errors = len(telemetry.get("_detect_errors") or [])
+        with self._lock:
+            c = self.counters
+            for key, n in [("requests", 1), (f"status.{status}", 1), ("detect_errors", errors)] + \
+                          [(f"hits.{k}", v) for k, v in counts.items()] + \
+                          [(f"family.{f}", telemetry[f"{f}.counter_confirmed"]) for f in families]:
+                key = self._key(c, key); c[key] = c.get(key, 0) + n
+            self._observe("elapsed_ms", elapsed_ms)
+            for k, v in counts.items(): self._observe(f"hits.{k}", v)
+            for k, v in stages.items(): self._observe(f"stage.{k}", v)
+            self.recent.append({"ts": time.time(), "status": status, "elapsed_ms": round(elapsed_ms, 3), **counts})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            series = {k: list(v) for k, v in self.series.items()}
+            recent = list(self.recent)
+        out = {}
+        for k, vals in series.items():
+            if not vals: continue
+            srt = sorted(vals)
+            out[k] = {"n": len(vals), "mean": round(sum(vals) / len(vals), 4), "p50": srt[len(srt) // 2],
+                      "p95": srt[min(len(srt) - 1, int(len(srt) * 0.95))], "last": vals[-1]}
+        return {"counters": counters, "series": out, "recent": recent}
+
+TELEMETRY = TelemetryAggregator()
+
+# --- Heatmap ---
+HEATMAP_RESOLUTIONS = (250, 500, 2000)
+HEAT_TYPES = ("ATO", "SEM", "CLU", "MEMA")
+
+def _hit_level(h: "MarkerHit") -> str:
+    lvl = h.meta.get("level")
+    if lvl: return lvl
+    for t in ("SEM", "CLU", "MEMA"):
+        if h.name.startswith(t + "_"): return t
+    return "ATO"
+
+def heatmap_pyramid(text_len: int, hits: Iterable["MarkerHit"],
+                    resolutions: Iterable[int] = HEATMAP_RESOLUTIONS) -> Dict[int, List[Dict[str, Any]]]:
+    """Hit density per level at several bucket sizes, {size: [{start, end, dens}]}.
+
+    A hit counts in the bucket holding the start of meta["span_global"]
+    (composed hits carry the range of their parts); hits without a global
+    span are left out. One histogram at the gcd of the sizes is summed
+    into every coarser level, so all sizes share one pass over the hits.
+    """
+    resolutions = sorted(set(int(r) for r in resolutions))
+    base = math.gcd(*resolutions); n = max(1, -(-text_len // base))
+    pos: Dict[str, List[int]] = {t: [] for t in HEAT_TYPES}
+    for h in hits:
+        g = h.meta.get("span_global")
+        if g is None: continue
+        pos.setdefault(_hit_level(h), []).append(min(n - 1, max(0, int(g[0]) // base)))
+    fine: Dict[str, List[int]] = {}
+    for t, ps in pos.items():
+        if _np is not None:
+            fine[t] = _np.bincount(_np.asarray(ps, dtype=_np.int64), minlength=n).tolist()
+        else:
+            row = [0] * n
+            for b in ps: row[b] += 1
+            fine[t] = row
+    out = {}
+    for r in resolutions:
+        k = r // base; m = -(-n // k)
+        if _np is not None and k > 1:
+            pooled = {t: _np.add.reduceat(_np.asarray(row), _np.arange(0, n, k)).tolist() for t, row in fine.items()}
+        else:
+            pooled = {t: [sum(row[i * k:(i + 1) * k]) for i in range(m)] if k > 1 else row for t, row in fine.items()}
+        out[r] = [{"start": i * r, "end": min((i + 1) * r, text_len), "dens": {t: pooled[t][i] for t in pooled}}
+                  for i in range(m)]
+    return out
+
+# --- Scoring-Matrix ---
+NEEDS_COLUMNS = {  # _needs_attachment: Spalten über UNCERTAINTY (u) und SUPPORT (s)
+    "unsaid_need_index": {"UNCERTAINTY": 1.0, "SUPPORT": -0.3},
+    "seek": {"SUPPORT": 1.0},
+    "avoid": {"UNCERTAINTY": 1.0},
+}
+
+class ScoringMatrix:
+    """Family x output weights, compiled once from scorings, axes_map and lenses_map.
+
+    Every output (index, axis, lens, needs column) is a sparse column of
+    (family, weight) pairs. `apply` folds the hits into family sums in a
+    single pass and evaluates all outputs from those sums, so the cost per
+    hit does not grow with the number of scorings, axes or lenses. Indices
+    skip CAND_* hits, as before; the other outputs count every hit.
+    """
+    def __init__(self, scorings: Dict, axes_map: Dict, lenses_map: Dict):
+        col = lambda weights: [(f, float(w)) for f, w in (weights or {}).items()]  # noqa: E731
+        self.indices = [(k, col((spec or {}).get("families"))) for k, spec in (scorings or {}).items()]
+        self.axes = [(k, col(w)) for k, w in (axes_map or {}).items()]
+        self.needs = [(k, col(w)) for k, w in NEEDS_COLUMNS.items()]
+        self.lenses_of: Dict[str, List[str]] = {f: list(ls or []) for f, ls in (lenses_map or {}).items()}
+
+    @staticmethod
+    def _norm(x: float, lo: float = -1.0, hi: float = 1.0) -> float:
+        return max(lo, min(hi, x))
+
+    @staticmethod
+    def family_sums(hits: Iterable["MarkerHit"]) -> Tuple[Dict[str, float], Dict[str, float]]:
+        total: Dict[str, float] = {}; core: Dict[str, float] = {}
+        for h in hits:
+            fam = h.family
+            total[fam] = total.get(fam, 0.0) + h.score
+            if not h.name.startswith("CAND_"): core[fam] = core.get(fam, 0.0) + h.score
+        return total, core
+
+    def lenses(self, total: Dict[str, float]) -> List[Dict[str, Any]]:
+        lens_score: Dict[str, float] = {}
+        for fam, v in total.items():
+            for ln in self.lenses_of.get(fam, ()):
+                lens_score[ln] = lens_score.get(ln, 0.0) + v
+        return [{"lens": k, "score": v} for k, v in sorted(lens_score.items(), key=lambda x: -x[1])]
+
+    def apply(self, hits: Iterable["MarkerHit"]) -> Dict[str, Any]:
+        total, core = self.family_sums(hits)
+        norm = self._norm
+        indices, contrib = {}, {}
+        for idx, weights in self.indices:
+            s = 0.0; parts = []
+            for fam, w in weights:
+                v = core.get(fam, 0.0) * w; s += v
+                if v != 0: parts.append({"family": fam, "weighted": v})
+            indices[idx] = norm(s)
+            contrib[idx] = sorted(parts, key=lambda x: -abs(x["weighted"]))[:5]
+        axes = {a: norm(sum(total.get(f, 0.0) * w for f, w in weights)) for a, weights in self.axes}
+        # naive Trend: sign der Summe
+        trend = {a: ("steigt" if v > 0.2 else "fällt" if v < -0.2 else "stabil") for a, v in axes.items()}
+        need = {k: norm(sum(total.get(f, 0.0) * w for f, w in weights)) for k, weights in self.needs}
+        return {"indices": indices, "contributors": contrib, "axes": axes, "trend": trend,
+                "lenses": self.lenses(total),
+                "needs": {"unsaid_need_index": need["unsaid_need_index"],
+                          "attachment_vector": {"seek": need["seek"], "avoid": need["avoid"]}}}
+
+# --- Segmentierung ---
+_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+# Sprecher wie in engine_py.segment_dialog: "A:", "B:", "Person A:" (Groß/klein egal);
+# andere "Label:"-Zeilen ("Note: ...") sind Text im laufenden Turn
+_TURN = re.compile(r"[ \t]*(?:person[ \t]+)?([ab])[ \t]*:", re.I)
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+_SPACE = re.compile(r"\s+")
+
+@dataclass
+class Chunk:
+    text: str
+    start: int                    # global offset of text[0]
+    overlap: int = 0              # leading chars repeated from the previous chunk
+    turns: List[Tuple[int, Optional[str]]] = field(default_factory=list)  # (local offset, speaker)
+
+    def speaker_at(self, pos: int) -> Optional[str]:
+        who = None
+        for off, sp in self.turns:
+            if off > pos: break
+            who = sp
+        return who
+
+def _lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    if isinstance(source, str):
+        for m in _LINE.finditer(source): yield m.group()
+        return
+    buf = ""
+    for piece in source:
+        buf += piece
+        if "\n" in buf:
+            *lines, buf = buf.split("\n")
+            for line in lines: yield line + "\n"
+    if buf: yield buf
+
+def _pieces(line: str, limit: int) -> Iterator[str]:
+    # overlong line: cut after the last sentence end, else the last whitespace, else hard
+    while len(line) > limit:
+        cut = 0
+        for m in _SENTENCE_END.finditer(line, 0, limit): cut = m.end()
+        if not cut:
+            for m in _SPACE.finditer(line, 0, limit): cut = m.end()
+        cut = cut or limit
+        yield line[:cut]; line = line[cut:]
+    if line: yield line
+
+def _carry(text: str, overlap: int) -> str:
+    # tail of a chunk repeated at the start of the next one, starting on a word
+    if overlap <= 0: return ""
+    tail = text[-overlap:]
+    if len(tail) == len(text): return ""
+    m = _SPACE.search(tail)
+    return tail[m.end():] if m else ""
+
+def iter_chunks(source: Union[str, Iterable[str]], size: int = 1400, overlap: int = 80) -> Iterator[Chunk]:
+    """Lazily split a dialog into chunks of at most `size` chars.
+
+    Cuts fall between lines ("A: ..." turns) where possible, then after
+    sentence ends, then on whitespace. Each chunk after the first starts
+    with up to `overlap` chars of the previous one (word-aligned), so a
+    short match across a cut is found whole in the next chunk; longer ones
+    show up clipped in both, and callers merge hits whose global spans
+    overlap. `source` may be a string or any iterable of text pieces
+    (e.g. a file); only the current chunk is buffered.
+    """
+    overlap = max(0, min(overlap, size // 2))
+    buf: List[str] = []; buf_len = 0; start = 0; carry = 0
+    turns: List[Tuple[int, Optional[str]]] = [(0, None)]; speaker = None; emitted = False
+    for line in _lines(source):
+        m = _TURN.match(line)
+        if m: speaker = m.group(1).upper()
+        first = True
+        for piece in _pieces(line, size - overlap):
+            if buf_len + len(piece) > size and buf_len > carry:
+                chunk = Chunk("".join(buf), start, carry, turns)
+                yield chunk; emitted = True
+                tail = _carry(chunk.text, overlap)
+                start += len(chunk.text) - len(tail)
+                buf = [tail]; buf_len = carry = len(tail)
+                cut = len(chunk.text) - len(tail)
+                turns = [(0, chunk.speaker_at(cut))] + [(off - cut, sp) for off, sp in chunk.turns if off > cut]
+            if first and m: turns.append((buf_len, speaker))
+            buf.append(piece); buf_len += len(piece); first = False
+    if buf_len > carry or not emitted:
+        yield Chunk("".join(buf), start, carry, turns)
+
+# --- Plugin-Registry ---
+class PluginRegistry:
+    """Load-once cache of plugins/detect_*.py.
+
+    `detectors()` stats the directory once per call and re-executes a module
+    only when its file changed: an mtime/size change triggers a SHA-256 check,
+    and only a different hash reloads. `last` describes the latest refresh
+    (plugins, loaded, load_ms) for telemetry.
+    """
+    def __init__(self, plugins_dir: Path):
+        self.plugins_dir = Path(plugins_dir)
+        self._lock = threading.Lock()
+        self._entries: Dict[Path, Dict[str, Any]] = {}
+        self._detectors: List[Tuple[str, Any]] = []
+        self.sources: List[Tuple[str, str, str]] = []  # (name, path, sha), aligned with detectors()
+        self.loads = 0
+        self.last: Dict[str, Any] = {"plugins": 0, "loaded": 0, "load_ms": 0.0}
+
+    @staticmethod
+    def _load(p: Path):
+        spec = importlib.util.spec_from_file_location(p.stem, p)
+        mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)  # type: ignore
+        return mod
+
+    def detectors(self) -> List[Tuple[str, Any]]:
+        """[(module name, detect)] in file-name order."""
+        with self._lock:
+            t0 = time.perf_counter(); loaded = 0; changed = False
+            paths = sorted(self.plugins_dir.glob("detect_*.py"))
+            if set(paths) != set(self._entries): changed = True
+            entries = {}
+            for p in paths:
+                st = p.stat(); e = self._entries.get(p)
+                if e is None or (e["mtime"], e["size"]) != (st.st_mtime_ns, st.st_size):
+                    data = p.read_bytes(); sha = hashlib.sha256(data).hexdigest()
+                    if e is None or e["sha"] != sha:
+                        mod = self._load(p); loaded += 1; changed = True
+                        e = {"mod": mod, "detect": getattr(mod, "detect", None), "sha": sha}
+                    e = dict(e, mtime=st.st_mtime_ns, size=st.st_size)
+                entries[p] = e
+            self._entries = entries
+            if changed:
+                live = [(p, e) for p, e in entries.items() if e["detect"] is not None]
+                self._detectors = [(e["mod"].__name__, e["detect"]) for _, e in live]
+                self.sources = [(e["mod"].__name__, str(p), e["sha"]) for p, e in live]
+            self.loads += loaded
+            self.last = {"plugins": len(self._detectors), "loaded": loaded,
+                         "load_ms": round((time.perf_counter() - t0) * 1000, 3)}
+            return self._detectors
+
+# Prozess-Worker laden Plugins selbst (Module sind nicht picklebar): path -> (sha, detect)
+_WORKER_DETECT: Dict[str, Tuple[str, Any]] = {}
+
+def _worker_started(pids) -> None:
+    # meldet die PID, damit ein hängender Worker beendet werden kann
+    pids.put(os.getpid())
+
+def _detect_in_worker(path: str, sha: str, seg: str):
+    cached = _WORKER_DETECT.get(path)
+    if cached is None or cached[0] != sha:
+        cached = _WORKER_DETECT[path] = (sha, PluginRegistry._load(Path(path)).detect)
+    return list(cached[1](seg) or [])
+
+def _detect_call(detect, seg: str):
+    return list(detect(seg) or [])
+
 class EngineRuntime:
-    def __init__(self, root: Path):
+    """Analyse-Pipeline über plugins/detect_*.py.
+
+    detect_executor: "serial" (default), "thread" or "process"; detect_workers
+    sizes the pool. plugin_timeout_s (seconds, or {plugin name: seconds})
+    bounds each (segment, plugin) call from its submission; only as many calls
+    as the pool has workers are in flight, so none waits in a queue. A thread
+    cannot be stopped, so with a timeout set detection always runs in worker
+    processes ("serial" on a single one). A timeout is recorded in
+    telemetry["_detect_errors"], the plugin is skipped for the rest of the
+    request, the pool's workers are terminated and the remaining work moves
+    to a fresh pool.
+    """
+    def __init__(self, root: Path, detect_executor: str = "serial", detect_workers: Optional[int] = None,
+                 plugin_timeout_s: Any = None, aggregator: Optional[TelemetryAggregator] = None,
+                 drift_dir: Optional[Path] = None):
         self.root = Path(root)
         self.plugins_dir = self.root / "plugins"
         self.resources = self.root / "resources"
-        self.telemetry: Dict[str,Any] = {}
+        self.aggregator = aggregator if aggregator is not None else TELEMETRY
+        self._local = threading.local()
+        self._last_telemetry: Dict[str,Any] = {}
+        self._registry: Optional[PluginRegistry] = None
+        if detect_executor not in ("serial", "thread", "process"):
+            raise ValueError(f"detect_executor must be serial, thread or process, not {detect_executor!r}")
+        self.detect_executor = detect_executor
+        self.detect_workers = detect_workers
+        self.plugin_timeout_s = plugin_timeout_s
+        self._pool: Any = None
+        self._pool_width = 1
+        self._worker_pids: Any = None
         # Weights/Promotion laden
         cfg_dir = self.root/"resources/config"
         self.cfg = {
@@ -62,17 +425,23 @@ class EngineRuntime:
             "lenses_map": self._safe_yaml(self.root/"resources/mappings/lenses_map.yaml") or {},
         })
         
-        # Drift-Adapter optional
-        try:
-            from extensions.drift.ewma_adapter import ewma_update
-            self.ewma_update = ewma_update
-        except Exception:
-            self.ewma_update = lambda key,v: v
-        try:
-            from extensions.drift.drift_metrics_adapter import calc_drift_metrics
-            self.calc_drift_metrics = calc_drift_metrics
-        except Exception:
-            self.calc_drift_metrics = lambda vectors: {}
+        # Indizes/Achsen/Linsen/Needs: einmal kompiliert, ein Durchlauf je Analyse
+        self.scoring = ScoringMatrix(self.cfg["scorings"], self.cfg["axes_map"], self.cfg["lenses_map"])
+        # Drift: inkrementeller EWMA-Zustand je Session (mit drift_dir auf Platte)
+        self.drift = DriftStore(drift_dir, self.cfg["axes_map"])
+
+    @property
+    def telemetry(self) -> Dict[str, Any]:
+        # pro Aufruf: innerhalb von analyse() das Dict des laufenden Requests (thread-lokal),
+        # sonst eine Kopie des zuletzt beendeten
+        tel = getattr(self._local, "telemetry", None)
+        return tel if tel is not None else dict(self._last_telemetry)
+
+    @property
+    def _tel(self) -> Dict[str, Any]:
+        # Schreibziel der Stufen: das Request-Dict, außerhalb von analyse() das zuletzt veröffentlichte
+        tel = getattr(self._local, "telemetry", None)
+        return tel if tel is not None else self._last_telemetry
 
     def _safe_yaml(self, p: Path):
         try:
@@ -80,27 +449,177 @@ class EngineRuntime:
         except Exception: pass
         return None
 
-    # Segmentierung
+    # Segmentierung (Turn-/Satzgrenzen, kleine Überlappung; schema: chunk_size, chunk_overlap)
+    def iter_segments(self, text: Union[str, Iterable[str]], schema: Dict) -> Iterator[Chunk]:
+        return iter_chunks(text, int(schema.get("chunk_size", 1400)), int(schema.get("chunk_overlap", 80)))
+
     def segment(self, text: str, schema: Dict) -> List[str]:
-        size = int(schema.get("chunk_size", 1400))
-        return [text[i:i+size] for i in range(0, len(text), size)] or [text]
-
-    # Plugins
-    def _plugins(self):
-        mods = []
-        for p in sorted(self.plugins_dir.glob("detect_*.py")):
-            spec = importlib.util.spec_from_file_location(p.stem, p)
-            mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)  # type: ignore
-            if hasattr(mod, "detect"): mods.append(mod)
-        return mods
-
-    # Detect ATO
-    def detect_markers(self, segments: List[str]) -> List[MarkerHit]:
+        return [c.text for c in self.iter_segments(text, schema)]
+
+    @staticmethod
+    def _attach_chunks(hits: List[MarkerHit], chunks: List[Chunk]) -> List[MarkerHit]:
+        # global span + speaker per hit. Overlapping chunks see a match at the cut twice, either
+        # copy possibly clipped by a chunk edge: same-name hits from different chunks whose global
+        # spans overlap are kept once, the longest (ties: the earlier chunk) over their union
+        keep=[True]*len(hits); last: Dict[str, int]={}
+        def order(i):
+            h=hits[i]; return (h.meta["span_global"][0], -h.meta["span_global"][1], h.meta["segment"])
+        spanned=[]
+        for i,h in enumerate(hits):
+            c=chunks[h.meta["segment"]]
+            if isinstance(h.span,(tuple,list)) and len(h.span)==2:
+                h.meta["span_global"]=(c.start+h.span[0], c.start+h.span[1])
+                h.meta.setdefault("speaker", c.speaker_at(h.span[0]))
+                spanned.append(i)
+        for i in sorted(spanned, key=order):
+            h=hits[i]; j=last.get(h.name)
+            if j is not None:
+                k=hits[j]; (a0,a1),(b0,b1)=k.meta["span_global"],h.meta["span_global"]
+                if k.meta["segment"]!=h.meta["segment"] and (b0<a1 or (a0,a1)==(b0,b1)):
+                    if (b1-b0, -h.meta["segment"]) > (a1-a0, -k.meta["segment"]):
+                        keep[j]=False; last[h.name]=i; k=h
+                    else:
+                        keep[i]=False
+                    k.meta["span_global"]=(a0, max(a1,b1))
+                    continue
+            last[h.name]=i
+        return [h for h,k in zip(hits,keep) if k]
+
+    # Plugins (einmal geladen, Reload nur bei geänderter Datei)
+    def _plugins(self) -> List[Tuple[str, Any]]:
+        if self._registry is None or self._registry.plugins_dir != Path(self.plugins_dir):
+            self._registry = PluginRegistry(self.plugins_dir)
+        detectors = self._registry.detectors()
+        self._tel["_plugin_load"] = dict(self._registry.last)
+        return detectors
+
+    # Detect ATO (segments: Texte oder Chunks aus iter_segments)
+    def detect_markers(self, segments: List[Any]) -> List[MarkerHit]:
+        chunks=segments if segments and isinstance(segments[0], Chunk) else None
+        if chunks: segments=[c.text for c in chunks]
+        detectors=self._plugins()
+        if self.detect_executor != "serial" or self.plugin_timeout_s is not None:
+            hits=self._detect_pooled(segments, detectors)
+        else:
+            hits=[]
+            for i, seg in enumerate(segments):
+                for _, detect in detectors:
+                    for h in detect(seg) or []:
+                        h.meta["segment"]=i; hits.append(h)
+        return self._attach_chunks(hits, chunks) if chunks else hits
+
+    def _in_processes(self) -> bool:
+        return self.detect_executor == "process" or self.plugin_timeout_s is not None
+
+    def _executor(self):
+        if self._pool is None:
+            if self._in_processes():
+                methods = multiprocessing.get_all_start_methods()
+                ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+                self._pool_width = 1 if self.detect_executor == "serial" else (
+                    self.detect_workers or os.cpu_count() or 1)
+                self._worker_pids = ctx.Queue()
+                self._pool = ProcessPoolExecutor(self._pool_width, mp_context=ctx, initializer=_worker_started,
+                                                 initargs=(self._worker_pids,))
+            else:
+                # ThreadPoolExecutor's own default size
+                self._pool_width = 1 if self.detect_executor == "serial" else (
+                    self.detect_workers or min(32, (os.cpu_count() or 1) + 4))
+                self._pool = ThreadPoolExecutor(self._pool_width, thread_name_prefix="detect")
+        return self._pool
+
+    def _discard_pool(self) -> None:
+        # a worker is stuck in a plugin: drop the pool and terminate its workers,
+        # the remaining work goes to a new one
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            while self._worker_pids is not None:
+                try: pid = self._worker_pids.get(timeout=0.1)
+                except queue.Empty: break
+                try: os.kill(pid, signal.SIGTERM)
+                except OSError: pass  # schon beendet
+            self._pool = self._worker_pids = None
+
+    def close(self) -> None:
+        # Prozess-Worker werden beendet, auch wenn ein Plugin noch hängt
+        if self._worker_pids is not None:
+            self._discard_pool()
+        elif self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _timeout(self, name: str) -> Optional[float]:
+        t = self.plugin_timeout_s
+        if isinstance(t, dict): t = t.get(name, t.get("default"))
+        return None if t is None else float(t)
+
+    def _detect_pooled(self, segments: List[str], detectors) -> List[MarkerHit]:
+        # (segment, plugin) work items on the pool; results are merged by key, so
+        # the hit order is the serial one: segment, plugin file order, plugin output order
+        sources = self._registry.sources if self._registry is not None else []
+        errors: List[Dict[str, Any]] = []; results: Dict[Tuple[int,int], list] = {}; dead: Dict[int, int] = {}
+        todo = deque((i, k) for i in range(len(segments)) for k in range(len(detectors)))
+        while todo:
+            pool = self._executor(); running: Dict[Any, Tuple[Tuple[int,int], Optional[float]]] = {}
+            while todo or running:
+                # keep one call per worker in flight; its deadline runs from submission
+                while todo and len(running) < self._pool_width:
+                    key = todo.popleft()
+                    if key[1] in dead: continue
+                    if self._in_processes():
+                        fut = pool.submit(_detect_in_worker, sources[key[1]][1], sources[key[1]][2], segments[key[0]])
+                    else:
+                        fut = pool.submit(_detect_call, detectors[key[1]][1], segments[key[0]])
+                    timeout = self._timeout(detectors[key[1]][0])
+                    running[fut] = (key, None if timeout is None else time.monotonic() + timeout)
+                if not running: break
+                deadlines = [d for _, d in running.values() if d is not None]
+                done, _ = wait(running, timeout=max(0.0, min(deadlines) - time.monotonic()) if deadlines else None,
+                               return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[running.pop(fut)[0]] = fut.result()
+                now = time.monotonic()
+                late = [(fut, key) for fut, (key, d) in running.items() if d is not None and d <= now and not fut.done()]
+                if not late: continue
+                for fut, key in late:
+                    name = detectors[key[1]][0]
+                    errors.append({"plugin": name, "segment": key[0], "error": f"timeout after {self._timeout(name)}s"})
+                    dead[key[1]] = min(key[0], dead.get(key[1], key[0])); del running[fut]
+                for fut, (key, _) in running.items():
+                    if key[1] in dead: fut.cancel()
+                    elif fut.done() and not fut.cancelled(): results[key] = fut.result()
+                    else: fut.cancel(); todo.appendleft(key)
+                self._discard_pool()
+                break
+        self._tel["_detect_errors"] = errors
         hits=[]
+        for key in sorted(results):
+            if key[0] > dead.get(key[1], key[0]): continue  # nach dem Timeout übersprungen, auch wenn schon fertig
+            for h in results[key]:
+                h.meta["segment"]=key[0]; hits.append(h)
+        return hits
+
+    def _detect_profiled(self, segments: List[Any], prof: Dict[str, Any]) -> List[MarkerHit]:
+        # detect_markers plus plugin load time, wall time/hits per plugin and hits per marker
+        chunks=segments if segments and isinstance(segments[0], Chunk) else None
+        if chunks: segments=[c.text for c in chunks]
+        hits=[]; plugins: Dict[str, Dict[str, Any]]={}; markers: Dict[str, Dict[str, Any]]={}
+        clock=time.perf_counter
+        t0=clock(); detectors=self._plugins()
+        prof["stages"]["plugin_load_ms"]=round((clock()-t0)*1000, 3)
         for i, seg in enumerate(segments):
-            for mod in self._plugins():
-                for h in mod.detect(seg) or []:
+            for name, detect in detectors:
+                t0=clock(); out=detect(seg) or []; ms=(clock()-t0)*1000
+                row=plugins.setdefault(name, {"key":name,"ms":0.0,"segments":0,"hits":0})
+                row["ms"]+=ms; row["segments"]+=1; row["hits"]+=len(out)
+                for h in out:
                     h.meta["segment"]=i; hits.append(h)
+        if chunks: hits=self._attach_chunks(hits, chunks)
+        for h in hits:
+            markers.setdefault(h.name, {"key":h.name,"family":h.family,"matches":0})["matches"]+=1
+        for row in plugins.values(): row["ms"]=round(row["ms"],4)
+        prof["plugins"]=sorted(plugins.values(), key=lambda r: r["ms"], reverse=True)
+        prof["markers"]=sorted(markers.values(), key=lambda r: r["matches"], reverse=True)
         return hits
 
     # SEM (≥2 ATO je Familie)
@@ -108,11 +627,14 @@ class EngineRuntime:
         sem, buckets = [], {}
         for h in hits_ato: buckets.setdefault((h.family, h.meta.get("segment",0)), []).append(h)
         fam_w = (self.cfg["weights"] or {}).get("families", {})
-        for (fam,_), hs in buckets.items():
+        for (fam,seg), hs in buckets.items():
             if len(hs) >= window:
                 s = sum(x.score for x in hs)/len(hs)
                 s *= float(fam_w.get(fam, 1.0))
-                sem.append(MarkerHit(name=f"SEM_{fam}_EVIDENCE", family=fam, span=(0,0), score=min(1.0,s)))
+                meta = {"level": "SEM", "segment": seg}
+                spans = [x.meta["span_global"] for x in hs if "span_global" in x.meta]
+                if spans: meta["span_global"] = (min(a for a,_ in spans), max(b for _,b in spans))
+                sem.append(MarkerHit(name=f"SEM_{fam}_EVIDENCE", family=fam, span=(0,0), score=min(1.0,s), meta=meta))
         return sem
 
     # CLU (X-of-Y)
@@ -124,31 +646,54 @@ class EngineRuntime:
             if len(hs) >= x:
                 score=min(1.0, len(hs)/max(1,y)) * float(fam_w.get(fam,1.0))
                 name = self.cfg["promotion"].get(fam, {}).get("clu_name", f"CLU_{fam}")
-                clu.append(MarkerHit(name=name, family=fam, span=(0,0), score=score))
+                segs = sorted({x.meta["segment"] for x in hs if "segment" in x.meta})
+                meta = {"level": "CLU", "segment": segs[0] if segs else 0, "segments": segs}
+                spans = [x.meta["span_global"] for x in hs if "span_global" in x.meta]
+                if spans: meta["span_global"] = (min(a for a,_ in spans), max(b for _,b in spans))
+                clu.append(MarkerHit(name=name, family=fam, span=(0,0), score=score, meta=meta))
         return clu
 
     # MEMA
     def mema(self, clu_hits: List[MarkerHit]) -> List[MarkerHit]:
-        return [MarkerHit(name=f"MEMA_{h.family}", family=h.family, span=h.span, score=h.score, meta=h.meta) for h in clu_hits]
+        return [MarkerHit(name=f"MEMA_{h.family}", family=h.family, span=h.span, score=h.score, meta=dict(h.meta, level="MEMA")) for h in clu_hits]
 
     # Intuition/Telemetry
-    def intuition(self, hits: List[MarkerHit], profile: Dict) -> List[MarkerHit]:
-        cw = int(profile.get("intuition", {}).get("confirm_window", 6))
-        mult = float(profile.get("intuition", {}).get("multiplier_on_confirm", 1.25))
-        now = time.time(); out=[]
+    def intuition(self, hits: List[MarkerHit], profile: Dict, drift: Optional[DriftState] = None,
+                  events: Optional[List[MarkerHit]] = None) -> List[MarkerHit]:
+        # Zustandsautomat wie engine_intuition.js über events (Default: hits), sortiert nach (segment, start);
+        # Multiplikator nur für Familien, die am Ende "confirmed" sind
+        drift = drift if drift is not None else DriftState(self.cfg.get("axes_map"))
+        opts = profile.get("intuition", {})
+        cw = max(1, int(opts.get("confirm_window", 6))); dw = max(1, int(opts.get("decay_window", 4)))
+        mult = float(opts.get("multiplier_on_confirm", 1.25))
+        evs = hits if events is None else events
+        items = [(h.meta.get("segment", 0), (h.meta.get("span_global") or h.span or (0,))[0], h.family) for h in evs]
+        _, fs = run_states(items, cw, dw)
+        now = time.time(); tel = self._tel
+        for fam, fid in fs.ids.items():
+            c, r = fs.confirmed_n[fid], fs.retracted_n[fid]
+            tel[f"{fam}.counter_confirmed"] = c
+            tel[f"{fam}.counter_retracted"] = r
+            tel[f"{fam}.state"] = STATES[fs.state[fid]]
+            tel[f"{fam}.confirm_window"] = cw
+            tel[f"{fam}.decay_window"] = dw
+            tel[f"{fam}.last_ts"] = now
+            tel[f"{fam}.ewma_precision"] = drift.ewma(f"{fam}.ewma_precision", c / (c + r + 1))
+        tel["_intuition"] = fs.telemetry()
+        out = []
         for h in hits:
-            key=f"{h.family}.counter_confirmed"
-            self.telemetry[key]=self.telemetry.get(key,0)+1
-            self.telemetry[f"{h.family}.confirm_window"]=cw
-            self.telemetry[f"{h.family}.last_ts"]=now
-            self.telemetry[f"{h.family}.ewma_precision"]=self.ewma_update(f"{h.family}.ewma_precision", h.score)
-            h.score=min(1.0, h.score*mult); out.append(h)
+            fid = fs.ids.get(h.family)
+            if fid is not None and fs.state[fid] == CONFIRMED:
+                h.score = min(1.0, h.score*mult)
+            out.append(h)
         return out
 
     # Drift
-    def compute_drift(self, hits: List[MarkerHit]) -> Dict[str,Any]:
-        vectors=[{"dimensions":[h.score,1-h.score,0.0],"timestamp":time.time(),"magnitude":h.score,"marker_weights":{h.name:h.score}} for h in hits]
-        return self.calc_drift_metrics(vectors)
+    def compute_drift(self, hits: List[MarkerHit], drift: Optional[DriftState] = None) -> Dict[str,Any]:
+        # O(1) je Hit auf dem (Session-)Zustand, keine Historie
+        drift = drift if drift is not None else DriftState(self.cfg.get("axes_map"))
+        drift.update_many((h.family, h.score) for h in hits)
+        return drift.metrics()
 
     # ---- NEW: helpers for indices, lenses, heatmap, drift-axes, validity ----
     def _norm(self, x, lo=-1.0, hi=1.0):
@@ -162,46 +707,7 @@ class EngineRuntime:
         return out
 
     def _bucket_heatmap(self, text, hits, bucket=500):
-        buckets=[{"start":i,"end":min(i+bucket,len(text)),"dens":{"SEM":0,"CLU":0,"MEMA":0}} for i in range(0,len(text),bucket)]
-        for h in hits:
-            b=min(len(buckets)-1, (h.span[0]*bucket)//max(bucket,1)) if isinstance(h.span,(tuple,list)) else 0
-            t=("SEM" if h.name.startswith("SEM_") else "CLU" if h.name.startswith("CLU_") else "MEMA")
-            buckets[b]["dens"][t]+=1
-        return buckets
-
-    def _aggregate_lenses(self, hits, lenses_map):
-        lens_score={}
-        for h in hits:
-            for ln in lenses_map.get(h.family, []):
-                lens_score[ln]=lens_score.get(ln,0.0)+h.score
-        return [{"lens":k,"score":v} for k,v in sorted(lens_score.items(), key=lambda x:-x[1])]
-
-    def _indices_with_contrib(self, hits, scorings):
-        # CAND_* nicht zählen
-        core=[h for h in hits if not h.name.startswith("CAND_")]
-        fam_sum={}
-        for h in core: fam_sum[h.family]=fam_sum.get(h.family,0.0)+h.score
-        out={}
-        contrib={}
-        for idx, spec in scorings.items():
-            s=0.0; parts=[]
-            for fam,w in spec.get("families",{}).items():
-                v=fam_sum.get(fam,0.0)*float(w); s+=v
-                if v!=0: parts.append({"family":fam,"weighted":v})
-            out[idx]=self._norm(s)
-            contrib[idx]=sorted(parts, key=lambda x:-abs(x["weighted"]))[:5]
-        return out, contrib
-
-    def _drift_axes(self, hits, axes_map):
-        fam_sum={}
-        for h in hits: fam_sum[h.family]=fam_sum.get(h.family,0.0)+h.score
-        axes={}
-        for axis, weights in axes_map.items():
-            val=sum(fam_sum.get(f,0.0)*w for f,w in weights.items())
-            axes[axis]=self._norm(val)
-        # naive Trend: sign der Summe
-        trend={a: ("steigt" if v>0.2 else "fällt" if v<-0.2 else "stabil") for a,v in axes.items()}
-        return axes, trend
+        return heatmap_pyramid(len(text), hits, (bucket,))[bucket]
 
     def _balance(self, hits):
         # nutzt speaker-Meta, wenn vorhanden
@@ -217,18 +723,14 @@ class EngineRuntime:
     def _gaps_silence(self):
         return {"unanswered_turns":0,"latency_peaks":0,"reassurance_flags":0}
 
-    def _needs_attachment(self, hits):
-        u=sum(h.score for h in hits if h.family=="UNCERTAINTY")
-        s=sum(h.score for h in hits if h.family=="SUPPORT")
-        idx=self._norm(u - 0.3*s)
-        return {"unsaid_need_index": idx, "attachment_vector": {"seek": self._norm(s), "avoid": self._norm(u)}}
-
-    def _change_points(self, hits):
-        # Platzhalter: nimm Beginn/Ende der ersten 2 CLU
-        cps=[]
-        for h in [x for x in hits if x.name.startswith("CLU_")][:2]:
-            cps.append({"timestamp_or_seq": h.meta.get("segment",0), "involved_markers":[h.name], "micro_narrative_1liner":"Übergang erkannt"})
-        return cps
+    def _change_points(self, hits, n_segments: int, opts: Optional[Dict] = None,
+                       drift: Optional[DriftState] = None):
+        # CUSUM je (Ebene, Familie, Sprecher) über Segmentdichten; mit Session auf globaler Segmentuhr fortgesetzt
+        cpd = ChangePointDetector.from_dict(drift.change_points if drift is not None else None, **(opts or {}))
+        start = cpd.t
+        cpd.feed(segment_counts(hits, n_segments))
+        if drift is not None: drift.change_points = cpd.to_dict()
+        return cpd.points(since=start)
 
     def _validity(self, hits, segments, gates):
         counts=sum(1 for _ in hits)
@@ -244,43 +746,91 @@ class EngineRuntime:
     # Render Dict with lenses
     def render(self, result: AnalysisResult, template: Dict, profile: Dict) -> Dict:
         top = sorted({h.family: h.score for h in result.hits_clu}.items(), key=lambda x: -x[1])[:5]
-        lens = self._aggregate_lenses(result.hits_clu, self.cfg.get("lenses_map",{}))
+        lens = self.scoring.lenses(ScoringMatrix.family_sums(result.hits_clu)[0])
         return {"summary":{"top_clusters": top, "drift": result.drift, "lenses": lens},
                 "details":{"sem":[h.__dict__ for h in result.hits_sem],
                            "clu":[h.__dict__ for h in result.hits_clu],
                            "mema":[h.__dict__ for h in result.hits_mema]}}
 
+    @staticmethod
+    def _stage_clock(prof: Dict[str, Any]):
+        last=[time.perf_counter()]
+        def lap(stage: str) -> None:
+            now=time.perf_counter()
+            prof["stages"][stage]=round(prof["stages"].get(stage,0.0)+(now-last[0])*1000, 3)
+            last[0]=now
+        return lap
+
     # Pipeline
-    def analyse(self, text: str, profile: Dict, schema: Dict, axes: list) -> AnalysisResult:
+    # profiling=True: Stage-/Plugin-Zeiten in telemetry["_profile"], aggregiert in engine_py.PROFILE
+    # session: Drift-Zustand über Requests fortführen (DriftStore, persistiert mit drift_dir)
+    def analyse(self, text: Union[str, Iterable[str]], profile: Dict, schema: Dict, axes: list, profiling: bool = False,
+                session: Optional[str] = None) -> AnalysisResult:
+        tel: Dict[str, Any] = {}; counts: Dict[str, int] = {}; status = "ok"
+        self._local.telemetry = tel; t0 = time.perf_counter()
+        try:
+            return self._analyse(text, profile, schema, axes, profiling, counts, session)
+        except RuntimeError as e:
+            status = str(e); raise
+        except Exception:
+            status = "E_ENGINE_FAIL"; raise
+        finally:
+            self._local.telemetry = None
+            self._last_telemetry = dict(tel)
+            self.aggregator.record(status, (time.perf_counter() - t0) * 1000, counts, tel)
+
+    def _analyse(self, text: Union[str, Iterable[str]], profile: Dict, schema: Dict, axes: list, profiling: bool,
+                 counts: Dict[str, int], session: Optional[str] = None) -> AnalysisResult:
+        prof: Dict[str, Any] = {"stages": {}}
+        lap = self._stage_clock(prof) if profiling else (lambda stage: None)
         ok, code = selftest(self.root)
         if not ok: raise RuntimeError(code)
-        segs=self.segment(text, schema)
-        a=self.detect_markers(segs)
-        s=self.compose_sem(a, profile.get("gates",{}).get("sem_compose_window",2))
-        c=self.cluster_clu(s, profile.get("gates",{}).get("clu_x",2), profile.get("gates",{}).get("clu_y",3))
+        # text darf ein Iterable von Stücken sein (z. B. eine Datei): gehalten werden nur die Chunks
+        chunks=list(self.iter_segments(text, schema)); segs=[c.text for c in chunks]; lap("segment_ms")
+        text_len=chunks[-1].start+len(chunks[-1].text) if chunks else 0
+        a=self._detect_profiled(chunks, prof) if profiling else self.detect_markers(chunks); lap("detect_ms")
+        counts.update(segments=len(segs), ato=len(a))
+        s=self.compose_sem(a, profile.get("gates",{}).get("sem_compose_window",2)); lap("sem_ms")
+        c=self.cluster_clu(s, profile.get("gates",{}).get("clu_x",2), profile.get("gates",{}).get("clu_y",3)); lap("clu_ms")
+        counts.update(sem=len(s), clu=len(c))
         enforce_gates(c, segs, self.cfg.get("gates", {}))
-        m=self.mema(c); f=self.intuition(m, profile); d=self.compute_drift(f)
+        drift=self.drift.get(session) if session else DriftState(self.cfg.get("axes_map"))
+        m=self.mema(c); f=self.intuition(m, profile, drift, events=s); d=self.compute_drift(f, drift)
+        lap("intuition_ms")
+        counts.update(mema=len(m))
         
         # ENGINE_RESULT erweitern
-        indices, contributors = self._indices_with_contrib(f, self.cfg.get("scorings",{}))
-        axes, trend = self._drift_axes(f, self.cfg.get("axes_map", {}))
-        heatmap = self._bucket_heatmap("".join(segs), f, 500)
+        sc = self.scoring.apply(f)
+        indices, contributors, axes, trend = sc["indices"], sc["contributors"], sc["axes"], sc["trend"]
+        pyramid = heatmap_pyramid(text_len, a + s + c + f, HEATMAP_RESOLUTIONS)
+        heatmap = pyramid[500]
         balance = self._balance(f)
         gaps = self._gaps_silence()
-        needs = self._needs_attachment(f)
-        cpoints = self._change_points(f)
+        needs = sc["needs"]
+        cpoints = self._change_points(a + s + c + f, len(segs), profile.get("change_points"),
+                                      drift if session else None)
+        if session: self.drift.save(session)
         valid = self._validity(f, segs, self.cfg.get("gates", {}))
         # packe Extras in telemetry, damit orchestrator sie hat
-        self.telemetry.update({
+        self._tel.update({
           "_indices": indices,
           "_contributors": contributors,
           "_drift_axes": {"values": axes, "trend": trend},
           "_balance": balance,
           "_heatmap": heatmap,
+          "_heatmap_pyramid": {str(r): pyramid[r] for r in sorted(pyramid)},
           "_gaps_silence": gaps,
           "_needs_attachment": needs,
           "_change_points": cpoints,
           "_validity": valid
         })
+        if profiling:
+            lap("extras_ms")
+            self._tel["_profile"] = prof
+            try:
+                from engine_py import PROFILE
+                PROFILE.add(prof)
+            except Exception:
+                pass
         
-        return AnalysisResult(segs, a, s, f, m, d, telemetry=self.telemetry)
\ No newline at end of file
+        return AnalysisResult(segs, a, s, f, m, d, telemetry=self._tel)
\ No newline at end of file
@@ -14,6 +14,7 @@ import jsonschema
 import yaml
 from jsonschema.exceptions import ValidationError
 
+from .parse_cache import YAML_LOADER, ParseCache
 from .state_store import StateStore
 
 try:
@@ -21,6 +22,11 @@ try:
 except ImportError:  # pragma: no cover - handled by tests when dependency missing
     jsonpatch = None
 
+try:
+    from engine_py import profile_patterns
+except ImportError:  # pragma: no cover - engine module not on the path
+    profile_patterns = None
+
 
 @dataclass
 class MarkerCatalogResult:
@@ -29,6 +35,7 @@ class MarkerCatalogResult:
     errors: List[str] = field(default_factory=list)
     dedupe_hits: int = 0
     conflicts: List[str] = field(default_factory=list)
+    regex: Optional[Dict[str, Any]] = None
 
     def summary(self) -> Dict[str, object]:
         return {
@@ -37,6 +44,7 @@ class MarkerCatalogResult:
             "errors": list(self.errors),
             "dedupe_hits": self.dedupe_hits,
             "conflicts": list(self.conflicts),
+            "regex": self.regex,
         }
 
 
@@ -53,25 +61,41 @@ class MarkerCatalog:
         self.id_required = bool(cfg.get("id_required", True))
         self.unknown_field_policy = cfg.get("unknown_field_policy", "preserve_in.extras")
         self.atomic_writes = bool(cfg.get("atomic_writes", True))
+        self.regex_profile = bool(cfg.get("regex_profile", False))
+        self.regex_budget_ms = cfg.get("regex_budget_ms")
+        self.regex_fail_on_budget = bool(cfg.get("regex_fail_on_budget", False))
         with open(self.schema_file, "r", encoding="utf-8") as handle:
             self.schema = json.load(handle)
         self.item_schema = self.schema.get("items", self.schema)
         self.state_store = StateStore(self.canonical_json.with_suffix(".state.json"))
+        self.parse_cache = (
+            ParseCache(self.canonical_json.with_suffix(".parse_cache.json"))
+            if cfg.get("parse_cache", True)
+            else None
+        )
+        self.regex_report_path = self.canonical_json.with_suffix(".regex_cost.json")
 
     # ----------------------- loader helpers -----------------------
     def load_yaml_tree(self) -> List[Tuple[dict, Path, float]]:
         items: List[Tuple[dict, Path, float]] = []
         if not self.source_dir.exists():
             return items
+        if self.parse_cache is not None:
+            self.parse_cache.begin()
         for path in self.source_dir.rglob("*.yml"):
             items.extend(self._load_file(path))
         for path in self.source_dir.rglob("*.yaml"):
             items.extend(self._load_file(path))
+        if self.parse_cache is not None:
+            self.parse_cache.save()
         return items
 
     def _load_file(self, path: Path) -> List[Tuple[dict, Path, float]]:
-        with open(path, "r", encoding="utf-8") as handle:
-            data = yaml.safe_load(handle) or []
+        if self.parse_cache is not None:
+            data = self.parse_cache.load(path) or []
+        else:
+            with open(path, "r", encoding="utf-8") as handle:
+                data = yaml.load(handle, Loader=YAML_LOADER) or []
         if isinstance(data, list):
             records = data
         elif isinstance(data, dict):
@@ -123,6 +147,7 @@ class MarkerCatalog:
                 input_files=input_files,
                 dedupe_hits=dedupe_hits,
                 conflicts=conflicts,
+                parse_cache=self.parse_cache_stats(),
             )
             return MarkerCatalogResult(
                 ok=False,
@@ -141,6 +166,14 @@ class MarkerCatalog:
                 continue
             canonical_items.append(canonical)
         canonical_items.sort(key=lambda value: value.get(self.sort_key, ""))
+        regex = None
+        if not errors and self.regex_profile:
+            regex, over_budget = self._profile_regexes(canonical_items)
+            if self.regex_fail_on_budget:
+                errors.extend(
+                    f"regex budget exceeded: {cost['id']} ({cost['cost_ms']} ms > {self.regex_budget_ms} ms)"
+                    for cost in over_budget
+                )
         ok = not errors
         result = MarkerCatalogResult(
             ok=ok,
@@ -148,6 +181,7 @@ class MarkerCatalog:
             errors=errors,
             dedupe_hits=dedupe_hits,
             conflicts=[],
+            regex=regex,
         )
         if ok:
             timestamp = time.time()
@@ -159,15 +193,39 @@ class MarkerCatalog:
                 dedupe_hits=dedupe_hits,
                 conflicts=[],
                 hash_canonical=self._hash_items(canonical_items),
+                regex_profile=regex,
+                parse_cache=self.parse_cache_stats(),
             )
         else:
             self.state_store.update(
                 input_files=input_files,
                 dedupe_hits=dedupe_hits,
                 conflicts=result.conflicts,
+                parse_cache=self.parse_cache_stats(),
             )
         return result
 
+    # ----------------------- regex cost profile -----------------------
+    def _profile_regexes(self, canonical_items: List[dict]) -> Tuple[Dict[str, Any], List[dict]]:
+        """Write the ranked regex cost report; return its summary and the patterns over budget."""
+        if profile_patterns is None:
+            return {"skipped": "engine_py not importable"}, []
+        budget = float(self.regex_budget_ms) if self.regex_budget_ms is not None else None
+        report = profile_patterns(canonical_items, budget)
+        self.regex_report_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(f"{self.regex_report_path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.regex_report_path)
+        return {
+            "report": str(self.regex_report_path),
+            "patterns": len(report["patterns"]),
+            "flagged": report["flagged"],
+            "over_budget": [cost["id"] for cost in report["over_budget"]],
+            "compile_errors": len(report["compile_errors"]),
+            "elapsed_ms": report["elapsed_ms"],
+        }, report["over_budget"]
+
     # ----------------------- dedupe -----------------------
     def _dedupe(self, raw_items: List[Tuple[dict, Path, float]]):
         by_id: Dict[str, List[Tuple[dict, Path, float]]] = {}
@@ -267,5 +325,9 @@ class MarkerCatalog:
         return {"patch": patch.to_string(), "has_previous": True}
 
     # ----------------------- metrics -----------------------
+    def parse_cache_stats(self) -> Optional[Dict[str, int]]:
+        """Hit/miss counts of the last YAML tree load, or None with the cache disabled."""
+        return self.parse_cache.stats() if self.parse_cache is not None else None
+
     def metrics(self) -> Dict[str, Any]:
         return self.state_store.load()
@@ -0,0 +1,117 @@
+"""Persistent per-file cache of parsed YAML marker files."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+import yaml
+
+# libyaml's loader is several times faster than the pure-Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+CACHE_VERSION = 1
+
+
+class ParseCache:
+    """Parsed YAML payloads keyed by path and (mtime, size, content hash).
+
+    A file whose mtime and size are unchanged is served without being read;
+    otherwise its content hash decides, so a touched but unedited file is
+    still a hit. Payloads are kept as JSON text and decoded per lookup, so
+    callers always get fresh objects. Payloads that do not survive a JSON
+    round trip (dates, non-string keys) are parsed every time instead.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._seen: Set[str] = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    # ----------------------- helpers -----------------------
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+            ok = isinstance(data, dict) and data.get("version") == CACHE_VERSION
+            self._entries = dict(data.get("files", {})) if ok else {}
+        return self._entries
+
+    @staticmethod
+    def _parse(raw: bytes) -> Any:
+        return yaml.load(raw.decode("utf-8"), Loader=YAML_LOADER)
+
+    # ----------------------- public api -----------------------
+    def begin(self) -> None:
+        """Start a pass over the source tree: reset counters and the set of visited files."""
+
+        with self._lock:
+            self._load()
+            self._seen = set()
+            self.hits = self.misses = 0
+
+    def load(self, path: Path) -> Any:
+        """Return the parsed payload of `path`, parsing only when the file changed."""
+
+        key = str(path)
+        stat = path.stat()
+        with self._lock:
+            entries = self._load()
+            self._seen.add(key)
+            entry = entries.get(key)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                self.hits += 1
+                return json.loads(entry["json"])
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            if entry and entry["sha256"] == digest:
+                entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                self._dirty = True
+                self.hits += 1
+                return json.loads(entry["json"])
+            self.misses += 1
+        data = self._parse(raw)
+        try:
+            text = json.dumps(data, ensure_ascii=False)
+            cacheable = json.loads(text) == data
+        except (TypeError, ValueError):  # dates, non-string keys, ...
+            cacheable = False
+        with self._lock:
+            if cacheable:
+                entries[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest, "json": text}
+            else:
+                entries.pop(key, None)
+            self._dirty = True
+        return data
+
+    def save(self) -> None:
+        """Drop entries of files not visited since `begin` and persist atomically if anything changed."""
+
+        with self._lock:
+            entries = self._load()
+            for key in [key for key in entries if key not in self._seen]:
+                del entries[key]
+                self._dirty = True
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump({"version": CACHE_VERSION, "files": entries}, handle, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
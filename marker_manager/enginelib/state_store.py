@@ -15,6 +15,7 @@ _DEFAULT_STATE: Dict[str, Any] = {
     "dedupe_hits": 0,
     "conflicts": [],
     "hash_canonical": None,
+    "parse_cache": None,
 }
 
 
@@ -31,6 +31,10 @@ class ManagerConfig:
     id_required: bool = True
     unknown_field_policy: str = "preserve_in.extras"
     mirror_targets: List[Path] = field(default_factory=list)
+    regex_profile: bool = False
+    regex_budget_ms: Optional[float] = None
+    regex_fail_on_budget: bool = False
+    parse_cache: bool = True
 
     @staticmethod
     def from_mapping(
@@ -63,6 +67,14 @@ class ManagerConfig:
             mirror_targets=[
                 resolve(target) for target in mapping.get("mirror_targets", [])
             ],
+            regex_profile=bool(mapping.get("regex_profile", False)),
+            regex_budget_ms=(
+                float(mapping["regex_budget_ms"])
+                if mapping.get("regex_budget_ms") is not None
+                else None
+            ),
+            regex_fail_on_budget=bool(mapping.get("regex_fail_on_budget", False)),
+            parse_cache=bool(mapping.get("parse_cache", True)),
         )
 
 
@@ -94,6 +106,10 @@ class MarkerManagerService:
                 "id_required": self.config.id_required,
                 "unknown_field_policy": self.config.unknown_field_policy,
                 "atomic_writes": self.config.atomic_writes,
+                "regex_profile": self.config.regex_profile,
+                "regex_budget_ms": self.config.regex_budget_ms,
+                "regex_fail_on_budget": self.config.regex_fail_on_budget,
+                "parse_cache": self.config.parse_cache,
             }
         )
         self.focus_registry = FocusSchemaRegistry(
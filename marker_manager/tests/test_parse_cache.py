@@ -0,0 +1,81 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import yaml
+
+from marker_manager.enginelib.marker_catalog import MarkerCatalog
+
+
+def make_cfg(tmp_path: Path, **extra) -> dict:
+    source_dir = tmp_path / "src"
+    source_dir.mkdir(exist_ok=True)
+    schema_file = Path(__file__).resolve().parents[1] / "schemas" / "schema.markers.json"
+    cfg = {
+        "source_dir": str(source_dir),
+        "canonical_json": str(tmp_path / "out" / "markers_canonical.json"),
+        "backup_dir": str(tmp_path / "out" / "backups"),
+        "schema_file": str(schema_file),
+        "atomic_writes": False,
+    }
+    cfg.update(extra)
+    return cfg
+
+
+def write(path: Path, payload) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        yaml.safe_dump(payload, handle)
+
+
+def test_unchanged_files_are_served_from_cache(tmp_path):
+    cfg = make_cfg(tmp_path)
+    src = Path(cfg["source_dir"])
+    for i in range(5):
+        write(src / f"m{i}.yaml", {"id": f"M{i}", "signal": f"s{i}"})
+    first = MarkerCatalog(cfg)
+    assert first.sync().ok
+    assert first.metrics()["parse_cache"] == {"hits": 0, "misses": 5}
+    cache_file = Path(cfg["canonical_json"]).with_suffix(".parse_cache.json")
+    assert cache_file.exists()
+
+    # a fresh catalog picks the cache up from disk; one edit is the only re-parse
+    write(src / "m2.yaml", {"id": "M2", "signal": "edited"})
+    os.utime(src / "m3.yaml", (time.time() + 5, time.time() + 5))  # touched, same content
+    second = MarkerCatalog(cfg)
+    assert second.sync().ok
+    assert second.metrics()["parse_cache"] == {"hits": 4, "misses": 1}
+    with open(cfg["canonical_json"], encoding="utf-8") as handle:
+        signals = {item["id"]: item["signal"] for item in json.load(handle)}
+    assert signals["M2"] == "edited" and signals["M3"] == "s3"
+
+    (src / "m4.yaml").unlink()
+    assert second.validate_only().count == 4
+    assert second.parse_cache_stats() == {"hits": 4, "misses": 0}
+    with open(cache_file, encoding="utf-8") as handle:
+        assert len(json.load(handle)["files"]) == 4
+
+
+def test_cached_records_are_fresh_objects_and_cache_can_be_disabled(tmp_path):
+    cfg = make_cfg(tmp_path)
+    write(Path(cfg["source_dir"]) / "m.yaml", [{"id": "A", "tags": ["x"]}, {"id": "B"}])
+    catalog = MarkerCatalog(cfg)
+    first = catalog.load_yaml_tree()
+    first[0][0]["tags"].append("mutated")
+    again = catalog.load_yaml_tree()
+    assert [record for record, _, _ in again] == [{"id": "A", "tags": ["x"]}, {"id": "B"}]
+    assert catalog.parse_cache_stats() == {"hits": 1, "misses": 0}
+
+    plain = MarkerCatalog(make_cfg(tmp_path, parse_cache=False))
+    assert len(plain.load_yaml_tree()) == 2 and plain.parse_cache_stats() is None
+
+
+def test_records_that_do_not_survive_json_are_parsed_every_time(tmp_path):
+    cfg = make_cfg(tmp_path)
+    (Path(cfg["source_dir"]) / "m.yaml").write_text("id: D\nsignal: s\ncreated: 2024-01-01\n", encoding="utf-8")
+    catalog = MarkerCatalog(cfg)
+    for _ in range(2):
+        (record, _, _), = catalog.load_yaml_tree()
+        assert record["id"] == "D" and str(record["created"]) == "2024-01-01"
+        assert catalog.parse_cache_stats() == {"hits": 0, "misses": 1}
+    assert catalog.validate_only().count == 1
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import yaml
+
+from marker_manager.enginelib.marker_catalog import MarkerCatalog
+from marker_manager.tests.test_dedupe_and_merge import make_cfg
+
+
+def write_markers(cfg: dict) -> None:
+    source = Path(cfg["source_dir"])
+    with open(source / "markers.yaml", "w", encoding="utf-8") as handle:
+        yaml.safe_dump(
+            [
+                {"id": "ATO_NESTED", "pattern": [r"(\w+\s?)+!"]},
+                {"id": "ATO_SORRY", "pattern": [r"\bes tut mir leid\b"], "examples": ["Es tut mir leid."]},
+            ],
+            handle,
+        )
+
+
+def test_sync_writes_ranked_regex_report(tmp_path):
+    cfg = make_cfg(tmp_path)
+    cfg.update(regex_profile=True, regex_budget_ms=50)
+    write_markers(cfg)
+
+    result = MarkerCatalog(cfg).sync()
+    assert result.ok
+    assert result.regex["flagged"] == ["ATO_NESTED"]
+    assert result.regex["over_budget"] == ["ATO_NESTED"]
+    with open(result.regex["report"], "r", encoding="utf-8") as handle:
+        report = json.load(handle)
+    assert [cost["id"] for cost in report["patterns"]] == ["ATO_NESTED", "ATO_SORRY"]
+    assert report["corpus_chars"] == len("Es tut mir leid.")
+
+
+def test_sync_fails_when_a_pattern_exceeds_the_budget(tmp_path):
+    cfg = make_cfg(tmp_path)
+    cfg.update(regex_profile=True, regex_budget_ms=50, regex_fail_on_budget=True)
+    write_markers(cfg)
+
+    result = MarkerCatalog(cfg).sync()
+    assert not result.ok
+    assert any("ATO_NESTED" in message for message in result.errors)
+    assert not Path(cfg["canonical_json"]).exists()
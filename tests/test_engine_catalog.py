@@ -0,0 +1,130 @@
+import json
+import os
+import random
+from pathlib import Path
+
+import engine_py
+
+ROOT = Path(__file__).resolve().parents[1]
+TEXT = "A: okay, klingt gut\nB: ja genau, das stimmt\nA: es tut mir leid\nB: nein niemals"
+
+
+def _paths(tmp_path):
+    canon = tmp_path / "canon.json"
+    canon.write_text((ROOT / "markers_canonical.json").read_text(encoding="utf-8"), encoding="utf-8")
+    promo = tmp_path / "promo.json"
+    promo.write_text((ROOT / "promotion_mapping.json").read_text(encoding="utf-8"), encoding="utf-8")
+    weights = tmp_path / "weights.json"
+    weights.write_text((ROOT / "weights.json").read_text(encoding="utf-8"), encoding="utf-8")
+    return str(canon), str(promo), str(weights)
+
+
+def _strip(out):
+    out["meta"].pop("elapsed_ms")
+    return out
+
+
+def test_catalog_is_reused_until_file_changes(tmp_path):
+    canon, promo, weights = _paths(tmp_path)
+    first = engine_py.get_catalog(canon, promo, weights)
+    assert engine_py.get_catalog(canon, promo, weights) is first
+
+    data = json.loads(Path(canon).read_text(encoding="utf-8"))
+    data["markers"] = data["markers"][:1]
+    Path(canon).write_text(json.dumps(data), encoding="utf-8")
+    st = os.stat(canon)
+    os.utime(canon, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    second = engine_py.get_catalog(canon, promo, weights)
+    assert second is not first
+    assert len(second.markers) == 1
+
+
+def test_identical_content_shares_compiled_catalog(tmp_path):
+    canon, promo, weights = _paths(tmp_path)
+    copy = tmp_path / "canon_copy.json"
+    copy.write_text(Path(canon).read_text(encoding="utf-8"), encoding="utf-8")
+    assert engine_py.get_catalog(canon, promo, weights) is engine_py.get_catalog(str(copy), promo, weights)
+
+
+def test_engine_matches_module_run(tmp_path):
+    canon, promo, weights = _paths(tmp_path)
+    eng = engine_py.Engine(canon, promo, weights)
+    expected = _strip(engine_py.run(text=TEXT, canon_path=canon, promotion_path=promo, weights_path=weights))
+    assert _strip(eng.run(TEXT)) == expected
+    segs = engine_py.segment_dialog(TEXT)
+    assert _strip(eng.run(segments=segs)) == _strip(engine_py.run(
+        segments=segs, canon_path=canon, promotion_path=promo, weights_path=weights))
+    uncached = engine_py.CompiledCatalog.from_files(canon, promo, weights)
+    assert expected["meta"]["canon_hash"] == uncached.canon_hash
+
+
+def test_list_canon_infers_types(tmp_path):
+    canon = tmp_path / "list.json"
+    canon.write_text(json.dumps([
+        {"id": "ATO_THANKS", "pattern": {"regex": "(?i)\\bdanke\\b", "flags": ["IGNORECASE"]}},
+        {"id": "NOTE_X", "pattern": ["danke"]},
+    ]), encoding="utf-8")
+    out = engine_py.run(text="A: Danke\nB: danke dir", canon_path=str(canon),
+                        promotion_path=str(tmp_path / "missing.json"),
+                        weights_path=str(ROOT / "weights.json"))
+    assert [m["id"] for m in out["markers"]] == ["ATO_THANKS", "ATO_THANKS"]
+    assert out["markers"][0]["type"] == "ATO"
+
+
+def test_run_batch_keeps_order_and_isolates_failures(tmp_path):
+    canon, promo, weights = _paths(tmp_path)
+    paths = dict(canon_path=canon, promotion_path=promo, weights_path=weights)
+    segs = engine_py.segment_dialog(TEXT)
+    items = [TEXT, None, {"segments": segs}, "B: nein niemals"] * 3
+    for workers in (1, 2):
+        out = list(engine_py.run_batch(items, workers=workers, chunksize=2, **paths))
+        assert len(out) == len(items)
+        for i, (item, res) in enumerate(zip(items, out)):
+            if item is None:
+                assert isinstance(res, engine_py.BatchItemError)
+                assert res.index == i and res.error == "ValueError"
+            elif isinstance(item, dict):
+                assert _strip(res) == _strip(engine_py.run(segments=segs, **paths))
+            else:
+                assert _strip(res) == _strip(engine_py.run(text=item, **paths))
+
+
+def test_session_append_matches_full_run(tmp_path):
+    canon, promo, weights = _paths(tmp_path)
+    paths = dict(canon_path=canon, promotion_path=promo, weights_path=weights)
+    lines = ["okay, klingt gut, ja genau", "es tut mir leid", "nein niemals?", "ja genau, das stimmt",
+             "HALLO WAS SOLL DAS", "ok", "verstehe, das tut mir leid"]
+    segs = [{"who": "AB"[i % 3 % 2], "text": " ".join(lines[(i * k) % len(lines)] for k in range(1, i % 3 + 2))}
+            for i in range(40)]
+    session = engine_py.Session(**paths)
+    promoted = 0
+    done = 0
+    for n in [1, 3, 1, 2, 5, 1, 1, 4, 2, 20]:
+        out = session.append(segs[done:done + n])
+        done += n
+        expected = engine_py.run(segments=segs[:done], **paths)
+        assert json.dumps(_strip(out)) == json.dumps(_strip(expected))
+        promoted = sum("promotion_of" in m for m in out["markers"])
+    assert promoted
+    assert _strip(session.append([]))["markers"] == out["markers"]
+
+
+def test_session_append_matches_full_run_on_random_turns():
+    # carl catalog: quote pairs and whitespace runs reach across turns
+    paths = dict(canon_path=str(ROOT / engine_py.CANON_DEFAULT), promotion_path=str(ROOT / engine_py.PROMOTION_DEFAULT),
+                 weights_path=str(ROOT / engine_py.WEIGHTS_DEFAULT))
+    words = ["okay", "ja", "genau", "das", "stimmt", '"so"', "„wirklich", "’", "'", "es", "tut", "mir", "leid",
+             "nein", "niemals?", "HALLO", "...", "!", "du", "immer", "nie", "aber", '"', "ich", "weiß", "-", "\n", " "]
+    for trial in range(12):
+        rnd = random.Random(trial)
+        segs = [{"who": "AB"[i % 2], "text": " ".join(rnd.choice(words) for _ in range(rnd.randint(0, 9)))}
+                for i in range(rnd.randint(5, 25))]
+        session = engine_py.Session(**paths)
+        done = 0
+        while done < len(segs):
+            n = rnd.randint(1, 4)
+            out = session.append(segs[done:done + n])
+            done += n
+            expected = engine_py.run(segments=segs[:done], **paths)
+            assert json.dumps(_strip(out)) == json.dumps(_strip(expected)), (trial, done)
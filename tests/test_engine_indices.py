@@ -0,0 +1,66 @@
+import math
+import random
+
+import pytest
+
+import engine_py
+
+
+def _weights(rng):
+    indices = {key: {"w": {t: rng.uniform(-3, 3) for t in engine_py.FEATURE_KEYS if rng.random() < 0.8},
+                     "bias": rng.uniform(-1, 1)}
+               for key in engine_py.INDEX_KEYS[:3]}  # "sync" falls back to zero weights
+    calib = {"mu": {k: rng.uniform(-1, 1) for k in engine_py.INDEX_KEYS},
+             "sigma": {k: rng.uniform(0.05, 2) for k in engine_py.INDEX_KEYS[1:]}}
+    return {"indices": indices, "calib": calib}
+
+
+def _features(rng, n):
+    return [{t: rng.random() for t in engine_py.FEATURE_KEYS} for _ in range(n)]
+
+
+def _assert_close(got, expected):
+    assert len(got) == len(expected)
+    for g, e in zip(got, expected):
+        assert list(g) == list(e)
+        for key in e:
+            for part in ("raw", "z", "p"):
+                assert abs(g[key][part] - e[key][part]) <= 1e-12
+
+
+def test_fallback_matches_scalar_indices():
+    rng = random.Random(3)
+    weights = _weights(rng)
+    features = _features(rng, 200)
+    expected = [engine_py._compute_indices(f, weights) for f in features]
+    model = engine_py.IndexModel(weights)
+    _assert_close(model.indices(features, use_numpy=False), expected)
+    _assert_close(model.indices(engine_py.feature_rows(features), use_numpy=False), expected)
+    assert model.indices([], use_numpy=False) == []
+
+
+def test_vectorizable_erf_matches_math_erf():
+    # the float twin of the NumPy path's erf
+    def erf(x):
+        ax = min(abs(x), engine_py._ERFC_CONTFRAC_CUTOFF)
+        if ax < engine_py._ERF_SERIES_CUTOFF:
+            v = engine_py._erf_series(ax, math.exp)
+        else:
+            v = 1.0 - engine_py._erfc_contfrac(ax, math.exp)
+        return math.copysign(v, x)
+
+    rng = random.Random(5)
+    xs = [k / 500 for k in range(-4000, 4001)] + [rng.uniform(-40, 40) for _ in range(5000)]
+    assert max(abs(erf(x) - math.erf(x)) for x in xs) <= 1e-15
+
+
+def test_numpy_path_matches_scalar_indices():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(7)
+    weights = _weights(rng)
+    features = _features(rng, 500) + [{t: 40.0 * (k % 2) for t in engine_py.FEATURE_KEYS} for k in range(4)]
+    expected = [engine_py._compute_indices(f, weights) for f in features]
+    model = engine_py.IndexModel(weights)
+    _assert_close(model.indices(features, use_numpy=True), expected)
+    raw, z, p = model.score(np.array(engine_py.feature_rows(features)), use_numpy=True)
+    assert raw.shape == z.shape == p.shape == (len(features), 4)
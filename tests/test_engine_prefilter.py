@@ -0,0 +1,63 @@
+import json
+import re
+from pathlib import Path
+
+import engine_py
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _lits(pattern):
+    return engine_py._required_literals(re.compile(pattern, re.I | re.M | re.U))
+
+
+def test_required_literals():
+    assert _lits(r"\bes tut mir leid\b") == {"es tut mir leid"}
+    assert _lits(r"ja(,)? genau") == {" genau"}
+    assert _lits(r"\b(helfe|ich\s+bin)\b") == {"helfe", "ich"}
+    assert _lits(r"(?i)\b(ok(ay)?|alles\s+klar)$") == {"ok", "alles"}
+    assert _lits(r"\bK\w+") == {"k"}
+    assert _lits(r"\w+") is None
+    assert _lits(r"(foo)?bar|baz?") == {"bar", "ba"}
+
+
+def test_aho_corasick_finds_overlapping_keys():
+    ac = engine_py._AhoCorasick(["he", "she", "his", "hers", "x"])
+    assert ac.find("ushers") == {0, 1, 3}
+    assert ac.find("") == set()
+
+
+def test_prefilter_is_sound_under_unicode_case_folding():
+    markers = [
+        {"id": "ATO_S", "type": "ATO", "pattern": ["\\bsicher\\b"]},
+        {"id": "ATO_I", "type": "ATO", "pattern": ["ich weiss"]},
+        {"id": "ATO_K", "type": "ATO", "pattern": ["\\bkelvin"]},
+        {"id": "ATO_SZ", "type": "ATO", "pattern": ["straße"]},
+    ]
+    compiled = engine_py._compile_patterns(markers)
+    texts = ["ſicher", "İch weiss", "Kelvin", "STRAẞE"]
+    segments = [{"who": "A", "text": t} for t in texts]
+    text = "\n".join(texts)
+    expected = engine_py._scan(text, segments, compiled)
+    assert {e["id"] for e in expected} == {"ATO_S", "ATO_I", "ATO_K", "ATO_SZ"}
+    assert engine_py._MultiScanner(compiled).detect(text, segments) == expected
+
+
+def test_prefilter_skips_most_patterns_on_dialog():
+    canon = json.loads((ROOT / "carl/markers_canonical.json").read_text(encoding="utf-8"))
+    scanner = engine_py._MultiScanner(engine_py._compile_patterns(engine_py._canon_markers(canon)))
+    text = "A: Hallo, wie geht's?\nB: Ganz gut, danke. Und dir?\nA: Ehrlich gesagt bin ich etwas müde."
+    assert len(scanner.active(text)) * 5 < len(scanner.slots)
+
+
+def test_without_sre_internals_every_pattern_runs_on_its_own(monkeypatch):
+    canon = json.loads((ROOT / "carl/markers_canonical.json").read_text(encoding="utf-8"))
+    compiled = engine_py._compile_patterns(engine_py._canon_markers(canon))
+    text = "A: Hallo, wie geht's?\nB: Ganz gut, danke. Ehrlich gesagt bin ich \"etwas\" müde.\nA: Ok."
+    segments = [{"who": line[0], "text": line[3:]} for line in text.split("\n")]
+    expected = engine_py._MultiScanner(compiled).detect(text, segments)
+    monkeypatch.setattr(engine_py, "_SRE_OK", False)
+    scanner = engine_py._MultiScanner(compiled)
+    assert not scanner.groups and not scanner.literal_slots
+    assert len(scanner.active(text)) == len(scanner.slots)
+    assert scanner.detect(text, segments) == expected
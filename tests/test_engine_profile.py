@@ -0,0 +1,77 @@
+import threading
+from pathlib import Path
+
+import engine_py
+from enginelib.runtime import EngineRuntime
+
+MARKERS = [
+    {"id": "ATO_SORRY", "type": "ATO", "pattern": [r"\bes tut mir leid\b", r"\btut mir\b"]},
+    {"id": "ATO_MIR", "type": "ATO", "pattern": [r"(?i)\bmir leid", r"\bmir\b"]},
+    {"id": "ATO_NEVER", "type": "ATO", "pattern": [r"\bniemals\b"]},
+]
+TEXT = "Es tut mir leid.\nja, tut mir auch leid\nmir egal"
+
+
+def test_profiled_scan_matches_the_plain_scan(monkeypatch):
+    monkeypatch.setattr(engine_py, "SCREEN_MIN_ACTIVE", 1)
+    scanner = engine_py._MultiScanner(engine_py._compile_patterns(MARKERS))
+    prof = engine_py._RunProfile(len(scanner.slots))
+    assert scanner.matches_profiled(TEXT, prof) == scanner.matches(TEXT)
+    report = prof.report(scanner)
+    rows = {r["key"]: r for r in report["markers"]}
+    assert rows["ATO_NEVER"]["skipped"] == 1 and rows["ATO_NEVER"]["matches"] == 0
+    assert rows["ATO_SORRY"]["matches"] == 3
+    assert rows["ATO_SORRY"]["candidates"] >= rows["ATO_SORRY"]["matches"]
+    assert "ATO_NEVER#0" not in {r["key"] for r in report["patterns"]}
+    assert [r["ms"] for r in report["markers"]] == sorted((r["ms"] for r in report["markers"]), reverse=True)
+
+
+def test_run_profiling_leaves_the_result_unchanged():
+    engine_py.PROFILE.reset()
+    plain = engine_py.run(text=TEXT)
+    profiled = engine_py.run(text=TEXT, profiling=True)
+    prof = profiled["meta"].pop("profile")
+    for out in (plain, profiled):
+        out["meta"].pop("elapsed_ms", None)
+    assert profiled == plain
+    assert "profile" not in plain["meta"]
+    assert {"prefilter_ms", "detect_ms", "promotion_ms", "activation_ms", "package_ms"} <= set(prof["stages"])
+    assert engine_py.PROFILE.calls == 1
+
+
+def test_collector_sums_across_threads_and_renders_a_sorted_table():
+    collector = engine_py.ProfileCollector()
+    slow = {"stages": {"detect_ms": 1.0}, "markers": [{"key": "ATO_A", "ms": 2.0, "matches": 1},
+                                                      {"key": "ATO_B", "ms": 0.5, "matches": 3}]}
+    threads = [threading.Thread(target=lambda: [collector.add(slow) for _ in range(50)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert collector.calls == 200 and collector.stages["detect_ms"] == 200.0
+    rows = collector.rows("markers")
+    assert [(r["key"], r["ms"], r["matches"], r["calls"]) for r in rows] == [
+        ("ATO_A", 400.0, 200, 200), ("ATO_B", 100.0, 600, 200)]
+    table = collector.table("markers", sort="matches").splitlines()
+    assert table[0].split() == ["key", "ms", "matches", "calls"]
+    assert [line.split()[0] for line in table[1:]] == ["ATO_B", "ATO_A"]
+
+
+def test_runtime_profiling_records_plugins_and_stages(tmp_path):
+    root = Path(__file__).resolve().parents[1]
+    eng = EngineRuntime(root)
+    plugins = tmp_path / "plugins"
+    plugins.mkdir()
+    (plugins / "detect_sorry.py").write_text(
+        "from enginelib.runtime import MarkerHit\n"
+        "def detect(seg):\n"
+        "    return [MarkerHit('ATO_SORRY', 'REPAIR', (0, 3), 1.0)] if 'leid' in seg else []\n",
+        encoding="utf-8")
+    eng.plugins_dir = plugins
+    prof = {"stages": {}}
+    hits = eng._detect_profiled(["es tut mir leid", "ok", "leid"], prof)
+    assert [h.meta["segment"] for h in hits] == [0, 2]
+    assert prof["plugins"][0]["key"] == "detect_sorry"
+    assert prof["plugins"][0]["segments"] == 3 and prof["plugins"][0]["hits"] == 2
+    assert prof["markers"] == [{"key": "ATO_SORRY", "family": "REPAIR", "matches": 2}]
+    assert prof["stages"]["plugin_load_ms"] >= 0
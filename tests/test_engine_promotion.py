@@ -0,0 +1,40 @@
+import random
+
+import engine_py
+
+
+def _reference(events, promo_map):
+    # the original rule x segment scan
+    out = list(events)
+    by_seg = {}
+    for ev in events:
+        if ev["type"] == "ATO":
+            by_seg.setdefault(ev["segment_idx"], []).append(ev)
+    for rule in promo_map.get("map") or []:
+        min_ato = ((rule.get("when", {}).get("segment_co_occurs") or {}).get("min_ATO")) or 2
+        allowed = set(rule.get("from_ATO_ids") or [])
+        for seg_idx, atos in by_seg.items():
+            hits = [a for a in atos if not allowed or a["id"] in allowed]
+            if len(hits) >= min_ato:
+                out.append({"id": rule.get("promote"), "type": "SEM",
+                            "span": {"start": hits[0]["span"]["start"], "end": hits[-1]["span"]["end"]},
+                            "segment_idx": seg_idx, "who": hits[-1]["who"],
+                            "promotion_of": [h["id"] for h in hits]})
+    out.sort(key=lambda e: e["span"]["start"])
+    return out
+
+
+def test_indexed_promotion_matches_rule_by_segment_scan():
+    rng = random.Random(11)
+    ids = [f"ATO_{i}" for i in range(12)]
+    events = []
+    for k in range(600):
+        start = k * 7 + rng.randint(0, 3)
+        events.append({"id": rng.choice(ids), "type": rng.choice(["ATO", "ATO", "SEM"]),
+                       "span": {"start": start, "end": start + 4}, "segment_idx": k // 5, "who": "AB"[k % 2]})
+    events.sort(key=lambda e: e["span"]["start"])
+    promo = {"map": [{"promote": f"SEM_{r}", "from_ATO_ids": rng.sample(ids, rng.randint(0, 4)),
+                      "when": {"segment_co_occurs": {"min_ATO": rng.randint(1, 3)}}} for r in range(80)]}
+    out, _ = engine_py.promote_sem(events, promo)
+    assert out == _reference(events, promo)
+    assert len(out) > len(events)
@@ -0,0 +1,40 @@
+import pytest
+
+import engine_py
+
+MARKERS = [
+    {"id": "ATO_NESTED", "type": "ATO", "pattern": [r"(\w+\s?)+!"]},
+    {"id": "ATO_SORRY", "type": "ATO", "pattern": [r"\bes tut mir leid\b"],
+     "examples": {"positive": ["Es tut mir leid."], "negative": ["ok"]}},
+    {"id": "ATO_BROKEN", "type": "ATO", "pattern": ["(unclosed"]},
+]
+
+
+def test_profile_flags_backtracking_patterns_and_ranks_them_first():
+    report = engine_py.profile_patterns(MARKERS, budget_ms=50)
+    assert [c["id"] for c in report["patterns"]] == ["ATO_NESTED", "ATO_SORRY"]
+    nested, sorry = report["patterns"]
+    assert nested["superlinear"] and nested["growth"] > 2
+    assert not sorry["superlinear"] and sorry["cost_ms"] < 50
+    assert report["flagged"] == ["ATO_NESTED"]
+    assert [c["id"] for c in report["over_budget"]] == ["ATO_NESTED"]
+    assert report["compile_errors"][0]["id"] == "ATO_BROKEN"
+    assert report["corpus_chars"] == len("Es tut mir leid.\nok")
+
+
+def test_pump_points_reach_the_repeat_through_its_prefix():
+    r = engine_py.re.compile(r"ich habe\s+.+\s+nicht")
+    assert ("ich habe", " ") in engine_py._regex_pumps(r)
+
+
+def test_catalog_compile_records_errors_and_enforces_budget(monkeypatch):
+    catalog = engine_py.CompiledCatalog({"markers": MARKERS}, {"map": []}, {})
+    assert [e["id"] for e in catalog.pattern_errors] == ["ATO_BROKEN"]
+    assert catalog.regex_report is None
+
+    monkeypatch.setenv("REGEX_BUDGET_MS", "50")
+    with pytest.raises(engine_py.RegexBudgetError) as err:
+        engine_py.CompiledCatalog({"markers": MARKERS}, {"map": []}, {})
+    assert "ATO_NESTED" in str(err.value)
+    ok = engine_py.CompiledCatalog({"markers": MARKERS[1:]}, {"map": []}, {})
+    assert ok.regex_report["over_budget"] == []
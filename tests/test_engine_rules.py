@@ -0,0 +1,117 @@
+import random
+
+import engine_py
+
+KNOWN = [{"id": i} for i in ("ATO_A", "ATO_B", "SEM_X", "SEM_Y", "CLU_Z")]
+
+
+def _rules(*markers):
+    rules, errors = engine_py.compile_activation_rules(list(markers) + KNOWN)
+    return engine_py._RuleSet(rules), errors
+
+
+def _fire(ruleset, hits):
+    # hits: one list of marker ids per message
+    segments = [{"who": "AB"[i % 2], "text": "x"} for i in range(len(hits))]
+    events = [{"id": i, "type": i[:3], "span": {"start": k * 10, "end": k * 10 + 1},
+               "segment_idx": k, "who": segments[k]["who"]}
+              for k, ids in enumerate(hits) for i in ids]
+    return [(e["id"], e["segment_idx"]) for e in ruleset.fire(events, segments)]
+
+
+def test_count_window():
+    rs, errors = _rules({"id": "SEM_S", "activation": {"rule": "ANY 2 IN 3 messages"},
+                         "composed_of": ["ATO_A", "ATO_B"]})
+    assert not errors
+    assert _fire(rs, [["ATO_A"], [], ["ATO_B"], [], [], ["ATO_A"]]) == [("SEM_S", 2)]
+    assert _fire(rs, [["ATO_A", "ATO_A"]]) == [("SEM_S", 0)]
+
+
+def test_both_distinct_weighted_and_or():
+    rs, errors = _rules(
+        {"id": "SEM_BOTH", "activation": {"rule": "BOTH IN 1 message OR ANY 2 IN 2 messages"},
+         "composed_of": ["ATO_A", "ATO_B"]},
+        {"id": "CLU_D", "activation": {"rule": "AT_LEAST 2 DISTINCT SEMs IN 3 messages"},
+         "composed_of": ["SEM_X", "SEM_Y", "ATO_A"]},
+        {"id": "CLU_W", "activation": {"rule": "WEIGHTED_AND"}, "window": {"messages": 2},
+         "combination": {"components": [{"marker_id": "SEM_X", "weight": 0.5},
+                                        {"marker_id": "ATO_B", "weight": 0.3}], "threshold": 0.7}},
+    )
+    assert not errors
+    assert _fire(rs, [["ATO_A", "ATO_B"]]) == [("SEM_BOTH", 0)]
+    assert _fire(rs, [["ATO_A"], ["ATO_A"]]) == [("SEM_BOTH", 1)]
+    assert _fire(rs, [["SEM_X", "ATO_A"], [], ["SEM_X"]]) == []
+    assert _fire(rs, [["SEM_X"], [], ["SEM_Y"]]) == [("CLU_D", 2)]
+    assert _fire(rs, [["SEM_X"], ["ATO_B"]]) == [("CLU_W", 1)]
+    assert _fire(rs, [["SEM_X"], [], ["ATO_B"]]) == []
+
+
+def test_explicit_ids_and_rule_dicts():
+    rs, errors = _rules(
+        {"id": "SEM_AND", "activation": {"rule": "ATO_A AND ATO_B IN 2"}},
+        {"id": "CLU_SUM", "activation": {"rule": "COUNT(SEM_X)+COUNT(SEM_Y) >= 3 IN 4"}},
+        {"id": "CLU_DICT", "activation": {"window": 3, "rule": {"all_of": ["SEM_X >= 1", "ATO_A >= 2"]}}},
+    )
+    assert not errors
+    assert _fire(rs, [["ATO_B"], ["ATO_A"]]) == [("SEM_AND", 1)]
+    assert _fire(rs, [["SEM_X"], ["SEM_Y"], [], ["SEM_X"]]) == [("CLU_SUM", 3)]
+    assert _fire(rs, [["ATO_A"], ["SEM_X"], ["ATO_A"]]) == [("CLU_DICT", 2)]
+
+
+def test_unparseable_rules_are_reported():
+    _, errors = _rules(
+        {"id": "SEM_BAD", "activation": {"rule": "CONTRADICTION DETECTED"}},
+        {"id": "SEM_UNKNOWN", "activation": {"rule": "AT_LEAST 3 METAPHOR IN 5 messages"}},
+        {"id": "ATO_SELF", "activation": {"rule": "ANY 1"}},
+    )
+    assert [(e["id"], e["error"]) for e in errors] == [
+        ("SEM_BAD", "unsupported rule 'CONTRADICTION DETECTED'"),
+        ("SEM_UNKNOWN", "unknown marker 'METAPHOR'"),
+    ]
+
+
+def test_single_pass_matches_window_recount():
+    markers = [
+        {"id": "SEM_1", "activation": {"rule": "AT_LEAST 3 IN 4 messages"}, "composed_of": ["ATO_A", "ATO_B"]},
+        {"id": "SEM_2", "activation": {"rule": "ALL 2 IN 3 messages"}, "composed_of": ["ATO_A", "SEM_X"]},
+        {"id": "CLU_3", "activation": {"rule": "ANY 1 IN 6 messages"}, "composed_of": ["SEM_Y"]},
+    ]
+    rs, _ = _rules(*markers)
+    rng = random.Random(7)
+    ids = ["ATO_A", "ATO_B", "SEM_X", "SEM_Y"]
+    hits = [rng.sample(ids, rng.randint(0, 2)) for _ in range(300)]
+    expected = []
+    for k, here in enumerate(hits):
+        for m, (n, window, need_all) in zip(markers, [(3, 4, False), (2, 3, True), (1, 6, False)]):
+            comps = m["composed_of"]
+            if not set(here) & set(comps):
+                continue
+            seen = [i for msg in hits[max(0, k - window + 1):k + 1] for i in msg if i in comps]
+            if (len(set(seen)) >= len(comps)) if need_all else len(seen) >= n:
+                expected.append((m["id"], k))
+    assert _fire(rs, hits) == expected
+
+
+def test_composed_levels_cascade_in_one_pass():
+    rs, errors = _rules(
+        # listed before its input on purpose: evaluation order comes from the graph
+        {"id": "MEMA_TOP", "activation": {"rule": "ANY 2 IN 3 messages"}, "composed_of": ["CLU_MID"]},
+        {"id": "CLU_MID", "activation": {"rule": "ANY 1"}, "composed_of": ["SEM_LOW"]},
+        {"id": "SEM_LOW", "activation": {"rule": "BOTH IN 1 message"}, "composed_of": ["ATO_A", "ATO_B"]},
+    )
+    assert not errors
+    assert [m["id"] for m, _, _ in rs.rules] == ["SEM_LOW", "CLU_MID", "MEMA_TOP"]
+    assert _fire(rs, [["ATO_A", "ATO_B"], ["ATO_A"], ["ATO_B", "ATO_A"]]) == [
+        ("SEM_LOW", 0), ("CLU_MID", 0),
+        ("SEM_LOW", 2), ("CLU_MID", 2), ("MEMA_TOP", 2),
+    ]
+
+
+def test_composition_cycles_are_reported_and_dropped():
+    rules, errors = engine_py.compile_activation_rules(KNOWN + [
+        {"id": "SEM_P", "activation": {"rule": "ANY 1"}, "composed_of": ["SEM_Q", "ATO_A"]},
+        {"id": "SEM_Q", "activation": {"rule": "ANY 1"}, "composed_of": ["SEM_P"]},
+        {"id": "CLU_OK", "activation": {"rule": "ANY 1"}, "composed_of": ["ATO_A"]},
+    ])
+    assert [m["id"] for m, _, _ in rules] == ["CLU_OK"]
+    assert [e["error"] for e in errors] == ["composition cycle: SEM_P -> SEM_Q -> SEM_P"]
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import engine_py
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _examples(markers):
+    out = []
+    for m in markers:
+        ex = m.get("examples")
+        if isinstance(ex, dict):
+            ex = (ex.get("positive") or []) + (ex.get("negative") or [])
+        out.extend(e for e in ex or [] if isinstance(e, str))
+    return out
+
+
+def _parity(markers, texts):
+    compiled = engine_py._compile_patterns(markers)
+    segments = [{"who": "AB"[i % 2], "text": t} for i, t in enumerate(texts)]
+    text = "\n".join(s["text"] for s in segments)
+    expected = engine_py._scan(text, segments, compiled)
+    assert engine_py._MultiScanner(compiled).detect(text, segments) == expected
+    return expected
+
+
+@pytest.mark.parametrize("canon_file", ["carl/markers_canonical.json", "markers_canonical.json"])
+def test_multi_scanner_matches_per_pattern_on_examples(canon_file):
+    canon = json.loads((ROOT / canon_file).read_text(encoding="utf-8"))
+    markers = engine_py._canon_markers(canon)
+    assert _parity(markers, _examples(markers))
+
+
+def test_overlapping_and_special_patterns():
+    markers = [
+        {"id": "ATO_A", "type": "ATO", "pattern": ["\\bes tut mir leid\\b", "\\btut mir\\b"]},
+        {"id": "ATO_B", "type": "ATO", "pattern": ["(?i)\\bmir leid", "mir"]},
+        {"id": "SEM_BACKREF", "type": "SEM", "pattern": ["\\b(\\w+) \\1\\b"]},
+        {"id": "DETECT_EMPTY", "type": "DETECT", "pattern": ["x*", "\\b"]},
+        {"id": "ATO_LINE", "type": "ATO", "pattern": ["[?]$", "^ok(\\.|,)?$"]},
+        {"id": "ATO_FOLD", "type": "ATO", "pattern": ["\\bstraße\\b", "\\bK\\w+"]},
+    ]
+    events = _parity(markers, [
+        "Es tut mir leid, es tut mir leid!",
+        "ok.",
+        "das das ist so?",
+        "STRASSE Straße Kelvin xx",
+    ])
+    assert {e["id"] for e in events} == {"ATO_A", "ATO_B", "SEM_BACKREF", "DETECT_EMPTY", "ATO_LINE", "ATO_FOLD"}
+
+
+def test_detect_events_uses_scanner_output():
+    canon = json.loads((ROOT / "markers_canonical.json").read_text(encoding="utf-8"))
+    text = "okay, klingt gut\nja genau, das stimmt\nes tut mir leid"
+    segments = engine_py.segment_dialog(text)
+    compiled = engine_py._compile_patterns(engine_py._canon_markers(canon))
+    assert engine_py.detect_events(text, segments, canon) == engine_py._scan(text, segments, compiled)
+
+
+def test_events_are_attributed_to_the_segment_containing_them():
+    markers = [{"id": "ATO_SORRY", "type": "ATO", "pattern": ["es tut mir leid"]}]
+    compiled = engine_py._compile_patterns(markers)
+    text = "A: " + "bla " * 200 + "\nB: es tut mir leid\nA: ok\nA: es tut mir leid"
+    segments = engine_py.segment_dialog(text)
+    events = engine_py._scan(text, segments, compiled)
+    assert [(e["segment_idx"], e["who"]) for e in events] == [(1, "B"), (3, "A")]
+
+    joined = "\n".join(s["text"] for s in segments)
+    assert engine_py._segment_offsets(joined, segments) == [0, 801, 817, 820]
+    assert [e["segment_idx"] for e in engine_py._scan(joined, segments, compiled)] == [1, 3]
+
+
+def test_event_table_matches_the_dict_pipeline():
+    catalog = engine_py.CompiledCatalog.from_files(
+        "carl/markers_canonical.json", "promotion_mapping.json", "carl/weights.json")
+    lines = ["ich weiß nicht, vielleicht", "Es tut mir leid, wirklich", "immer machst du das", "ok danke"]
+    text = "\n".join(f"{'AB'[i % 2] if i % 7 else 'Notiz'}: {lines[i % 4]}" for i in range(60))
+    segments = engine_py.segment_dialog(text)
+    table = catalog.table(text, segments)
+
+    events = catalog.detect(text, segments)
+    assert table.to_dicts() == events
+    assert table.atos_by_segment() == engine_py._atos_by_segment(events)
+
+    promoted, _ = catalog.promotion.apply(events)
+    expected = engine_py.apply_activations(promoted, segments, catalog.rules)
+    extra = [e for e in expected if "evidence" not in e]
+    assert extra
+    assert table.merged(extra) == expected
+    assert table.counts(extra) == engine_py._build_counts(expected)
+    assert list(table.counts(extra)["by_speaker"]) == list(engine_py._build_counts(expected)["by_speaker"])
@@ -0,0 +1,36 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+import regression  # noqa: E402
+
+
+def test_engine_output_is_byte_identical_to_goldens():
+    assert regression.golden_mismatches() == []
+
+
+def test_compare_normalises_for_machine_speed():
+    baseline = {"calibration_ms": 10.0, "scenarios": {"run/10": {"best_ms": 2.0, "norm": 0.2},
+                                                     "detect/10": {"best_ms": 1.0, "norm": 0.1}}}
+    # twice as slow everywhere, calibration included: no regression
+    slower = {"calibration_ms": 20.0, "scenarios": {"run/10": {"best_ms": 4.0, "norm": 0.2},
+                                                   "detect/10": {"best_ms": 2.0, "norm": 0.1}}}
+    assert regression.compare(baseline, slower, 0.5) == []
+    # detect alone got slower on the same machine
+    regressed = {"calibration_ms": 10.0, "scenarios": {"run/10": {"best_ms": 2.0, "norm": 0.2},
+                                                      "detect/10": {"best_ms": 1.6, "norm": 0.16}}}
+    failures = regression.compare(baseline, regressed, 0.5)
+    assert len(failures) == 1 and failures[0].startswith("detect/10: 1.60x")
+
+
+# By default only the golden outputs and compare() are checked; the timing
+# gate itself needs PERF_GATE=1 (see benchmarks/regression.py for the tolerance).
+@pytest.mark.skipif(not os.environ.get("PERF_GATE"), reason="timing gate: set PERF_GATE=1")
+def test_no_stage_regressed_against_baseline():
+    baseline = json.loads(regression.BASELINE.read_text(encoding="utf-8"))
+    tolerance = float(os.environ.get("PERF_TOLERANCE", baseline.get("tolerance", regression.TOLERANCE)))
+    assert regression.compare(baseline, regression.measure(), tolerance) == []
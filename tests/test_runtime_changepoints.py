@@ -0,0 +1,79 @@
+import json
+import random
+
+from enginelib.changepoints import ChangePointDetector, segment_counts
+from enginelib.runtime import MarkerHit
+
+from test_runtime_telemetry import SCHEMA, _runtime
+
+
+def _series(rates, seed=7):
+    # rates: [(segments, {family: hits per segment})] -> per-segment counts
+    rnd = random.Random(seed)
+    out = []
+    for n, fams in rates:
+        for _ in range(n):
+            seg = {}
+            for fam, rate in fams.items():
+                x = sum(rnd.random() < rate / 4 for _ in range(4))
+                if x:
+                    seg[("ATO", fam, "A")] = (float(x), {f"ATO_{fam}": x})
+            out.append(seg)
+    return out
+
+
+def test_detects_rise_and_fall_with_drivers():
+    counts = _series([(40, {"ALPHA": 2.0, "OMEGA": 1.0}), (40, {"GAMMA": 2.0, "OMEGA": 1.0})])
+    cpd = ChangePointDetector()
+    cpd.feed(counts)
+    points = cpd.points()
+    assert points and all(32 <= p["timestamp_or_seq"] <= 42 for p in points[:2])
+    moved = {(d["family"], d["direction"]) for p in points[:2] for d in p["drivers"]}
+    assert {("GAMMA", "steigt"), ("ALPHA", "fällt")} <= moved
+    assert "OMEGA" not in {d["family"] for p in points for d in p["drivers"]}
+    assert "ATO_GAMMA" in points[0]["involved_markers"] + points[1]["involved_markers"]
+
+
+def test_idle_series_are_not_visited():
+    counts = [{("ATO", "RARE", "*"): (1.0, {"ATO_RARE": 1})} if i % 50 == 0 else {} for i in range(2000)]
+    cpd = ChangePointDetector()
+    visits = []
+    step = cpd._step
+    cpd._step = lambda *a: visits.append(a[2]) or step(*a)
+    cpd.feed(counts)
+    assert len(visits) < 200 and cpd.points() == []
+    st = cpd.series[("ATO", "RARE", "*")]
+    assert st[5] == st[6] > 1900  # skipped segments folded into the history length
+
+
+def test_resumed_state_matches_single_pass():
+    counts = _series([(30, {"ALPHA": 1.5}), (30, {"ALPHA": 0.1, "BETA": 2.5}), (30, {"ALPHA": 2.5})], seed=3)
+    one = ChangePointDetector()
+    one.feed(counts)
+    part = ChangePointDetector()
+    part.feed(counts[:45])
+    resumed = ChangePointDetector.from_dict(json.loads(json.dumps(part.to_dict())))
+    resumed.feed(counts[45:])
+    assert resumed.points() == one.points()
+
+
+def test_segment_counts_spread_clusters_over_their_segments():
+    hits = [MarkerHit("ATO_X", "X", (0, 1), 0.5, {"segment": 1, "speaker": "B"}),
+            MarkerHit("CLU_X", "X", (0, 0), 0.8, {"level": "CLU", "segment": 0, "segments": [0, 2]})]
+    counts = segment_counts(hits, 3)
+    assert counts[1] == {("ATO", "X", "B"): (1.0, {"ATO_X": 1})}
+    assert ("CLU", "X", "*") in counts[0] and ("CLU", "X", "*") in counts[2]
+
+
+def test_runtime_reports_shift_and_resumes_per_session(tmp_path):
+    eng = _runtime(tmp_path, None)
+    first = [f"{'AB'[i % 2]}: alpha beta omega sigma delta und so" for i in range(40)]
+    second = [f"{'AB'[i % 2]}: gamma gamma delta omega sigma beta" for i in range(40)]
+    cps = eng.analyse("\n".join(first + second), {}, SCHEMA, []).telemetry["_change_points"]
+    assert cps and {"timestamp_or_seq", "involved_markers", "micro_narrative_1liner"} <= set(cps[0])
+    assert any(m.startswith("ATO_GAMMA") for m in cps[0]["involved_markers"])
+    # the same shift split over two requests of one session, on a global segment clock
+    n1 = len(eng.analyse("\n".join(first), {}, SCHEMA, [], session="s1").segments)
+    later = eng.analyse("\n".join(second), {}, SCHEMA, [], session="s1").telemetry["_change_points"]
+    assert later and min(p["timestamp_or_seq"] for p in later) >= n1 - 2
+    assert "GAMMA" in {d["family"] for p in later for d in p["drivers"]}
@@ -0,0 +1,61 @@
+import json
+import random
+from pathlib import Path
+
+from enginelib.drift import DriftState, DriftStore
+
+AXES = {"tension_calm": {"CONFLICT": 1.0, "SUPPORT": -0.6}, "approach_avoid": {"SUPPORT": 0.7}}
+
+
+def _hits(n, seed=5):
+    rng = random.Random(seed)
+    return [(rng.choice(["CONFLICT", "SUPPORT", "OTHER"]), rng.random()) for _ in range(n)]
+
+
+def test_resumed_state_equals_one_pass(tmp_path):
+    hits = _hits(400)
+    whole = DriftState(AXES)
+    whole.update_many(hits, ts=1.0)
+    store = DriftStore(tmp_path, AXES)
+    store.get("paar-1").update_many(hits[:150], ts=1.0)
+    store.save("paar-1")
+    resumed = DriftStore(tmp_path, AXES).get("paar-1")
+    resumed.update_many(hits[150:], ts=1.0)
+    assert resumed.metrics() == whole.metrics()
+    assert json.loads(json.dumps(resumed.to_dict())) == resumed.to_dict()
+    assert whole.metrics()["events"] == 400 and set(whole.metrics()["axes"]) == set(AXES)
+
+
+def test_rising_scores_read_as_rising_drift():
+    st = DriftState(AXES)
+    st.update_many([("CONFLICT", 0.1)] * 50)
+    st.update_many([("CONFLICT", 0.9)] * 5)
+    m = st.metrics()
+    assert m["families"]["CONFLICT"]["direction"] == "steigt"
+    assert m["axes"]["tension_calm"]["drift"] > 0.3 and m["direction"] == "steigt"
+    assert "approach_avoid" not in m["axes"]  # SUPPORT never hit
+
+
+def test_store_keeps_recent_sessions_and_reloads_evicted_ones(tmp_path):
+    store = DriftStore(tmp_path, AXES, max_sessions=2)
+    for name in ("a", "b", "c"):
+        store.get(name).update("SUPPORT", 0.5)
+        store.save(name)
+    assert list(store._states) == ["b", "c"]
+    assert store.get("a").metrics()["events"] == 1
+    assert sorted(p.name.split("-")[0] for p in tmp_path.glob("*.drift.json")) == ["a", "b", "c"]
+
+
+def test_analyse_continues_the_session_drift(tmp_path):
+    from test_runtime_telemetry import _runtime, _text, SCHEMA
+    from enginelib.runtime import EngineRuntime, TelemetryAggregator
+    (tmp_path / "root").mkdir()
+    eng = _runtime(tmp_path / "root", TelemetryAggregator())
+    eng.drift = DriftStore(tmp_path / "drift", eng.cfg["axes_map"])
+    text = _text(["alpha", "beta", "gamma", "delta", "omega"] * 2, 6)
+    first = eng.analyse(text, {}, SCHEMA, [], session="s1").drift
+    second = eng.analyse(text, {}, SCHEMA, [], session="s1").drift
+    assert second["events"] == 2 * first["events"] > 0
+    fresh = EngineRuntime(tmp_path / "root", drift_dir=tmp_path / "drift", aggregator=TelemetryAggregator())
+    assert fresh.analyse(text, {}, SCHEMA, [], session="s1").drift["events"] == 3 * first["events"]
+    assert eng.analyse(text, {}, SCHEMA, []).drift["events"] == first["events"]
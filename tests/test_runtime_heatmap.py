@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from enginelib import runtime
+from enginelib.runtime import MarkerHit, heatmap_pyramid
+
+
+def _hits(n, text_len, seed=3):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        start = rng.randrange(text_len)
+        name = rng.choice(["ATO_X", "SEM_X_EVIDENCE", "CLU_X", "MEMA_X"])
+        out.append(MarkerHit(name, "X", (0, 0), 1.0, {"span_global": (start, start + 5)}))
+    out.append(MarkerHit("ATO_NOWHERE", "X", (0, 0), 1.0))  # no global span: not placed
+    return out
+
+
+def test_buckets_come_from_global_spans():
+    hits = [MarkerHit("ATO_A", "A", (3, 8), 1.0, {"span_global": (1203, 1208)}),
+            MarkerHit("CUSTOM", "A", (0, 0), 1.0, {"span_global": (1450, 2600), "level": "CLU"}),
+            MarkerHit("SEM_A_EVIDENCE", "A", (0, 0), 1.0, {"span_global": (2999, 3100)})]
+    pyr = heatmap_pyramid(3000, hits)
+    b500 = pyr[500]
+    assert [(b["start"], b["end"]) for b in b500] == [(0, 500), (500, 1000), (1000, 1500), (1500, 2000),
+                                                     (2000, 2500), (2500, 3000)]
+    assert b500[2]["dens"] == {"ATO": 1, "SEM": 0, "CLU": 1, "MEMA": 0}
+    assert b500[5]["dens"]["SEM"] == 1
+    assert [b["dens"]["ATO"] for b in pyr[250]].index(1) == 4
+    assert len(pyr[2000]) == 2 and pyr[2000][1]["end"] == 3000
+
+
+def test_coarse_levels_sum_the_fine_histogram():
+    hits = _hits(500, 12345)
+    pyr = heatmap_pyramid(12345, hits)
+    for r in (500, 2000):
+        k = r // 250
+        for t in runtime.HEAT_TYPES:
+            fine = [b["dens"][t] for b in pyr[250]]
+            assert [b["dens"][t] for b in pyr[r]] == [sum(fine[i:i + k]) for i in range(0, len(fine), k)]
+    assert sum(sum(b["dens"].values()) for b in pyr[2000]) == 500
+
+
+def test_numpy_histogram_matches_the_fallback(monkeypatch):
+    pytest.importorskip("numpy")
+    hits = _hits(300, 7000, seed=9)
+    with_np = heatmap_pyramid(7000, hits, (250, 750, 1500))
+    monkeypatch.setattr(runtime, "_np", None)
+    assert heatmap_pyramid(7000, hits, (250, 750, 1500)) == with_np
@@ -0,0 +1,63 @@
+import json
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from enginelib.intuition import CONFIRMED, DECAYED, PROVISIONAL, STATES, process_intuition_clu, run_states
+
+from test_runtime_telemetry import SCHEMA, _runtime, _text
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_state_sequence_by_hand():
+    # A: 0,1 -> confirmed; gap 1->7 > 4 -> retracted, new streak; 8 -> confirmed again
+    items = [(0, 0, "A"), (1, 0, "A"), (7, 0, "A"), (8, 0, "A"), (2, 0, "B")]
+    states, fs = run_states(items, confirm_window=2, decay_window=4)
+    assert states == [PROVISIONAL, CONFIRMED, PROVISIONAL, CONFIRMED, PROVISIONAL]
+    assert fs.telemetry() == {"confirmed": 2, "retracted": 1, "ewma_precision": 0.5}
+    a = fs.ids["A"]
+    assert (fs.confirmed_n[a], fs.retracted_n[a], STATES[fs.state[a]]) == (2, 1, "confirmed")
+    # unsorted input is visited in (segment, start) order
+    states, _ = run_states(list(reversed(items[:2])), 2, 4)
+    assert states == [CONFIRMED, PROVISIONAL]
+    assert DECAYED not in states
+
+
+def _events(n, seed):
+    rnd = random.Random(seed)
+    ids = [f"SEM_{i}" for i in range(12)] + ["SEM_UNMAPPED"]
+    return [{"id": rnd.choice(ids), "segment_idx": rnd.randrange(60),
+             **({"span": {"start": rnd.randrange(500)}} if rnd.random() < 0.8 else {})} for _ in range(n)]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+@pytest.mark.parametrize("opts", [{}, {"confirm_window": 3, "decay_window": 2}, {"confirm_window": 0}])
+def test_matches_engine_intuition_js(opts):
+    events = _events(400, seed=len(opts))
+    opts = dict(opts, family_map={f"SEM_{i}": f"FAM_{i % 5}" for i in range(12)})
+    script = ("import {processIntuitionClu} from './engine_intuition.js';"
+              "let d='';process.stdin.on('data',c=>d+=c).on('end',()=>{const [e,o]=JSON.parse(d);"
+              "process.stdout.write(JSON.stringify(processIntuitionClu(e,o)));});")
+    res = subprocess.run(["node", "--input-type=module", "-e", script], input=json.dumps([events, opts]),
+                         capture_output=True, text=True, cwd=ROOT, check=True)
+    assert process_intuition_clu(events, opts) == json.loads(res.stdout)
+
+
+def test_runtime_confirms_recurring_families_only(tmp_path):
+    eng = _runtime(tmp_path, None)
+    text = _text(["alpha", "beta", "gamma", "delta", "omega"] * 2, 30) + "\nA: sigma sigma"
+    profile = {"intuition": {"confirm_window": 3, "decay_window": 2}}
+    res = eng.analyse(text, profile, SCHEMA, [])
+    tel = res.telemetry
+    assert tel["ALPHA.state"] == "confirmed" and tel["ALPHA.counter_confirmed"] == 1
+    assert tel["SIGMA.state"] == "provisional" and tel["SIGMA.counter_confirmed"] == 0
+    assert tel["_intuition"]["confirmed"] == 5 and tel["_intuition"]["retracted"] == 0
+    base = {h.family: h.score for h in res.hits_clu}
+    assert {h.family: h.score for h in res.hits_mema}["ALPHA"] == min(1.0, base["ALPHA"] * 1.25)
+    never = eng.analyse(text, {"intuition": {"confirm_window": 100}}, SCHEMA, [])
+    assert never.telemetry["_intuition"]["confirmed"] == 0
+    assert [h.score for h in never.hits_mema] == [h.score for h in never.hits_clu]
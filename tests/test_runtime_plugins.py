@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from enginelib.runtime import EngineRuntime, PluginRegistry
+
+PLUGIN = (
+    "from enginelib.runtime import MarkerHit\n"
+    "def detect(seg):\n"
+    "    return [MarkerHit({name!r}, 'REPAIR', (0, 1), 1.0)] if 'leid' in seg else []\n"
+)
+
+
+def _write(path: Path, name: str, mtime_ns: int) -> None:
+    path.write_text(PLUGIN.format(name=name), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_registry_loads_once_and_reloads_only_changed_files(tmp_path):
+    plugin = tmp_path / "detect_sorry.py"
+    _write(plugin, "ATO_SORRY", 1_000_000_000)
+    (tmp_path / "helper.py").write_text("raise SystemExit\n", encoding="utf-8")
+    reg = PluginRegistry(tmp_path)
+    first = reg.detectors()
+    assert [name for name, _ in first] == ["detect_sorry"] and reg.last["loaded"] == 1
+    assert reg.detectors() is first and reg.last["loaded"] == 0
+    os.utime(plugin, ns=(2_000_000_000, 2_000_000_000))  # touched, same bytes
+    assert reg.detectors() is first and reg.loads == 1
+    _write(plugin, "ATO_EXCUSE", 3_000_000_000)
+    (detect,) = [d for _, d in reg.detectors()]
+    assert reg.loads == 2 and detect("tut mir leid")[0].name == "ATO_EXCUSE"
+    plugin.unlink()
+    assert reg.detectors() == []
+
+
+def test_detect_markers_loads_plugins_once_per_request(tmp_path):
+    eng = EngineRuntime(Path(__file__).resolve().parents[1])
+    eng.plugins_dir = tmp_path
+    _write(tmp_path / "detect_sorry.py", "ATO_SORRY", 1_000_000_000)
+    hits = eng.detect_markers(["es tut mir leid", "ok", "leid"] * 20)
+    assert len(hits) == 40 and hits[-1].meta["segment"] == 59
+    assert eng.telemetry["_plugin_load"]["loaded"] == 1
+    eng.detect_markers(["leid"])
+    assert eng.telemetry["_plugin_load"] == {"plugins": 1, "loaded": 0,
+                                             "load_ms": eng.telemetry["_plugin_load"]["load_ms"]}
+    assert eng._registry.loads == 1
+
+
+WORDS = (
+    "from enginelib.runtime import MarkerHit\n"
+    "import re, time\n"
+    "def detect(seg):\n"
+    "    if 'hang' in seg and {hang}:\n"
+    "        time.sleep(1.5)\n"
+    "    return [MarkerHit({name!r} + m.group(), 'F', m.span(), 0.5) for m in re.finditer({pattern!r}, seg)]\n"
+)
+
+
+def _runtime(tmp_path, hang=False, **kw):
+    (tmp_path / "detect_a.py").write_text(WORDS.format(name="A_", pattern=r"\bl\w+", hang=False), encoding="utf-8")
+    (tmp_path / "detect_b.py").write_text(WORDS.format(name="B_", pattern=r"\b\w{5}\b", hang=hang), encoding="utf-8")
+    eng = EngineRuntime(Path(__file__).resolve().parents[1], **kw)
+    eng.plugins_dir = tmp_path
+    return eng
+
+
+def _flat(hits):
+    return [(h.name, h.span, h.meta["segment"]) for h in hits]
+
+
+def test_pooled_detection_is_identical_to_the_serial_path(tmp_path):
+    segments = [f"leid {i} lange Pause, alles gut, liebe Grüße {i % 7}" for i in range(40)]
+    expected = _flat(_runtime(tmp_path).detect_markers(segments))
+    for executor in ("thread", "process"):
+        eng = _runtime(tmp_path, detect_executor=executor, detect_workers=3)
+        try:
+            assert _flat(eng.detect_markers(segments)) == expected
+            assert eng.telemetry["_detect_errors"] == []
+        finally:
+            eng.close()
+
+
+def test_plugin_timeout_is_recorded_instead_of_hanging(tmp_path):
+    eng = _runtime(tmp_path, hang=True, detect_executor="thread", detect_workers=2,
+                   plugin_timeout_s={"detect_b": 0.2})
+    segments = ["liebe Grüße", "hang on", "lange Pause"]
+    t0 = time.perf_counter()
+    hits = _flat(eng.detect_markers(segments))
+    assert time.perf_counter() - t0 < 1.0
+    assert eng.telemetry["_detect_errors"] == [{"plugin": "detect_b", "segment": 1, "error": "timeout after 0.2s"}]
+    assert hits == [("A_liebe", (0, 5), 0), ("B_liebe", (0, 5), 0), ("B_Grüße", (6, 11), 0),
+                    ("A_lange", (0, 5), 2)]
+    eng.close()
+
+
+def test_hung_worker_process_is_terminated(tmp_path):
+    eng = _runtime(tmp_path, hang=True, detect_executor="process", detect_workers=2,
+                   plugin_timeout_s={"detect_b": 0.3})
+    segments = ["liebe Grüße", "hang on", "lange Pause", "leid"]
+    t0 = time.perf_counter()
+    try:
+        eng.detect_markers(segments)  # warm-up: forked workers load the plugins once
+        hits = _flat(eng.detect_markers(segments))
+    finally:
+        eng.close()
+    # the sleeping worker is gone, not left behind by the abandoned pool
+    assert not multiprocessing.active_children() and time.perf_counter() - t0 < 1.5
+    assert eng.telemetry["_detect_errors"] == [{"plugin": "detect_b", "segment": 1, "error": "timeout after 0.3s"}]
+    assert hits == [("A_liebe", (0, 5), 0), ("B_liebe", (0, 5), 0), ("B_Grüße", (6, 11), 0),
+                    ("A_lange", (0, 5), 2), ("A_leid", (0, 4), 3)]
+
+
+def test_hung_plugin_does_not_block_close_or_exit(tmp_path):
+    # thread mode: a timeout moves detection to worker processes, since a thread cannot be stopped
+    (tmp_path / "detect_a.py").write_text(WORDS.format(name="A_", pattern=r"\bl\w+", hang=False), encoding="utf-8")
+    (tmp_path / "detect_b.py").write_text(WORDS.format(name="B_", pattern=r"\w+", hang=True).replace("1.5", "60"),
+                                          encoding="utf-8")
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from enginelib.runtime import EngineRuntime\n"
+        "eng = EngineRuntime(Path(sys.argv[1]), detect_executor='thread', detect_workers=2,\n"
+        "                    plugin_timeout_s={'detect_b': 0.3})\n"
+        "eng.plugins_dir = Path(sys.argv[2])\n"
+        "hits = eng.detect_markers(['liebe Grüße', 'hang on'])\n"
+        "print(len(hits), eng.telemetry['_detect_errors'][0]['plugin'])\n"
+        "eng.close()\n"
+    )
+    root = Path(__file__).resolve().parents[1]
+    t0 = time.perf_counter()
+    res = subprocess.run([sys.executable, "-c", script, str(root), str(tmp_path)], capture_output=True, text=True,
+                         cwd=root, timeout=30)
+    assert res.returncode == 0, res.stderr
+    assert res.stdout.split() == ["3", "detect_b"] and time.perf_counter() - t0 < 10
@@ -0,0 +1,32 @@
+from enginelib.runtime import MarkerHit, ScoringMatrix
+
+SCORINGS = {"trust": {"families": {"SUPPORT": 0.7, "CONFLICT": -0.4}}, "wut": {"families": {"CONFLICT": 1.0}}}
+AXES = {"tension_calm": {"CONFLICT": 1.0, "SUPPORT": -0.6}}
+LENSES = {"SUPPORT": ["EFT.attunement"], "CONFLICT": ["SFT.protest", "EFT.attunement"]}
+
+
+def _hits():
+    return [MarkerHit("ATO_S", "SUPPORT", (0, 1), 0.5), MarkerHit("ATO_C", "CONFLICT", (0, 1), 0.25),
+            MarkerHit("CAND_C", "CONFLICT", (0, 1), 0.5), MarkerHit("ATO_U", "UNCERTAINTY", (0, 1), 0.4),
+            MarkerHit("ATO_X", "UNMAPPED", (0, 1), 0.9)]
+
+
+def test_one_pass_matches_the_maps():
+    out = ScoringMatrix(SCORINGS, AXES, LENSES).apply(_hits())
+    # indices ignore CAND_*: SUPPORT 0.5, CONFLICT 0.25
+    assert out["indices"] == {"trust": 0.7 * 0.5 - 0.4 * 0.25, "wut": 0.25}
+    assert out["contributors"]["trust"] == [{"family": "SUPPORT", "weighted": 0.35},
+                                            {"family": "CONFLICT", "weighted": -0.1}]
+    # axes, lenses and needs count every hit: CONFLICT 0.75
+    assert out["axes"] == {"tension_calm": 0.75 - 0.6 * 0.5}
+    assert out["trend"] == {"tension_calm": "steigt"}
+    assert out["lenses"] == [{"lens": "EFT.attunement", "score": 1.25}, {"lens": "SFT.protest", "score": 0.75}]
+    assert out["needs"] == {"unsaid_need_index": 0.4 - 0.3 * 0.5, "attachment_vector": {"seek": 0.5, "avoid": 0.4}}
+
+
+def test_outputs_are_clamped_and_empty_maps_are_fine():
+    hits = [MarkerHit("ATO_C", "CONFLICT", (0, 1), 1.0)] * 3
+    out = ScoringMatrix(SCORINGS, AXES, LENSES).apply(hits)
+    assert out["indices"]["wut"] == 1.0 and out["axes"]["tension_calm"] == 1.0
+    empty = ScoringMatrix({}, {}, {}).apply(hits)
+    assert (empty["indices"], empty["axes"], empty["lenses"]) == ({}, {}, [])
@@ -0,0 +1,83 @@
+import re
+from pathlib import Path
+
+from enginelib.runtime import EngineRuntime, iter_chunks
+
+TEXT = "\n".join(f"{'AB'[i % 2]}: Turn {i}, es tut mir leid, wirklich. Das kommt nicht wieder vor!"
+                 for i in range(60))
+PLUGIN = (
+    "import re\n"
+    "from enginelib.runtime import MarkerHit\n"
+    "def detect(seg):\n"
+    "    return [MarkerHit('ATO_SORRY', 'REPAIR', m.span(), 1.0) for m in re.finditer(r'tut mir\\s+leid', seg)]\n"
+)
+
+
+def test_chunks_follow_turns_and_rebuild_the_text():
+    chunks = list(iter_chunks(TEXT, size=300, overlap=40))
+    assert "".join(c.text[c.overlap:] for c in chunks) == TEXT
+    for c in chunks:
+        assert len(c.text) <= 300 and TEXT[c.start:c.start + len(c.text)] == c.text
+        for off, who in c.turns[1:]:
+            assert TEXT[c.start + off:].startswith(f"{who}: ")
+    assert all(c.text.endswith("\n") for c in chunks[:-1])  # cut between turns
+    pieces = (TEXT[i:i + 97] for i in range(0, len(TEXT), 97))
+    assert [(c.start, c.text) for c in iter_chunks(pieces, size=300, overlap=40)] == \
+        [(c.start, c.text) for c in chunks]
+
+
+def test_long_turns_are_cut_after_sentences_then_words():
+    text = "A: " + "Das ist ein Satz. " * 40 + "\nB: " + "wort " * 200
+    chunks = list(iter_chunks(text, size=200, overlap=30))
+    assert "".join(c.text[c.overlap:] for c in chunks) == text
+    assert all(c.text[-1] in " \n" for c in chunks[:-1])
+    assert chunks[-1].speaker_at(0) == "B"
+
+
+def test_edge_matches_are_found_once_with_speakers(tmp_path):
+    (tmp_path / "detect_sorry.py").write_text(PLUGIN, encoding="utf-8")
+    eng = EngineRuntime(Path(__file__).resolve().parents[1])
+    eng.plugins_dir = tmp_path
+    text = "A: " + " ".join(["bla"] * 70) + " tut mir\nleid " + " ".join(["bla"] * 70)
+    chunks = list(eng.iter_segments(text, {"chunk_size": 150, "chunk_overlap": 40}))
+    hits = eng.detect_markers(chunks)
+    expected = [m.span() for m in re.finditer(r"tut mir\s+leid", text)]
+    assert [h.meta["span_global"] for h in hits] == expected
+    assert [h.meta["speaker"] for h in hits] == ["A"]
+
+    hits = eng.detect_markers(list(eng.iter_segments(TEXT, {"chunk_size": 300, "chunk_overlap": 40})))
+    assert [h.meta["span_global"] for h in hits] == [m.span() for m in re.finditer(r"tut mir\s+leid", TEXT)]
+    assert eng._balance(hits)["talk_time_ratio"] == {"A": 0.5, "B": 0.5}
+
+
+def test_matches_clipped_at_chunk_edges_are_kept_once(tmp_path):
+    run = ("import re\n"
+           "from enginelib.runtime import MarkerHit\n"
+           "def detect(seg):\n"
+           "    return [MarkerHit('ATO_RUN', 'RUN', m.span(), 1.0) for m in re.finditer(r'sorry(?: sorry)*', seg)]\n")
+    (tmp_path / "detect_run.py").write_text(run, encoding="utf-8")
+    eng = EngineRuntime(Path(__file__).resolve().parents[1])
+    eng.plugins_dir = tmp_path
+    text = "A: " + "bla " * 30 + "sorry " * 30 + "bla " * 30
+    hits = eng.detect_markers(list(eng.iter_segments(text, {"chunk_size": 150, "chunk_overlap": 40})))
+    # both chunks see the run clipped; one hit remains, spanning the whole run
+    assert [h.meta["span_global"] for h in hits] == [m.span() for m in re.finditer(r"sorry(?: sorry)*", text)]
+
+
+def test_analyse_reads_text_pieces(tmp_path):
+    from test_runtime_telemetry import SCHEMA, _runtime, _text
+
+    eng = _runtime(tmp_path, None)
+    text = _text(["alpha", "beta", "gamma", "delta", "omega"] * 2, 30)
+    whole = eng.analyse(text, {}, SCHEMA, [])
+    pieces = eng.analyse((text[i:i + 50] for i in range(0, len(text), 50)), {}, SCHEMA, [])
+    assert pieces.segments == whole.segments
+    assert pieces.telemetry["_heatmap_pyramid"] == whole.telemetry["_heatmap_pyramid"]
+
+
+def test_only_speaker_labels_start_turns():
+    text = "A: hallo\nNote: kein Sprecher\nperson b: gut\nUpdate: auch nicht\nB:kurz"
+    (chunk,) = iter_chunks(text, size=300, overlap=0)
+    assert [(text[off:].split("\n")[0], who) for off, who in chunk.turns[1:]] == \
+        [("A: hallo", "A"), ("person b: gut", "B"), ("B:kurz", "B")]
+    assert chunk.speaker_at(text.index("Note")) == "A" and chunk.speaker_at(text.index("Update")) == "B"
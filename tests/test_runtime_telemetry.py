@@ -0,0 +1,79 @@
+import threading
+from pathlib import Path
+
+from enginelib.runtime import EngineRuntime, TelemetryAggregator
+
+PLUGIN = (
+    "import re\n"
+    "from enginelib.runtime import MarkerHit\n"
+    "def detect(seg):\n"
+    "    return [MarkerHit('ATO_' + m.group().upper(), m.group().upper(), m.span(), 0.6)\n"
+    "            for m in re.finditer(r'\\b(?:alpha|beta|gamma|delta|omega|sigma)\\b', seg)]\n"
+)
+SCHEMA = {"chunk_size": 120, "chunk_overlap": 0}
+
+
+def _runtime(tmp_path, aggregator):
+    # the repo root keeps the canon outside resources/, which selftest() requires
+    root = Path(__file__).resolve().parents[1]
+    (tmp_path / "resources").mkdir()
+    for p in (root / "resources").iterdir():
+        (tmp_path / "resources" / p.name).symlink_to(p)
+    (tmp_path / "resources" / "markers_canonical.json").symlink_to(root / "markers_canonical.json")
+    (tmp_path / "enginelib").symlink_to(root / "enginelib")
+    (tmp_path / "plugins").mkdir()
+    (tmp_path / "plugins" / "detect_words.py").write_text(PLUGIN, encoding="utf-8")
+    return EngineRuntime(tmp_path, aggregator=aggregator)
+
+
+def _text(words, turns):
+    return "\n".join(f"{'AB'[i % 2]}: {' '.join(words)} und so weiter" for i in range(turns))
+
+
+def test_concurrent_requests_keep_their_own_telemetry(tmp_path):
+    agg = TelemetryAggregator(window=8)
+    eng = _runtime(tmp_path, agg)
+    small = _text(["alpha", "beta", "gamma", "delta", "omega"] * 2, 6)
+    large = _text(["alpha", "beta", "gamma", "delta", "omega", "sigma"] * 2, 40)
+    expected = {t: eng.analyse(t, {}, SCHEMA, []).telemetry for t in (small, large)}
+    assert expected[small]["_heatmap"] != expected[large]["_heatmap"]
+    seen = []
+
+    def worker(text):
+        for _ in range(10):
+            tel = eng.analyse(text, {}, SCHEMA, []).telemetry
+            seen.append(tel["_heatmap"] == expected[text]["_heatmap"]
+                        and tel["_indices"] == expected[text]["_indices"]
+                        and tel["SIGMA.counter_confirmed" if text is large else "ALPHA.counter_confirmed"] == 1)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in (small, large, small, large)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == [True] * 40
+    snap = agg.snapshot()
+    assert snap["counters"]["requests"] == 42 and snap["counters"]["status.ok"] == 42
+    assert snap["counters"]["family.ALPHA"] == 42
+    assert snap["series"]["elapsed_ms"]["n"] == 8 and len(snap["recent"]) == 8
+    assert set(eng.telemetry) in (set(expected[small]), set(expected[large]))  # last call only, no growth
+    eng.telemetry.clear()  # callers get a copy of the last request's telemetry
+    assert set(eng.telemetry) in (set(expected[small]), set(expected[large]))
+
+
+def test_aggregator_is_bounded_and_counts_gate_blocks(tmp_path):
+    agg = TelemetryAggregator(window=4, max_keys=6)
+    eng = _runtime(tmp_path, agg)
+    try:
+        eng.analyse("A: alpha", {}, SCHEMA, [])
+    except RuntimeError as e:
+        assert str(e) == "E_GATE_BLOCKED"
+    assert agg.snapshot()["counters"]["status.E_GATE_BLOCKED"] == 1
+    for i in range(100):
+        agg.count(f"key{i}")
+        agg.observe("latency", i)
+    snap = agg.snapshot()
+    assert len(snap["counters"]) == 7 and snap["counters"]["_other"] > 90
+    assert snap["series"]["latency"] == {"n": 4, "mean": 97.5, "p50": 98, "p95": 99, "last": 99}
+    snap["counters"].clear()
+    assert agg.snapshot()["counters"]